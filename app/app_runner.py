@@ -1,160 +1,603 @@
 import pandas as pd
 import dash
-from dash import dash_table, dcc, html, Input, Output
+from dash import dash_table, dcc, html, ctx, Input, Output, State, Patch
 import dash_bootstrap_components as dbc
+import os
+import gzip
+import json
+import hashlib
 import logging
+import tempfile
+import threading
+import weakref
 from datetime import datetime
-from typing import List, Dict
-from scraper.db_manager import DatabaseManager
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+from flask import Response, request
+from plotly.utils import PlotlyJSONEncoder
+from scraper.db_manager import DISPLAY_COLUMNS, DatabaseManager, format_price
+from scraper.metrics import REGISTRY
+
+# Pre-rendered product table of the default layout
+TABLE_SNAPSHOT_PATH = '/api/table'
+
+# DataFrames built by fetch_data, per database manager, with the data version and revision they were built from
+_frame_cache: "weakref.WeakKeyDictionary[DatabaseManager, Tuple[int, int, pd.DataFrame]]" = weakref.WeakKeyDictionary()
+_frame_cache_lock = threading.Lock()
 
 def fetch_data(db_manager: DatabaseManager) -> pd.DataFrame:
     """
     Fetches and processes data from the database.
     Returns processed DataFrame.
+    
+    Columns carry their display names but keep their types: Price is numeric and
+    only formatted by render_table, so the frame can be sorted by price.
+    The DataFrame is cached until the products change, so all open dashboards
+    share one query and one DataFrame build per change. Like get_table_snapshot,
+    the revision is only read when the data version moved, and commits that leave
+    the products alone (crawl progress) keep the frame. Concurrent callers wait
+    for the build in progress instead of starting their own.
+    The returned DataFrame is shared and must not be modified.
     """
     try:
-        # Get data from database manager 
-        data = db_manager.get_all_products()
+        version = db_manager.data_version()
+        with _frame_cache_lock:
+            cached = _frame_cache.get(db_manager)
+            if cached is not None and cached[0] == version:
+                return cached[2]
+
+            revision = db_manager.revision()
+            if cached is not None and cached[1] == revision:
+                df = cached[2]
+            else:
+                # Typed columns straight from the database
+                df = db_manager.get_products_frame()
+                df = df[list(DISPLAY_COLUMNS)].rename(columns=DISPLAY_COLUMNS)
+            _frame_cache[db_manager] = (version, revision, df)
+            
+            return df
+    except Exception as e:
+        logging.error(f"Error fetching data: {e}")
+        raise
+
+def render_cell(col: str, value):
+    """
+    Content of one table cell: URLs become links and numeric prices are formatted.
+    """
+    if col == "URL":
+        return html.A(
+            "Link",
+            href=value,
+            className="text-info text-decoration-underline"
+        )
+    if col == "Price" and isinstance(value, (int, float)):
+        return format_price(value)
+    return value
+
+def render_table(columns: List[str], records: List[Dict]) -> dbc.Table:
+    """
+    Builds the product table component for the given rows.
+    """
+    return dbc.Table(
+        # Create header
+        [html.Thead(html.Tr([html.Th(col) for col in columns]))]+
+        # Create body with URL links
+        [html.Tbody([
+            html.Tr([html.Td(render_cell(col, row[col])) for col in columns])
+            for row in records
+        ])],
+        dark=True,
+        bordered=True,
+        hover=True,
+        responsive=True,
+        striped=True,
+        className="text-light",
+        style={
+            'backgroundColor': 'rgb(50, 50, 50)',
+            'minWidth': '180px'
+        }
+    )
+
+# Sort options of the paginated table: label -> (column, descending)
+SORT_OPTIONS = {
+    'Newest first': ('timestamp', True),
+    'Oldest first': ('timestamp', False),
+    'Price (low to high)': ('price', False),
+    'Price (high to low)': ('price', True),
+    'Name (A-Z)': ('product_name', False),
+    'Name (Z-A)': ('product_name', True),
+}
+
+def pagination_controls() -> dbc.Row:
+    """
+    Filter, sort and page navigation controls of the paginated table.
+    """
+    return dbc.Row([
+        dbc.Col(
+            dbc.Input(id='filter-input', placeholder='Filter by product name',
+                      type='text', debounce=True),
+            width=4
+        ),
+        dbc.Col(
+            dcc.Dropdown(id='sort-dropdown',
+                         options=[{'label': label, 'value': label} for label in SORT_OPTIONS],
+                         value='Newest first', clearable=False,
+                         className="text-dark"),
+            width=3
+        ),
+        dbc.Col([
+            dbc.Button("Previous", id='prev-page-button', color="secondary", className="me-2"),
+            dbc.Button("Next", id='next-page-button', color="secondary"),
+            html.Span(id='page-indicator', className="ms-3")
+        ], width=5)
+    ], className="mb-3")
+
+def initial_page_state() -> Dict:
+    """
+    Pagination state kept in the browser: the cursors of the visited pages and of the next one.
+    """
+    return {'cursors': [None], 'next': None}
+
+def load_page(db_manager: DatabaseManager, state: Dict, action: Optional[str],
+              search: Optional[str], sort_label: Optional[str], page_size: int) -> Tuple[List[Dict], Dict]:
+    """
+    Loads the page of products to display after a navigation action.
+    
+    Args:
+        db_manager: DatabaseManager to read products from
+        state: Current pagination state (see initial_page_state)
+        action: 'next', 'prev', 'reset' (filter or sort changed) or None to reload the current page
+        search: Product name filter
+        sort_label: Key of SORT_OPTIONS
+        page_size: Number of products per page
         
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
+    Returns:
+        Tuple of the page rows and the new pagination state
+    """
+    cursors = list((state or initial_page_state())['cursors'])
+    if action == 'reset':
+        cursors = [None]
+    elif action == 'next' and state and state.get('next') is not None:
+        cursors.append(state['next'])
+    elif action == 'prev' and len(cursors) > 1:
+        cursors.pop()
+
+    sort_by, descending = SORT_OPTIONS.get(sort_label, SORT_OPTIONS['Newest first'])
+    page = db_manager.get_products_page(page_size=page_size, sort_by=sort_by, descending=descending,
+                                        after=cursors[-1], search=search or None)
+    return page['rows'], {'cursors': cursors, 'next': page['next_cursor']}
+
+def register_paginated_table(app: dash.Dash, db_manager: DatabaseManager, page_size: int) -> None:
+    """
+    Registers the callback rendering one page at a time; only the visible page is sent to the browser.
+    """
+    @app.callback(
+        [Output('table-container', 'children'),
+         Output('page-state-store', 'data'),
+         Output('page-indicator', 'children'),
+         Output('last-update-store', 'data'),
+         Output('loading-output', 'children'),
+         Output('error-message', 'children')],
+        [Input('refresh-button', 'n_clicks'),
+         Input('interval-component', 'n_intervals'),
+         Input('prev-page-button', 'n_clicks'),
+         Input('next-page-button', 'n_clicks'),
+         Input('filter-input', 'value'),
+         Input('sort-dropdown', 'value')],
+        [State('page-state-store', 'data')]
+    )
+    def refresh_page(n_clicks, n_intervals, prev_clicks, next_clicks, search, sort_label, state):
+        """
+        Callback to load the requested page when navigating, filtering, sorting or refreshing
+        """
+        actions = {
+            'next-page-button': 'next',
+            'prev-page-button': 'prev',
+            'filter-input': 'reset',
+            'sort-dropdown': 'reset',
+        }
+        try:
+            rows, state = load_page(db_manager, state, actions.get(ctx.triggered_id),
+                                    search, sort_label, page_size)
+            current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            indicator = f"Page {len(state['cursors'])}"
+            if not rows:
+                return None, state, indicator, current_time, None, "No data available"
+            return render_table(list(rows[0].keys()), rows), state, indicator, current_time, None, None
+        except Exception as e:
+            logging.error(f"Error loading page: {e}")
+            return dash.no_update, dash.no_update, dash.no_update, dash.no_update, None, f"Error loading page: {str(e)}"
+
+# Renders the merged product store in the browser, newest change first
+RENDER_PRODUCTS_JS = """
+function(products) {
+    const rows = Object.values(products || {});
+    if (rows.length === 0) {
+        return [null, "No data available"];
+    }
+    rows.sort((a, b) => (a.timestamp < b.timestamp) - (a.timestamp > b.timestamp));
+    const el = (type, props, namespace) => ({type: type, namespace: namespace || 'dash_html_components', props: props});
+    const columns = ['Product name', 'URL', 'Price', 'Delivery time'];
+    const header = el('Thead', {children: el('Tr', {children: columns.map(col => el('Th', {children: col}))})});
+    const body = el('Tbody', {children: rows.map(row => el('Tr', {children: columns.map(col => el('Td', {
+        children: col === 'URL'
+            ? el('A', {children: 'Link', href: row.URL, className: 'text-info text-decoration-underline'})
+            : row[col]
+    })), key: row.URL}))});
+    return [el('Table', {
+        children: [header, body], dark: true, bordered: true, hover: true, responsive: true, striped: true,
+        className: 'text-light', style: {backgroundColor: 'rgb(50, 50, 50)', minWidth: '180px'}
+    }, 'dash_bootstrap_components'), null];
+}
+"""
+
+def load_changes(db_manager: DatabaseManager, sync_state: Optional[Dict]) -> Tuple[Union[Dict, Patch], Dict]:
+    """
+    Loads the products changed since the browser's watermark.
+    
+    Args:
+        db_manager: DatabaseManager to read products from
+        sync_state: {'watermark': ..., 'generation': ...} from the previous load, or None
         
-        return df
+    Returns:
+        Tuple of the products store update and the new sync state. The update is
+        a full {url: row} dictionary on the first load or after rows were deleted,
+        otherwise a Patch that only carries the changed rows.
+    """
+    sync_state = sync_state or {}
+    changes = db_manager.get_products_changed_since(sync_state.get('watermark'),
+                                                    sync_state.get('generation'))
+    if changes['full']:
+        update = {row['URL']: row for row in changes['rows']}
+    else:
+        update = Patch()
+        for row in changes['rows']:
+            update[row['URL']] = row
+    return update, {'watermark': changes['watermark'], 'generation': changes['generation']}
+
+def register_incremental_table(app: dash.Dash, db_manager: DatabaseManager) -> None:
+    """
+    Registers the callbacks that send only changed rows and merge them into the browser's copy.
+    """
+    @app.callback(
+        [Output('products-store', 'data'),
+         Output('sync-state-store', 'data'),
+         Output('last-update-store', 'data'),
+         Output('loading-output', 'children')],
+        [Input('refresh-button', 'n_clicks'),
+         Input('interval-component', 'n_intervals')],
+        [State('sync-state-store', 'data')]
+    )
+    def refresh_changes(n_clicks, n_intervals, sync_state):
+        """
+        Callback to fetch the rows changed since the last refresh
+        """
+        try:
+            update, sync_state = load_changes(db_manager, sync_state)
+            return update, sync_state, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), None
+        except Exception as e:
+            logging.error(f"Error refreshing data: {e}")
+            return dash.no_update, dash.no_update, dash.no_update, None
+
+    app.clientside_callback(
+        RENDER_PRODUCTS_JS,
+        [Output('table-container', 'children'),
+         Output('error-message', 'children')],
+        Input('products-store', 'data')
+    )
+
+# Loads the pre-rendered table; the browser revalidates its copy with the ETag
+LOAD_SNAPSHOT_JS = """
+async function(n_clicks, n_intervals) {
+    const no_update = window.dash_clientside.no_update;
+    try {
+        const response = await fetch('TABLE_SNAPSHOT_PATH', {cache: 'no-cache'});
+        if (!response.ok) {
+            return [no_update, no_update, null, 'Error refreshing data: ' + response.status];
+        }
+        const snapshot = await response.json();
+        return [snapshot.table, new Date().toLocaleString('sv-SE'), null, snapshot.error];
+    } catch (e) {
+        return [no_update, no_update, null, 'Error refreshing data: ' + e];
+    }
+}
+"""
+
+def register_metrics_endpoint(app: dash.Dash) -> None:
+    """
+    Serves the crawl and database metrics at /metrics in the Prometheus text format.
+    
+    The metrics are those of this process only, so this is for single-process
+    serving; crawlers in other processes serve theirs with scrape --metrics-port.
+    """
+    @app.server.route('/metrics')
+    def metrics():
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+class TableSnapshot(NamedTuple):
+    """Pre-rendered product table: gzip-compressed JSON and its ETag"""
+    revision: int
+    etag: str
+    gzipped: bytes
+
+# Snapshots per database manager, with the data version they were checked at
+_snapshot_cache: "weakref.WeakKeyDictionary[DatabaseManager, Tuple[int, TableSnapshot]]" = weakref.WeakKeyDictionary()
+_snapshot_lock = threading.Lock()
+
+def render_snapshot(db_manager: DatabaseManager, revision: int) -> TableSnapshot:
+    """
+    Renders the product table once and compresses it for serving.
+    
+    The gzip header carries no timestamp, so every process rendering the same
+    data produces the same bytes and therefore the same ETag.
+    """
+    df = fetch_data(db_manager)
+    if df.empty:
+        payload = {'table': None, 'error': "No data available"}
+    else:
+        payload = {'table': render_table(list(df.columns), df.to_dict('records')), 'error': None}
+    body = json.dumps(payload, cls=PlotlyJSONEncoder, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+    etag = hashlib.blake2b(gzipped, digest_size=16).hexdigest()
+    return TableSnapshot(revision, etag, gzipped)
+
+def _load_snapshot(path: str, revision: int) -> Optional[TableSnapshot]:
+    try:
+        with open(path, 'rb') as f:
+            gzipped = f.read()
+    except FileNotFoundError:
+        return None
+    return TableSnapshot(revision, hashlib.blake2b(gzipped, digest_size=16).hexdigest(), gzipped)
+
+def _store_snapshot(snapshot_dir: str, path: str, snapshot: TableSnapshot) -> None:
+    """Writes the snapshot atomically and removes those of older revisions"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=snapshot_dir, suffix='.partial')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(snapshot.gzipped)
+    os.replace(partial, path)
+    for name in os.listdir(snapshot_dir):
+        if name.startswith('table-') and os.path.join(snapshot_dir, name) != path:
+            try:
+                os.remove(os.path.join(snapshot_dir, name))
+            except OSError:
+                pass
+
+def get_table_snapshot(db_manager: DatabaseManager, snapshot_dir: Optional[str] = None) -> TableSnapshot:
+    """
+    Returns the pre-rendered table for the current data, rendering it only after a change.
+    
+    Every request costs a PRAGMA; the revision is only read when some commit
+    happened, and the table is only rendered when the revision moved. With a
+    snapshot_dir, the compressed table is shared through files, so of several
+    worker processes only the first one to see a new revision renders it.
+    
+    Args:
+        db_manager: DatabaseManager to read products from
+        snapshot_dir: Directory shared by the worker processes, or None to keep
+                      snapshots in this process only
+    """
+    try:
+        version = db_manager.data_version()
+        with _snapshot_lock:
+            cached = _snapshot_cache.get(db_manager)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            revision = db_manager.revision()
+            if cached is not None and cached[1].revision == revision:
+                # Commits that didn't change the products, e.g. crawl progress
+                snapshot = cached[1]
+            else:
+                path = os.path.join(snapshot_dir, f'table-{revision}.json.gz') if snapshot_dir else None
+                snapshot = _load_snapshot(path, revision) if path else None
+                if snapshot is None:
+                    snapshot = render_snapshot(db_manager, revision)
+                    if path:
+                        _store_snapshot(snapshot_dir, path, snapshot)
+            _snapshot_cache[db_manager] = (version, snapshot)
+            return snapshot
     except Exception as e:
-        logging.error(f"Error fetching data: {e}")
+        logging.error(f"Error building the table snapshot: {e}")
         raise
 
-def run_application(db_manager: DatabaseManager) -> None:
+def register_table_snapshot(app: dash.Dash, db_manager: DatabaseManager,
+                            snapshot_dir: Optional[str] = None) -> None:
+    """
+    Serves the pre-rendered table at TABLE_SNAPSHOT_PATH and loads it into the page.
+    
+    Responses carry an ETag and must be revalidated, so browsers and nginx get a
+    304 without a body as long as the data is unchanged. The body is stored
+    gzip-compressed and sent as is to every client that accepts gzip.
+    """
+    @app.server.route(TABLE_SNAPSHOT_PATH)
+    def table_snapshot():
+        snapshot = get_table_snapshot(db_manager, snapshot_dir)
+        headers = {'ETag': f'"{snapshot.etag}"', 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+        if request.if_none_match.contains(snapshot.etag):
+            return Response(status=304, headers=headers)
+        if 'gzip' in request.accept_encodings:
+            return Response(snapshot.gzipped, mimetype='application/json',
+                            headers={**headers, 'Content-Encoding': 'gzip'})
+        return Response(gzip.decompress(snapshot.gzipped), mimetype='application/json', headers=headers)
+
+    app.clientside_callback(
+        LOAD_SNAPSHOT_JS.replace('TABLE_SNAPSHOT_PATH', app.get_relative_path(TABLE_SNAPSHOT_PATH)),
+        [Output('table-container', 'children'),
+         Output('last-update-store', 'data'),
+         Output('loading-output', 'children'),
+         Output('error-message', 'children')],
+        [Input('refresh-button', 'n_clicks'),
+         Input('interval-component', 'n_intervals')]
+    )
+
+def create_app(db_manager: DatabaseManager, paginated: bool = False, page_size: int = 50,
+               incremental: bool = False, snapshot_dir: Optional[str] = None,
+               metrics: bool = True) -> dash.Dash:
+    """
+    Builds the Dash web application with dynamic data refresh capability.
+    
+    Args:
+        db_manager: DatabaseManager to read products from
+        paginated: Only send the visible page to the browser, with sorting and
+                   filtering done by the database
+        page_size: Number of products per page in paginated mode
+        incremental: Keep the catalog in the browser and only send rows changed
+                     since the last refresh
+        snapshot_dir: Directory where worker processes share the pre-rendered table
+        metrics: Serve /metrics; leave off with several worker processes, where
+                 each request would only see the answering worker's numbers
+    """
+    if paginated and incremental:
+        raise ValueError("paginated and incremental modes cannot be combined")
+    app = dash.Dash(__name__, 
+                   external_stylesheets=[dbc.themes.SLATE],
+                   suppress_callback_exceptions=True)
+    if metrics:
+        register_metrics_endpoint(app)
+
+    # Pre-render the table, skipped in modes that load their first data on their own
+    if not paginated and not incremental:
+        get_table_snapshot(db_manager, snapshot_dir)
+    initial_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    app.layout = dbc.Container([
+        # Store components
+        dcc.Store(id='last-update-store', data=initial_time),
+        dcc.Interval(id='interval-component', interval=300000), # 5 minute refresh
+        
+        dbc.Row([
+            dbc.Col(
+                html.H1("Product Data", className="text-center text-light my-4"),
+                width=9
+            ),
+            dbc.Col(
+                dbc.Button(
+                    ["Refresh Data ", html.I(className="fas fa-sync-alt")],
+                    id="refresh-button",
+                    color="danger", 
+                    className="mt-4"
+                ),
+                width=3
+            )
+        ]),
+
+        dbc.Row([
+            dbc.Col(
+                html.Div(id="last-update-time", className="text-light mb-3")
+            )
+        ]),
+
+        pagination_controls() if paginated else html.Div(),
+        dcc.Store(id='page-state-store', data=initial_page_state()),
+        dcc.Store(id='products-store', data={}),
+        dcc.Store(id='sync-state-store', data=None),
+
+        dbc.Row([
+            dbc.Col(
+                id='table-container',
+                width=12
+            )
+        ]),
+
+        dcc.Loading(
+            id="loading",
+            type="default",
+            children=html.Div(id="loading-output")
+        ),
+
+        html.Div(id="error-message", className="text-danger")
+    ],
+    fluid=True,
+    className="bg-dark text-light")
+
+    if paginated:
+        register_paginated_table(app, db_manager, page_size)
+    elif incremental:
+        register_incremental_table(app, db_manager)
+    else:
+        register_table_snapshot(app, db_manager, snapshot_dir)
+
+    @app.callback(
+        Output('last-update-time', 'children'),
+        [Input('last-update-store', 'data')]
+    )
+    def update_timestamp(timestamp):
+        """
+        Callback to update the last refresh timestamp display
+        """
+        if timestamp:
+            return f"Last updated: {timestamp}"
+        return "Last updated: Never"
+
+    return app
+
+def serve_production(app_factory: Callable[[], dash.Dash], db_manager: DatabaseManager,
+                     host: str = '0.0.0.0', port: int = 8080, workers: int = 4) -> None:
+    """
+    Serves the app with gunicorn, one app per worker process.
+    
+    Args:
+        app_factory: Builds the Dash app, called once in every worker
+        db_manager: DatabaseManager the app reads from; it is closed before the
+                    workers are forked, so each worker opens its own connections
+        host: Interface to listen on
+        port: Port to listen on
+        workers: Number of worker processes
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        logging.error("Serving with several workers needs gunicorn (pip install gunicorn)")
+        raise
+
+    class DashApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+
+        def load(self):
+            return app_factory().server
+
+    # SQLite connections must not be carried across fork()
+    db_manager.close()
+    DashApplication().run()
+
+def run_application(db_manager: DatabaseManager, paginated: bool = False, page_size: int = 50,
+                    incremental: bool = False, host: str = '0.0.0.0', port: int = 8080,
+                    workers: int = 1, snapshot_dir: Optional[str] = None) -> None:
     """
     Runs the Dash web application with dynamic data refresh capability.
+    
+    Args:
+        db_manager: DatabaseManager to read products from
+        paginated: Only send the visible page to the browser, with sorting and
+                   filtering done by the database
+        page_size: Number of products per page in paginated mode
+        incremental: Keep the catalog in the browser and only send rows changed
+                     since the last refresh
+        host: Interface to listen on
+        port: Port to listen on
+        workers: Worker processes; more than one serves with gunicorn instead of
+                 the development server
+        snapshot_dir: Directory where workers share the pre-rendered table,
+                      defaults to one next to the database when workers > 1
     """
+    if paginated and incremental:
+        raise ValueError("paginated and incremental modes cannot be combined")
     try:
-        app = dash.Dash(__name__, 
-                       external_stylesheets=[dbc.themes.SLATE],
-                       suppress_callback_exceptions=True)
-
-        # Initial data load
-        df = fetch_data(db_manager)
-        initial_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        app.layout = dbc.Container([
-            # Store components
-            dcc.Store(id='last-update-store', data=initial_time),
-            dcc.Interval(id='interval-component', interval=300000), # 5 minute refresh
-            
-            dbc.Row([
-                dbc.Col(
-                    html.H1("Product Data", className="text-center text-light my-4"),
-                    width=9
-                ),
-                dbc.Col(
-                    dbc.Button(
-                        ["Refresh Data ", html.I(className="fas fa-sync-alt")],
-                        id="refresh-button",
-                        color="danger", 
-                        className="mt-4"
-                    ),
-                    width=3
-                )
-            ]),
-
-            dbc.Row([
-                dbc.Col(
-                    html.Div(id="last-update-time", className="text-light mb-3")
-                )
-            ]),
-
-            dbc.Row([
-                dbc.Col(
-                    id='table-container',
-                    width=12
-                )
-            ]),
-
-            dcc.Loading(
-                id="loading",
-                type="default",
-                children=html.Div(id="loading-output")
-            ),
+        if workers > 1:
+            if snapshot_dir is None:
+                snapshot_dir = os.path.splitext(db_manager.db_name)[0] + '_snapshots'
+            # Each worker would report only its own counters; the crawlers serve theirs
+            serve_production(lambda: create_app(db_manager, paginated, page_size, incremental, snapshot_dir,
+                                                metrics=False),
+                             db_manager, host, port, workers)
+            return
 
-            html.Div(id="error-message", className="text-danger")
-        ],
-        fluid=True,
-        className="bg-dark text-light")
-
-        @app.callback(
-            [Output('table-container', 'children'),
-             Output('last-update-store', 'data'),
-             Output('loading-output', 'children'),
-             Output('error-message', 'children')],
-            [Input('refresh-button', 'n_clicks'),
-             Input('interval-component', 'n_intervals')],
-            prevent_initial_call=True
-        )
-        def refresh_data(n_clicks, n_intervals):
-            """
-            Callback to refresh the data when the refresh button is clicked or interval triggers
-            """
-            try:
-                df = fetch_data(db_manager)
-                if df.empty:
-                    logging.warning("No data found in database")
-                    return None, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), None, "No data available"
-                
-                current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                # Create table
-                table = dbc.Table(
-                    # Create header
-                    [html.Thead(html.Tr([html.Th(col) for col in df.columns]))]+
-                    # Create body with URL links
-                    [html.Tbody([
-                        html.Tr([
-                            html.Td(
-                                html.A(
-                                    "Link",
-                                    href=row["URL"],
-                                    className="text-info text-decoration-underline"
-                                ) if col == "URL"
-                                else row[col]
-                            )
-                            for col in df.columns
-                        ])
-                        for row in df.to_dict('records')
-                    ])],
-                    dark=True,
-                    bordered=True,
-                    hover=True,
-                    responsive=True,
-                    striped=True,
-                    className="text-light",
-                    style={
-                        'backgroundColor': 'rgb(50, 50, 50)',
-                        'minWidth': '180px'
-                    }
-                )
-                
-                return table, current_time, None, None
-                
-            except Exception as e:
-                logging.error(f"Error refreshing data: {e}")
-                return dash.no_update, dash.no_update, None, f"Error refreshing data: {str(e)}"
-
-        @app.callback(
-            Output('last-update-time', 'children'),
-            [Input('last-update-store', 'data')]
-        )
-        def update_timestamp(timestamp):
-            """
-            Callback to update the last refresh timestamp display
-            """
-            if timestamp:
-                return f"Last updated: {timestamp}"
-            return "Last updated: Never"
-
-        app.run(host='0.0.0.0', port='8080')
+        app = create_app(db_manager, paginated, page_size, incremental, snapshot_dir)
+        app.run(host=host, port=port)
         logging.info("Dash application started.")
         
     except Exception as e:
         logging.error(f"Error starting the application: {e}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,53 @@
+"""
+Microbenchmark: streaming ProductExtractor vs. the BeautifulSoup extraction path.
+
+Usage:
+    python -m benchmarks.bench_extractor [--pages 200] [--filler 400]
+"""
+import argparse
+import timeit
+from scraper.scraper import parse_product_page, parse_product_page_soup
+
+PROPERTIES = ["og:title", "og:url", "product:price:amount"]
+
+def build_page(index: int, filler: int) -> str:
+    """Builds a synthetic product page with roughly the structure of a real one"""
+    body = ''.join(
+        f'<div class="row"><p class="description">Specification line {i} '
+        f'<a href="/product/{i}">link</a> <span class="badge">{i}</span></p></div>'
+        for i in range(filler)
+    )
+    return f'''<!DOCTYPE html><html><head>
+<title>Product {index}</title>
+<meta property="og:title" content="Product {index}">
+<meta property="og:url" content="https://azerty.nl/product/{index}">
+<meta property="product:price:amount" content="{index}.99">
+<script>window.dataLayer = [];</script>
+</head><body><header>{body[:len(body) // 4]}</header>
+<span class="product-delivery-time"><i class="material-icons">timer</i> Morgen in huis</span>
+<main>{body}</main></body></html>'''
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=200, help='Number of pages per run')
+    parser.add_argument('--filler', type=int, default=400, help='Filler blocks per page (controls page size)')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs, the best is reported')
+    args = parser.parse_args()
+
+    pages = [build_page(i, args.filler) for i in range(args.pages)]
+    for page in pages[:5]:
+        assert parse_product_page(page, PROPERTIES) == parse_product_page_soup(page, PROPERTIES)
+
+    avg_size = sum(len(page) for page in pages) / len(pages)
+    print(f"{args.pages} pages, average size {avg_size / 1024:.1f} KiB")
+    baseline = None
+    for name, func in [('beautifulsoup', parse_product_page_soup), ('streaming', parse_product_page)]:
+        best = min(timeit.repeat(lambda: [func(page, PROPERTIES) for page in pages],
+                                 number=1, repeat=args.repeat))
+        per_page_ms = best / len(pages) * 1000
+        baseline = baseline or per_page_ms
+        print(f"{name:>14}: {per_page_ms:8.3f} ms/page  {len(pages) / best:8.1f} pages/s  "
+              f"({baseline / per_page_ms:.1f}x)")
+
+if __name__ == '__main__':
+    main()
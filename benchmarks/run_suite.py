@@ -0,0 +1,226 @@
+"""
+Offline benchmark suite: crawl throughput against the local synthetic retailer,
+database upsert throughput and dashboard refresh cost at several table sizes.
+
+Results are written as JSON; pass an earlier result file with --compare to
+print the relative change of every metric.
+
+Usage:
+    python -m benchmarks.run_suite [--pages 200] [--rows 1000 10000 100000]
+                                   [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+from plotly.utils import PlotlyJSONEncoder
+from app import app_runner
+from benchmarks.bench_extractor import PROPERTIES
+from benchmarks.server import start_server
+from scraper.async_scraper import scrape_concurrently
+from scraper.db_manager import DatabaseManager
+from scraper.scraper import parse_product_page, scrape_and_save_to_db
+from scraper.session import create_session
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+def _best(func: Callable[[], object], repeat: int) -> float:
+    """Best wall time of repeat runs in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def _fresh_db(directory: str, name: str) -> DatabaseManager:
+    db_manager = DatabaseManager(os.path.join(directory, f'{name}.db'))
+    db_manager.create_table()
+    return db_manager
+
+def _products(count: int, offset: int = 0) -> List[Dict]:
+    return [{
+        'og:title': f'Product {i}',
+        'og:url': f'https://azerty.nl/product/{i}',
+        'product:price:amount': f'{i % 1000}.99',
+        'product-delivery-time': 'Morgen in huis' if i % 2 else '2-3 werkdagen',
+    } for i in range(offset, offset + count)]
+
+def bench_crawl(directory: str, pages: int, latency_ms: float, concurrency: int) -> Dict:
+    """Pages/s of the sequential and async scrapers and the per-page parse time"""
+    server = start_server(latency_ms=latency_ms)
+    try:
+        urls = [f'{server.base_url}/product/{i}' for i in range(pages)]
+        results = {'pages': pages, 'median_latency_ms': latency_ms}
+
+        db_manager = _fresh_db(directory, 'crawl_sequential')
+        start = time.perf_counter()
+        scraped = scrape_and_save_to_db(urls, PROPERTIES, db_manager, session=create_session())
+        elapsed = time.perf_counter() - start
+        results['sequential'] = {'pages_per_s': len(scraped) / elapsed, 'seconds': elapsed}
+        db_manager.close()
+
+        db_manager = _fresh_db(directory, 'crawl_async')
+        start = time.perf_counter()
+        scraped = scrape_concurrently(urls, PROPERTIES, db_manager, max_concurrency=concurrency,
+                                      per_host_limit=concurrency)
+        elapsed = time.perf_counter() - start
+        results['async'] = {'pages_per_s': len(scraped) / elapsed, 'seconds': elapsed,
+                            'concurrency': concurrency}
+        db_manager.close()
+
+        bodies = [server.page(i).decode('utf-8') for i in range(pages)]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    parse_ms = []
+    for body in bodies:
+        start = time.perf_counter()
+        parse_product_page(body, PROPERTIES)
+        parse_ms.append((time.perf_counter() - start) * 1000)
+    parse_ms.sort()
+    results['parse'] = {
+        'mean_ms': statistics.mean(parse_ms),
+        'p50_ms': parse_ms[len(parse_ms) // 2],
+        'p95_ms': parse_ms[min(len(parse_ms) - 1, int(len(parse_ms) * 0.95))],
+        'mean_page_kib': sum(len(body) for body in bodies) / len(bodies) / 1024,
+    }
+    return results
+
+def bench_upsert(directory: str, sizes: List[int], batch_size: int) -> Dict:
+    """Rows/s of bulk_upsert_products for new rows, identical re-crawls and changed rows"""
+    results = {}
+    for size in sizes:
+        db_manager = _fresh_db(directory, f'upsert_{size}')
+        products = _products(size)
+        start = time.perf_counter()
+        db_manager.bulk_upsert_products(products, batch_size=batch_size)
+        insert_s = time.perf_counter() - start
+        start = time.perf_counter()
+        db_manager.bulk_upsert_products(products, batch_size=batch_size)
+        unchanged_s = time.perf_counter() - start
+        for product in products:
+            product['product:price:amount'] = str(float(product['product:price:amount']) + 1)
+        start = time.perf_counter()
+        db_manager.bulk_upsert_products(products, batch_size=batch_size)
+        update_s = time.perf_counter() - start
+        results[str(size)] = {'insert_rows_per_s': size / insert_s, 'unchanged_rows_per_s': size / unchanged_s,
+                              'update_rows_per_s': size / update_s}
+        db_manager.close()
+    return results
+
+def bench_dashboard(directory: str, sizes: List[int], repeat: int) -> Dict:
+    """Cost of fetch_data (cold and cached), of rendering the table and of serving its snapshot"""
+    results = {}
+    for size in sizes:
+        db_manager = _fresh_db(directory, f'dashboard_{size}')
+        db_manager.bulk_upsert_products(_products(size), batch_size=5000)
+
+        def cold_fetch():
+            # Drop the cached frame, as a data change would
+            app_runner._frame_cache.pop(db_manager, None)
+            return app_runner.fetch_data(db_manager)
+
+        df = cold_fetch()
+        records = df.to_dict('records')
+        columns = list(df.columns)
+
+        def render():
+            table = app_runner.render_table(columns, records)
+            return json.dumps(table, cls=PlotlyJSONEncoder)
+
+        fetch_cold_s = _best(cold_fetch, repeat)
+        fetch_cached_s = _best(lambda: app_runner.fetch_data(db_manager), repeat)
+        render_s = _best(render, repeat)
+        app_runner.get_table_snapshot(db_manager)
+        snapshot_s = _best(lambda: app_runner.get_table_snapshot(db_manager), repeat)
+        results[str(size)] = {
+            'fetch_data_cold_ms': fetch_cold_s * 1000,
+            'fetch_data_cached_ms': fetch_cached_s * 1000,
+            'render_ms': render_s * 1000,
+            'refresh_data_ms': (fetch_cold_s + render_s) * 1000,
+            'payload_kib': len(render()) / 1024,
+            'snapshot_cached_ms': snapshot_s * 1000,
+            'snapshot_gzip_kib': len(app_runner.get_table_snapshot(db_manager).gzipped) / 1024,
+        }
+        db_manager.close()
+    return results
+
+def _metadata(args: argparse.Namespace) -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'arguments': vars(args),
+    }
+
+def _flatten(data: Dict, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+def compare(baseline: Dict, current: Dict) -> None:
+    """Prints every metric of both runs with its relative change"""
+    old, new = _flatten(baseline['results']), _flatten(current['results'])
+    print(f"{'metric':<45} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key in sorted(old.keys() & new.keys()):
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        print(f"{key:<45} {old[key]:12.2f} {new[key]:12.2f} {change:+7.1f}%")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=200, help='Pages crawled from the local server')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Median latency of the local server')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrency of the async crawl')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Table sizes for the upsert and dashboard benchmarks')
+    parser.add_argument('--batch-size', type=int, default=500, help='Upsert batch size')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per measurement, the best is kept')
+    parser.add_argument('--output', help='Result file, defaults to benchmarks/results/<timestamp>.json')
+    parser.add_argument('--compare', help='Earlier result file to compare with')
+    args = parser.parse_args()
+
+    # The scrapers log every page; keep the output readable
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Crawling {args.pages} pages...")
+        crawl = bench_crawl(directory, args.pages, args.latency_ms, args.concurrency)
+        print(f"Upserting {args.rows} rows...")
+        upsert = bench_upsert(directory, args.rows, args.batch_size)
+        print(f"Refreshing the dashboard at {args.rows} rows...")
+        dashboard = bench_dashboard(directory, args.rows, args.repeat)
+
+    report = {'metadata': _metadata(args), 'results': {'crawl': crawl, 'upsert': upsert, 'dashboard': dashboard}}
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report['results'], indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Local stand-in for the retailer: serves synthetic product pages over HTTP.
+
+Page sizes and response latencies are drawn from log-normal distributions,
+seeded per product, so every run sees the same pages and a realistic long tail.
+
+Usage:
+    python -m benchmarks.server [--port 8800] [--latency-ms 40]
+"""
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from benchmarks.bench_extractor import build_page
+
+class RetailerServer(ThreadingHTTPServer):
+    """HTTP server for /product/<index> pages with configurable size and latency"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], latency_ms: float = 40, latency_sigma: float = 0.6,
+                 filler: int = 400, filler_sigma: float = 0.5, seed: int = 42):
+        """
+        Args:
+            address: (host, port) to listen on, port 0 picks a free one
+            latency_ms: Median response latency in milliseconds, 0 disables it
+            latency_sigma: Spread of the log-normal latency distribution
+            filler: Median number of filler blocks per page (about 150 bytes each)
+            filler_sigma: Spread of the log-normal page size distribution
+            seed: Seed of the per-product random generators
+        """
+        super().__init__(address, ProductHandler)
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.filler = filler
+        self.filler_sigma = filler_sigma
+        self.seed = seed
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page(self, index: int) -> bytes:
+        """Returns the encoded page of a product, built once per index"""
+        with self._lock:
+            if index not in self._pages:
+                rng = random.Random(self.seed * 1_000_003 + index)
+                filler = max(1, int(rng.lognormvariate(0, self.filler_sigma) * self.filler))
+                self._pages[index] = build_page(index, filler).encode('utf-8')
+            return self._pages[index]
+
+    def latency(self) -> float:
+        """Draws a response latency in seconds"""
+        if not self.latency_ms:
+            return 0.0
+        return random.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000
+
+class ProductHandler(BaseHTTPRequestHandler):
+    """Serves /product/<index>; everything else is a 404"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'product' or not parts[1].isdigit():
+            self.send_error(404)
+            return
+        body = self.server.page(int(parts[1]))
+        time.sleep(self.server.latency())
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(host: str = '127.0.0.1', port: int = 0, **settings) -> RetailerServer:
+    """Starts a RetailerServer in a background thread; stop it with shutdown()"""
+    server = RetailerServer((host, port), **settings)
+    threading.Thread(target=server.serve_forever, name='retailer-server', daemon=True).start()
+    return server
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency-ms', type=float, default=40, help='Median response latency')
+    parser.add_argument('--filler', type=int, default=400, help='Median filler blocks per page')
+    args = parser.parse_args()
+
+    server = RetailerServer(('127.0.0.1', args.port), latency_ms=args.latency_ms, filler=args.filler)
+    print(f"Serving synthetic products at {server.base_url}/product/<index>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
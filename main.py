@@ -1,48 +1,225 @@
-from scraper.db_manager import DatabaseManager
-from scraper.scraper import scrape_and_save_to_db, validate_url
-from app.app_runner import run_application
+"""
+Command line entry point.
+
+    python main.py scrape [URL_FILE | -] [options]   crawl into the database
+    python main.py serve [options]                   run the dashboard
+    python main.py export OUTPUT                     write a products snapshot
+    python main.py [URL_FILE | -]                    scrape, then serve (as before)
+
+scrape and serve are independent processes sharing the database, so the
+dashboard stays up while crawlers run. Each command only imports what it
+needs: a crawl worker never loads pandas or dash.
+"""
+import argparse
 import logging
 import os
+import sys
+from typing import Iterable, Iterator, List, Optional
 
-# Set up logging
-log_file = os.path.join("logs", "scraping_bot.log")
-os.makedirs("logs", exist_ok=True)
+PROPERTIES = [
+    "og:title",
+    "og:url",
+    "product:price:amount"
+]
 
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+DEFAULT_URLS = [
+    'https://azerty.nl/product/amd-ryzen-7-9800x3d-processor-4-7-ghz-5-2-ghz/8739079',
+    'https://azerty.nl/product/asrock-x870-pro-rs-wifi-moederbord/8599265',
+    'https://azerty.nl/product/g-skill-trident-z5-neo-rgb-f5-6000j3038f16gx2-tz5nr-geheugen/4975893'
+]
 
-if __name__ == '__main__':
-    #file_name = 'product_data.csv'
-    db_manager = DatabaseManager('product_data.db')
-    db_manager.create_table()
-    urls = [
-        'https://azerty.nl/product/amd-ryzen-7-9800x3d-processor-4-7-ghz-5-2-ghz/8739079',
-        'https://azerty.nl/product/asrock-x870-pro-rs-wifi-moederbord/8599265',
-        'https://azerty.nl/product/g-skill-trident-z5-neo-rgb-f5-6000j3038f16gx2-tz5nr-geheugen/4975893'
-    ]
-    properties = [
-        "og:title",
-        "og:url",
-        "product:price:amount"
-    ]
-    #headers = properties + ['product-delivery-time']
+SCRAPE_MODES = ('frontier', 'pipeline', 'async', 'scheduler')
+
+COMMANDS = ('scrape', 'serve', 'run', 'export')
+
+def configure_logging() -> None:
+    """Logs to logs/scraping_bot.log"""
+    log_file = os.path.join("logs", "scraping_bot.log")
+    os.makedirs("logs", exist_ok=True)
+
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+def _add_scrape_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('urls', nargs='?', help="File with one URL per line, or '-' for stdin")
+    parser.add_argument('--mode', choices=SCRAPE_MODES, default='frontier',
+                        help="frontier: resumable batches (default); pipeline: parallel fetch/parse/write "
+                             "stages; async: aiohttp; scheduler: keep revisiting the URLs")
+    parser.add_argument('--discover', nargs='+', metavar='CATEGORY_URL',
+                        help='Also crawl these category pages for product URLs')
+    parser.add_argument('--max-pages', type=int, help='Listing pages fetched by --discover')
+    parser.add_argument('--rate-limit', action='store_true', help='Adaptive per-host rate limiting')
+    parser.add_argument('--resilient', action='store_true',
+                        help='Retries with backoff and per-host circuit breakers')
+    parser.add_argument('--hedge', action='store_true', help='Hedge slow requests (implies --resilient)')
+    parser.add_argument('--no-cache', action='store_true', help='Disable conditional requests')
+    parser.add_argument('--batch-size', type=int, default=100, help='Products per database write')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Fetcher threads (pipeline) or concurrent requests (async)')
+    parser.add_argument('--lease', type=float, metavar='SECONDS',
+                        help='frontier: share the crawl with other workers, leasing batches for SECONDS')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="Serve this crawler's metrics at http://HOST:PORT/metrics")
+
+def _add_serve_arguments(parser: argparse.ArgumentParser) -> None:
+    layout = parser.add_mutually_exclusive_group()
+    layout.add_argument('--paginated', action='store_true', help='Send one page at a time')
+    layout.add_argument('--incremental', action='store_true', help='Send only changed rows')
+    parser.add_argument('--page-size', type=int, default=50, help='Products per page with --paginated')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes; more than one serves with gunicorn')
+    parser.add_argument('--snapshot-dir', help='Where workers share the pre-rendered table')
+
+def _database_parser(default: Optional[str]) -> argparse.ArgumentParser:
+    """--db, accepted both before and after the command"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--db', default=default,
+                        help='SQLite database, defaults to $DATABASE_PATH or product_data.db')
+    return parser
 
-    # Initialize the CSV
-   # initialize_csv(file_name, headers)
+def build_parser() -> argparse.ArgumentParser:
+    # Only the top level has a default, so a --db given before the command isn't
+    # overwritten by the subcommand's own default
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     parents=[_database_parser(os.environ.get('DATABASE_PATH', 'product_data.db'))])
+    database = _database_parser(argparse.SUPPRESS)
+    commands = parser.add_subparsers(dest='command', required=True)
 
-    # Scrape data and write it to the CSV
-    #scrape_and_write_to_csv(urls, properties, file_name)
+    _add_scrape_arguments(commands.add_parser('scrape', parents=[database],
+                                              help='Crawl product pages into the database'))
+    _add_serve_arguments(commands.add_parser('serve', parents=[database], help='Run the dashboard'))
+    run = commands.add_parser('run', parents=[database], help='Scrape, then serve in the same process')
+    _add_scrape_arguments(run)
+    _add_serve_arguments(run)
+    export = commands.add_parser('export', parents=[database],
+                                 help='Write a Parquet, Arrow or csv.gz snapshot of the products')
+    export.add_argument('output')
+    export.add_argument('--format', choices=('parquet', 'arrow', 'csv.gz'))
+    return parser
 
-    valid_urls = [url for url in urls if validate_url(url)]
-    if len(valid_urls) != len(urls):
-        logging.warning(f"{len(urls) - len(valid_urls)} invalid URLs were skipped")
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parses the command line. Without a command, the arguments are those of
+    'run', so `python main.py [URL_FILE]` keeps working.
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # --db may appear anywhere, in any form; the command is the first other word
+    database, rest = _database_parser(None).parse_known_args(argv)
+    if not rest or rest[0] not in COMMANDS + ('-h', '--help'):
+        rest.insert(0, 'run')
+    return build_parser().parse_args((['--db', database.db] if database.db is not None else []) + rest)
 
-    scraped_data = scrape_and_save_to_db(urls, properties, db_manager)
+def _iter_discovered(args: argparse.Namespace, db_manager, session, limiter) -> Iterator[str]:
+    from scraper.discovery import discover_products
+    # Known products are yielded too: the other modes scrape what is discovered, and
+    # the frontier deduplicates with INSERT OR IGNORE. The seen-set alone must not
+    # decide, since it commits before the frontier batch that would hold the URLs.
+    return discover_products(args.discover, db_manager, max_pages=args.max_pages,
+                             session=session, limiter=limiter, include_known=True)
 
+def scrape(args: argparse.Namespace) -> None:
+    """Runs one crawl, or keeps revisiting in scheduler mode"""
+    from scraper.db_manager import DatabaseManager
+    from scraper.sources import iter_urls
 
+    if args.metrics_port is not None:
+        from scraper.metrics import serve_metrics
+        # The counters live in this process, so the crawler exposes them itself
+        serve_metrics(args.metrics_port)
 
-    # Run the Dash application
-    run_application(db_manager)
\ No newline at end of file
+    db_manager = DatabaseManager(args.db)
+    limiter = session = cache = None
+    if args.rate_limit:
+        from scraper.rate_limit import RateLimiter
+        limiter = RateLimiter()
+    if args.resilient or args.hedge:
+        from scraper.resilience import ResilientFetcher
+        session = ResilientFetcher(hedge=args.hedge)
+    if not args.no_cache and args.mode in ('frontier', 'scheduler'):
+        from scraper.http_cache import ResponseCache
+        cache = ResponseCache('http_cache.db')
+
+    # A URL file (or '-' for stdin) given on the command line is streamed instead
+    urls: Iterable[str] = iter_urls(args.urls) if args.urls else ([] if args.discover else DEFAULT_URLS)
+    try:
+        if args.mode == 'frontier':
+            from scraper.scraper import crawl_frontier
+            # Progress is checkpointed in the frontier table: an interrupted crawl resumes,
+            # a finished one starts a new round
+            counts = db_manager.frontier_counts()
+            if counts['pending'] or counts['in_flight']:
+                logging.info(f"Resuming unfinished crawl: {counts}")
+            else:
+                db_manager.restart_frontier()
+            db_manager.add_to_frontier(urls)
+            if args.discover:
+                db_manager.add_to_frontier(_iter_discovered(args, db_manager, session, limiter))
+            queue = None
+            if args.lease:
+                from scraper.work_queue import WorkQueue
+                # Other workers may hold URLs in flight; they come back when their lease expires
+                queue = WorkQueue(db_manager, lease_seconds=args.lease)
+                logging.info(f"Crawling as worker {queue.owner}")
+            # URLs are validated from the same pooled request that scrapes them
+            crawl_frontier(PROPERTIES, db_manager, session=session, cache=cache,
+                           batch_size=args.batch_size, limiter=limiter, queue=queue)
+            return
+
+        if args.discover:
+            from itertools import chain
+            urls = chain(urls, _iter_discovered(args, db_manager, session, limiter))
+        if args.mode == 'pipeline':
+            from scraper.pipeline import run_pipeline
+            run_pipeline(urls, PROPERTIES, db_manager, fetch_workers=args.concurrency,
+                         batch_size=args.batch_size, session=session, limiter=limiter)
+        elif args.mode == 'async':
+            from scraper.async_scraper import scrape_concurrently
+            scrape_concurrently(list(urls), PROPERTIES, db_manager, max_concurrency=args.concurrency,
+                                limiter=limiter, batch_size=args.batch_size)
+        else:
+            from scraper.scheduler import RevisitScheduler
+            RevisitScheduler(urls, PROPERTIES, db_manager, batch_size=args.batch_size, session=session,
+                             cache=cache, limiter=limiter).run_forever()
+    finally:
+        if cache is not None:
+            cache.close()
+        if hasattr(session, 'close'):
+            session.close()
+        db_manager.close()
+
+def serve(args: argparse.Namespace) -> None:
+    """Runs the dashboard until it is stopped"""
+    from scraper.db_manager import DatabaseManager
+    from app.app_runner import run_application
+
+    run_application(DatabaseManager(args.db), paginated=args.paginated, page_size=args.page_size,
+                    incremental=args.incremental, host=args.host, port=args.port,
+                    workers=args.workers, snapshot_dir=args.snapshot_dir)
+
+def export(args: argparse.Namespace) -> None:
+    from scraper.db_manager import DatabaseManager
+    from scraper.export import export_products
+
+    db_manager = DatabaseManager(args.db)
+    try:
+        export_products(db_manager, args.output, args.format)
+    finally:
+        db_manager.close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    configure_logging()
+    if args.command in ('scrape', 'run'):
+        scrape(args)
+    if args.command in ('serve', 'run'):
+        serve(args)
+    if args.command == 'export':
+        export(args)
+
+if __name__ == '__main__':
+    main()
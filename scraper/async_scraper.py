@@ -0,0 +1,155 @@
+import time
+import asyncio
+import aiohttp
+import logging
+from typing import List, Optional
+from .db_manager import DatabaseManager
+from .scraper import parse_product_page, check_properties, flush_products
+from .session import DEFAULT_HEADERS, check_response
+from .rate_limit import RateLimiter
+from .metrics import PARSE_SECONDS, record_response
+
+async def _read_page(url: str, response: aiohttp.ClientResponse) -> Optional[str]:
+    """Validates the response and returns its body, or None if the URL is not a usable page"""
+    response.raise_for_status()
+    problem = check_response(url, response.status, response.headers.get('Content-Type'),
+                             str(response.url))
+    if problem:
+        logging.warning(f"Skipping invalid URL {url}: {problem}")
+        return None
+    return await response.text()
+
+def _parse(html: str, properties: List[str]) -> dict:
+    with PARSE_SECONDS.time():
+        return parse_product_page(html, properties)
+
+async def _scrape_url(session: aiohttp.ClientSession, url: str, properties: List[str],
+                      limiter: Optional[RateLimiter] = None) -> Optional[dict]:
+    """
+    Fetches a single URL and extracts the properties. Parsing runs in a worker
+    thread so it doesn't hold up the other requests on the event loop.
+    Errors are logged per URL and result in None, just like the sequential scraper.
+    """
+    try:
+        if limiter:
+            await limiter.acquire_async(url)
+        start = time.monotonic()
+        status = retry_after = ttfb = None
+        try:
+            async with session.get(url) as response:
+                ttfb = time.monotonic() - start
+                status = response.status
+                retry_after = response.headers.get('Retry-After')
+                html = await _read_page(url, response)
+        finally:
+            total = time.monotonic() - start
+            if limiter:
+                limiter.release(url, status, total, retry_after)
+            record_response(url, status, ttfb, total)
+        if html is None:
+            return None
+
+        meta_data = await asyncio.to_thread(_parse, html, properties)
+
+        # Validate required fields
+        if not check_properties(url, meta_data, properties):
+            return None
+
+        logging.info(f"Data successfully scraped for URL: {url}")
+        return meta_data
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logging.error(f"Error fetching {url}: {e}")
+        return None
+    except Exception as e:
+        logging.error(f"Unexpected error processing {url}: {e}")
+        return None
+
+async def scrape_and_save_to_db_async(urls: List[str], properties: List[str], db_manager: DatabaseManager,
+                                      max_concurrency: int = 20, per_host_limit: int = 4,
+                                      timeout: float = 10,
+                                      limiter: Optional[RateLimiter] = None,
+                                      batch_size: int = 100) -> List[dict]:
+    """
+    Concurrent version of scrape_and_save_to_db built on aiohttp.
+
+    A fixed number of workers pull URLs from a shared queue, so at most
+    max_concurrency requests are in flight in total and at most per_host_limit
+    connections are opened to any single host. Scraped products are handed to
+    a single writer task that saves them with bulk upserts of batch_size rows,
+    off the event loop.
+
+    Args:
+        urls: List of URLs to scrape
+        properties: List of meta properties to extract
+        db_manager: DatabaseManager instance for saving data
+        max_concurrency: Maximum number of requests in flight at the same time
+        per_host_limit: Maximum number of simultaneous connections per host
+        timeout: Total timeout in seconds for a single request
+        limiter: Optional per-host RateLimiter; its adaptive window applies on top of per_host_limit
+        batch_size: Number of products saved per database write
+
+    Returns:
+        List of dictionaries containing the scraped data, in the order of the input URLs
+    """
+    if max_concurrency < 1 or per_host_limit < 1 or batch_size < 1:
+        raise ValueError("max_concurrency, per_host_limit and batch_size must be at least 1")
+
+    urls = list(urls)
+    results: List[Optional[dict]] = [None] * len(urls)
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, url in enumerate(urls):
+        queue.put_nowait((index, url))
+    # Bounded, so fetching waits for the writer instead of piling up products
+    scraped: asyncio.Queue = asyncio.Queue(maxsize=batch_size * 2)
+
+    async def worker(session: aiohttp.ClientSession) -> None:
+        while True:
+            try:
+                index, url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results[index] = await _scrape_url(session, url, properties, limiter)
+            if results[index] is not None:
+                await scraped.put(results[index])
+
+    async def writer() -> None:
+        buffer: List[dict] = []
+        while True:
+            meta_data = await scraped.get()
+            if meta_data is not None:
+                buffer.append(meta_data)
+            if len(buffer) >= batch_size or (meta_data is None and buffer):
+                await asyncio.to_thread(flush_products, db_manager, buffer)
+            if meta_data is None:
+                return
+
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=per_host_limit)
+    async with aiohttp.ClientSession(connector=connector,
+                                     headers=DEFAULT_HEADERS,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        saving = asyncio.create_task(writer())
+        workers = [asyncio.create_task(worker(session))
+                   for _ in range(min(max_concurrency, len(urls)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            # Save what was scraped, even if the crawl is cancelled
+            await scraped.put(None)
+            await saving
+
+    return [result for result in results if result is not None]
+
+def scrape_concurrently(urls: List[str], properties: List[str], db_manager: DatabaseManager,
+                        max_concurrency: int = 20, per_host_limit: int = 4,
+                        timeout: float = 10, limiter: Optional[RateLimiter] = None,
+                        batch_size: int = 100) -> List[dict]:
+    """
+    Blocking entry point for scrape_and_save_to_db_async, for callers without an event loop.
+    """
+    return asyncio.run(scrape_and_save_to_db_async(urls, properties, db_manager,
+                                                   max_concurrency=max_concurrency,
+                                                   per_host_limit=per_host_limit,
+                                                   timeout=timeout,
+                                                   limiter=limiter,
+                                                   batch_size=batch_size))
@@ -1,17 +1,189 @@
+import os
+import time
+import queue
 import sqlite3
 import logging
-from typing import List, Dict
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import hashlib
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+from .metrics import UPSERT_ROWS, UPSERT_SECONDS
+from .migrations import migrate
+
+if TYPE_CHECKING:
+    # pandas is only needed for the DataFrame read path, so it is imported on use
+    import pandas as pd
+
+REQUIRED_FIELDS = ['og:title', 'og:url', 'product:price:amount']
+
+# Only used for new and changed products; unchanged ones are skipped by fingerprint
+UPSERT_SQL = '''
+    INSERT INTO products (product_name, url, price, delivery_time, fingerprint, last_seen, last_changed)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(url) DO UPDATE SET
+        product_name = excluded.product_name,
+        price = excluded.price,
+        delivery_time = excluded.delivery_time,
+        fingerprint = excluded.fingerprint,
+        last_seen = excluded.last_seen,
+        last_changed = excluded.last_changed,
+        timestamp = CURRENT_TIMESTAMP
+'''
+
+# An unchanged product's last_seen is only rewritten once it is older than this,
+# so repeated crawls of an unchanged catalog do not write at all
+LAST_SEEN_RESOLUTION = timedelta(hours=1)
+
+OBSERVATION_SQL = '''
+    INSERT INTO price_observations (product_id, price, delivery_time, observed_at)
+    SELECT id, ?, ?, ? FROM products WHERE url = ?
+'''
+
+# Display names of the product columns shown in the dashboard
+DISPLAY_COLUMNS = {
+    'product_name': 'Product name',
+    'url': 'URL',
+    'price': 'Price',
+    'delivery_time': 'Delivery time',
+}
+
+# Columns the paginated product table can be sorted on; each one is indexed
+SORTABLE_COLUMNS = ('timestamp', 'price', 'product_name')
+
+ROLLUP_GRANULARITIES = {
+    'hour': '%Y-%m-%d %H:00:00',
+    'day': '%Y-%m-%d 00:00:00',
+}
+
+# Life cycle of a frontier URL: pending -> in_flight -> done, or back to pending
+# after a failed attempt until max_attempts is reached, then failed
+FRONTIER_STATES = ('pending', 'in_flight', 'done', 'failed')
+
+# Connection settings applied to every connection; override per deployment through
+# the pragmas argument or SQLITE_<PRAGMA> environment variables (e.g. SQLITE_MMAP_SIZE)
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negative values are KiB
+}
+
+def product_fingerprint(product_name: str, price: float, delivery_time: Optional[str]) -> str:
+    """Hash of the scraped fields of a product, equal exactly when nothing visible changed"""
+    content = f'{product_name}\x1f{float(price)!r}\x1f{delivery_time}'
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+def format_price(price: float) -> str:
+    """Formats a numeric price for display"""
+    return f"€ {float(price):.2f}"
+
+def pragmas_from_env() -> Dict[str, str]:
+    """Collects pragma overrides from SQLITE_<PRAGMA> environment variables"""
+    return {name: os.environ[f'SQLITE_{name.upper()}']
+            for name in DEFAULT_PRAGMAS if f'SQLITE_{name.upper()}' in os.environ}
 
 class DatabaseManager:
-    def __init__(self, db_name: str = 'product_data.db'):
-        """Initialize database connection and create table if it doesn't exist"""
+    def __init__(self, db_name: str = 'product_data.db', reader_pool_size: int = 4,
+                 pragmas: Optional[Dict] = None, migration_chunk_size: int = 10000):
+        """
+        Initialize database connections and create table if it doesn't exist.
+        
+        The manager owns one long-lived writer connection, shared between threads
+        behind a lock, and up to reader_pool_size read-only connections. In WAL mode
+        readers never block the writer, so the dashboard can query during a crawl.
+        
+        Args:
+            db_name: Path of the SQLite database file
+            reader_pool_size: Maximum number of read-only connections
+            pragmas: Pragma overrides on top of DEFAULT_PRAGMAS and the environment
+            migration_chunk_size: Rows per transaction when migrating an older database
+        """
         self.db_name = db_name
-        self.create_table()
+        self.reader_pool_size = reader_pool_size
+        self.pragmas = {**DEFAULT_PRAGMAS, **pragmas_from_env(), **(pragmas or {})}
+        self._write_lock = threading.RLock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._readers: queue.LifoQueue = queue.LifoQueue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._version_conn: Optional[sqlite3.Connection] = None
+        self._version_lock = threading.Lock()
+        # (data version, revision, rows)
+        self._products_cache: Optional[Tuple[int, int, List[Dict]]] = None
+        self._products_cache_lock = threading.Lock()
+        self.create_table(migration_chunk_size)
+
+    def _configure(self, conn: sqlite3.Connection, read_only: bool) -> sqlite3.Connection:
+        """Applies the configured pragmas to a new connection"""
+        for name, value in self.pragmas.items():
+            if read_only and name == 'journal_mode':
+                # The journal mode is a property of the database file, set by the writer
+                continue
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
 
-    def create_table(self) -> None:
-        """Create the products table if it doesn't exist"""
+    def _get_writer(self) -> sqlite3.Connection:
+        """Returns the writer connection, opening it on first use. Caller holds the write lock."""
+        if self._writer is None:
+            conn = sqlite3.connect(self.db_name, check_same_thread=False)
+            self._writer = self._configure(conn, read_only=False)
+        return self._writer
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Runs a block on the writer connection as one transaction"""
+        with self._write_lock:
+            conn = self._get_writer()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """Borrows a read-only connection from the pool"""
+        conn = None
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                if len(self._all_readers) < self.reader_pool_size:
+                    # Make sure the file (and its WAL) exists before opening it read-only
+                    with self._write_lock:
+                        self._get_writer()
+                    uri = Path(self.db_name).absolute().as_uri() + '?mode=ro'
+                    conn = self._configure(sqlite3.connect(uri, uri=True, check_same_thread=False),
+                                           read_only=True)
+                    self._all_readers.append(conn)
+        if conn is None:
+            conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def create_table(self, migration_chunk_size: int = 10000) -> None:
+        """
+        Create the tables if they don't exist and migrate older databases.
+        
+        The statements below create the baseline schema and are no-ops on an
+        existing database; every later change is a migration in scraper.migrations,
+        applied afterwards until the database is at SCHEMA_VERSION. A database that
+        is already up to date is recognised from PRAGMA user_version and not migrated.
+        
+        Args:
+            migration_chunk_size: Rows per transaction of migrations that touch every row
+        """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._write() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS products (
@@ -20,7 +192,10 @@ class DatabaseManager:
                         url TEXT NOT NULL UNIQUE,
                         price REAL NOT NULL,
                         delivery_time TEXT,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        fingerprint TEXT,
+                        last_seen DATETIME,
+                        last_changed DATETIME
                     )
                 ''')
                 
@@ -29,13 +204,210 @@ class DatabaseManager:
                     CREATE INDEX IF NOT EXISTS idx_url 
                     ON products(url)
                 ''')
-                
-                conn.commit()
+
+                # Indexes backing keyset pagination on every sortable column
+                for column in SORTABLE_COLUMNS:
+                    cursor.execute(f'''
+                        CREATE INDEX IF NOT EXISTS idx_products_{column}
+                        ON products({column}, id)
+                    ''')
+
+                # Small key/value table; 'generation' changes whenever rows are deleted,
+                # 'revision' whenever the displayed product data changes
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS db_meta (
+                        key TEXT PRIMARY KEY,
+                        value TEXT
+                    )
+                ''')
+                cursor.execute("INSERT OR IGNORE INTO db_meta (key, value) VALUES ('generation', '0')")
+                cursor.execute("INSERT OR IGNORE INTO db_meta (key, value) VALUES ('revision', '0')")
+
+                # Append-only price history, one row per scraped observation
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS price_observations (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        product_id INTEGER NOT NULL,
+                        price REAL NOT NULL,
+                        delivery_time TEXT,
+                        observed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_observations_product_time
+                    ON price_observations(product_id, observed_at)
+                ''')
+
+                # Hourly and daily min/max/last rollups for trend queries
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS price_rollups (
+                        product_id INTEGER NOT NULL,
+                        granularity TEXT NOT NULL,
+                        bucket_start DATETIME NOT NULL,
+                        min_price REAL NOT NULL,
+                        max_price REAL NOT NULL,
+                        last_price REAL NOT NULL,
+                        last_observed_at DATETIME NOT NULL,
+                        observations INTEGER NOT NULL,
+                        PRIMARY KEY (product_id, granularity, bucket_start)
+                    ) WITHOUT ROWID
+                ''')
+
+                # Keep the rollups up to date incrementally on every new observation
+                for granularity, bucket_format in ROLLUP_GRANULARITIES.items():
+                    cursor.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS trg_price_rollup_{granularity}
+                        AFTER INSERT ON price_observations
+                        BEGIN
+                            INSERT INTO price_rollups (product_id, granularity, bucket_start, min_price,
+                                                       max_price, last_price, last_observed_at, observations)
+                            VALUES (new.product_id, '{granularity}', strftime('{bucket_format}', new.observed_at),
+                                    new.price, new.price, new.price, new.observed_at, 1)
+                            ON CONFLICT(product_id, granularity, bucket_start) DO UPDATE SET
+                                min_price = MIN(min_price, excluded.min_price),
+                                max_price = MAX(max_price, excluded.max_price),
+                                last_price = CASE WHEN excluded.last_observed_at >= last_observed_at
+                                                  THEN excluded.last_price ELSE last_price END,
+                                last_observed_at = MAX(last_observed_at, excluded.last_observed_at),
+                                observations = observations + 1;
+                        END
+                    ''')
+
+                # Crawl frontier: durable per-URL progress, so a restarted crawl resumes
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS frontier (
+                        url TEXT PRIMARY KEY,
+                        state TEXT NOT NULL DEFAULT 'pending',
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        last_fetched DATETIME,
+                        last_error TEXT,
+                        lease_owner TEXT,
+                        lease_expires REAL
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_frontier_state
+                    ON frontier(state)
+                ''')
+
+                # Every URL the discovery crawler has seen, backing its in-memory Bloom filter
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS seen_urls (
+                        url TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        seen_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    ) WITHOUT ROWID
+                ''')
+
+            with self._write_lock:
+                migrate(self._get_writer(), migration_chunk_size)
             logging.info(f"Database '{self.db_name}' initialized successfully.")
         except Exception as e:
             logging.error(f"Error initializing database: {e}")
             raise
 
+    @staticmethod
+    def _product_row(product_data: Dict) -> Tuple:
+        """
+        Validates a scraped product and converts it into a database row.
+        
+        Raises:
+            ValueError: If required fields are missing or the price is not a number
+        """
+        # Validate required fields
+        if not all(key in product_data for key in REQUIRED_FIELDS):
+            raise ValueError("Missing required product data fields")
+
+        # Ensure price is a valid float
+        try:
+            price = float(product_data.get('product:price:amount', 0))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid price format")
+
+        if not product_data.get('og:title') or not product_data.get('og:url'):
+            raise ValueError("Missing required product data fields")
+
+        return (
+            product_data.get('og:title'),
+            product_data.get('og:url'),
+            price,
+            product_data.get('product-delivery-time')
+        )
+
+    def _prepare_rows(self, products: Iterable[Dict]) -> Tuple[List[Tuple], int]:
+        """Validates and converts a batch of products in one pass, returning (rows, rejected count)"""
+        rows = []
+        rejected = 0
+        for product_data in products:
+            try:
+                rows.append(self._product_row(product_data))
+            except ValueError as e:
+                rejected += 1
+                logging.warning(f"Rejected product {product_data.get('og:url')}: {e}")
+        return rows, rejected
+
+    @staticmethod
+    def _record_observations(conn: sqlite3.Connection, rows: List[Tuple]) -> None:
+        """Appends upserted rows to the price history, in the caller's transaction"""
+        observed_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        conn.executemany(OBSERVATION_SQL, [
+            (price, delivery_time, observed_at, url)
+            for _, url, price, delivery_time in rows
+        ])
+
+    @staticmethod
+    def _bump_revision(conn: sqlite3.Connection) -> None:
+        """Marks a change of the product data in the caller's transaction, see revision"""
+        conn.execute("UPDATE db_meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'revision'")
+
+    def _upsert_rows(self, conn: sqlite3.Connection, rows: List[Tuple]) -> Dict[str, int]:
+        """
+        Writes validated rows in the caller's transaction, skipping products whose
+        fingerprint is unchanged. Only new and changed products are rewritten, get a
+        new timestamp and a price observation; unchanged ones at most get last_seen.
+        
+        Returns:
+            Dictionary with the number of 'inserted', 'updated' and 'unchanged' rows
+        """
+        now = datetime.now(timezone.utc)
+        now_text = now.strftime('%Y-%m-%d %H:%M:%S')
+        stale_before = (now - LAST_SEEN_RESOLUTION).strftime('%Y-%m-%d %H:%M:%S')
+
+        stored: Dict[str, Tuple] = {}
+        urls = list({row[1] for row in rows})
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for url, fingerprint, last_seen in conn.execute(
+                    f'SELECT url, fingerprint, last_seen FROM products WHERE url IN ({placeholders})', chunk):
+                stored[url] = (fingerprint, last_seen)
+
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        changed, seen = [], []
+        for row in rows:
+            fingerprint = product_fingerprint(row[0], row[2], row[3])
+            previous = stored.get(row[1])
+            if previous is None:
+                counts['inserted'] += 1
+            elif previous[0] != fingerprint:
+                counts['updated'] += 1
+            else:
+                counts['unchanged'] += 1
+                if previous[1] is None or previous[1] < stale_before:
+                    seen.append((now_text, row[1]))
+                    stored[row[1]] = (fingerprint, now_text)
+                continue
+            changed.append(row + (fingerprint, now_text, now_text))
+            stored[row[1]] = (fingerprint, now_text)
+
+        if changed:
+            conn.executemany(UPSERT_SQL, changed)
+            self._record_observations(conn, [row[:4] for row in changed])
+            self._bump_revision(conn)
+        if seen:
+            conn.executemany('UPDATE products SET last_seen = ? WHERE url = ?', seen)
+        return counts
+
     def insert_product(self, product_data: Dict) -> None:
         """
         Insert a product into the database, updating if it already exists.
@@ -45,49 +417,121 @@ class DatabaseManager:
                          'og:title', 'og:url', 'product:price:amount', 'product-delivery-time'
         """
         try:
-            # Validate required fields
-            if not all(key in product_data for key in ['og:title', 'og:url', 'product:price:amount']):
-                raise ValueError("Missing required product data fields")
+            row = self._product_row(product_data)
 
-            # Ensure price is a valid float
-            try:
-                price = float(product_data.get('product:price:amount', 0))
-            except (TypeError, ValueError):
-                raise ValueError("Invalid price format")
-
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO products (product_name, url, price, delivery_time)
-                    VALUES (?, ?, ?, ?)
-                    ON CONFLICT(url) DO UPDATE SET
-                        product_name = excluded.product_name,
-                        price = excluded.price,
-                        delivery_time = excluded.delivery_time,
-                        timestamp = CURRENT_TIMESTAMP
-                ''', (
-                    product_data.get('og:title'),
-                    product_data.get('og:url'),
-                    price,
-                    product_data.get('product-delivery-time')
-                ))
-                conn.commit()
+            with UPSERT_SECONDS.time('single'), self._write() as conn:
+                counts = self._upsert_rows(conn, [row])
+            for outcome, count in counts.items():
+                UPSERT_ROWS.inc(outcome, amount=count)
             logging.info(f"Product data upserted successfully: {product_data.get('og:title')}")
         except Exception as e:
             logging.error(f"Error upserting product data: {e}")
             raise
 
+    def bulk_upsert_products(self, products: Iterable[Dict], batch_size: int = 500) -> Dict[str, int]:
+        """
+        Insert or update many products, writing each batch in a single transaction.
+        
+        Invalid products are rejected and logged instead of aborting the batch.
+        Products identical to the stored row (same fingerprint) are not rewritten.
+        
+        Args:
+            products: Iterable of product dictionaries (same keys as insert_product)
+            batch_size: Number of products written per transaction
+            
+        Returns:
+            Dictionary with the number of 'inserted', 'updated', 'unchanged' and 'rejected' products
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'rejected': 0}
+        products = iter(products)
+        try:
+            with self._write() as conn:
+                while True:
+                    batch = list(islice(products, batch_size))
+                    if not batch:
+                        break
+
+                    start = time.perf_counter()
+                    rows, rejected = self._prepare_rows(batch)
+                    stats['rejected'] += rejected
+                    UPSERT_ROWS.inc('rejected', amount=rejected)
+                    if not rows:
+                        continue
+
+                    counts = self._upsert_rows(conn, rows)
+                    conn.commit()
+                    UPSERT_SECONDS.observe(time.perf_counter() - start, 'bulk')
+                    for outcome, count in counts.items():
+                        stats[outcome] += count
+                        UPSERT_ROWS.inc(outcome, amount=count)
+            logging.info(f"Bulk upsert finished: {stats['inserted']} inserted, {stats['updated']} updated, "
+                         f"{stats['unchanged']} unchanged, {stats['rejected']} rejected")
+            return stats
+        except Exception as e:
+            logging.error(f"Error bulk upserting product data: {e}")
+            raise
+
+    def data_version(self) -> int:
+        """
+        Returns a number that changes whenever data is committed to the database,
+        by this manager or by any other connection or process.
+        
+        It is read with PRAGMA data_version on a dedicated connection that never
+        writes, so every commit elsewhere is visible to it.
+        """
+        with self._version_lock:
+            if self._version_conn is None:
+                with self._write_lock:
+                    self._get_writer()
+                uri = Path(self.db_name).absolute().as_uri() + '?mode=ro'
+                self._version_conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            return self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def revision(self) -> int:
+        """
+        Returns a counter that changes whenever product data is added, changed or
+        removed. Unlike data_version it is stored in the database, so every process
+        sees the same value, and it ignores writes that don't change what the
+        dashboard shows (crawl progress, last_seen refreshes).
+        """
+        try:
+            with self._read() as conn:
+                row = conn.execute("SELECT value FROM db_meta WHERE key = 'revision'").fetchone()
+            return int(row[0]) if row else 0
+        except Exception as e:
+            logging.error(f"Error reading the data revision: {e}")
+            raise
+
     def get_all_products(self) -> List[Dict]:
         """
         Retrieve all products from the database.
         
+        The result is cached until the products change, so repeated calls between
+        writes cost one PRAGMA instead of a full query. After other commits, such
+        as crawl progress, the revision is read and the rows are kept.
+        
         Returns:
             List of dictionaries containing product information with formatted prices
         """
+        version = self.data_version()
+        with self._products_cache_lock:
+            cached = self._products_cache
+            if cached is not None and cached[0] == version:
+                return list(cached[2])
+            revision = self.revision()
+            rows = cached[2] if cached is not None and cached[1] == revision else self._query_all_products()
+            self._products_cache = (version, revision, rows)
+            return list(rows)
+
+    def _query_all_products(self) -> List[Dict]:
+        """Runs the full products query behind get_all_products"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._read() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
                 cursor.execute('''
                     SELECT 
                         id,
@@ -100,31 +544,600 @@ class DatabaseManager:
                     ORDER BY timestamp DESC
                 ''')
                 rows = cursor.fetchall()
-                return [{
-                    'Product name': row['product_name'],
-                    'URL': row['url'],
-                    'Price': f"€ {float(row['price']):.2f}",
-                    'Delivery time': row['delivery_time']
-                } for row in rows]
+                return [self._format_product(row) for row in rows]
         except Exception as e:
             logging.error(f"Error retrieving products: {e}")
             raise
 
+    @staticmethod
+    def _format_product(row: sqlite3.Row) -> Dict:
+        """Converts a products row into the dictionary shown in the dashboard"""
+        return {
+            'Product name': row['product_name'],
+            'URL': row['url'],
+            'Price': format_price(row['price']),
+            'Delivery time': row['delivery_time']
+        }
+
+    def get_products_frame(self) -> 'pd.DataFrame':
+        """
+        Retrieve all products as a typed DataFrame, newest first.
+        
+        The rows are read straight into columns: price is float64 and timestamp
+        datetime64, so the frame sorts and aggregates numerically. Nothing is
+        formatted here; use format_price when displaying prices.
+        
+        Returns:
+            DataFrame with the product_name, url, price, delivery_time and timestamp columns
+        """
+        import pandas as pd
+
+        try:
+            with self._read() as conn:
+                return pd.read_sql(
+                    'SELECT product_name, url, price, delivery_time, timestamp '
+                    'FROM products ORDER BY timestamp DESC',
+                    conn,
+                    dtype={'price': 'float64'},
+                    parse_dates=['timestamp'],
+                )
+        except Exception as e:
+            logging.error(f"Error retrieving products frame: {e}")
+            raise
+
+    def get_products_page(self, page_size: int = 50, sort_by: str = 'timestamp',
+                          descending: bool = True, after: Optional[List] = None,
+                          search: Optional[str] = None) -> Dict:
+        """
+        Retrieve one page of products using keyset pagination.
+        
+        Sorting and filtering run in SQL on indexed columns, so the cost of a page
+        does not depend on how deep into the catalog it is.
+        
+        Args:
+            page_size: Number of products per page
+            sort_by: One of SORTABLE_COLUMNS
+            descending: Sort direction
+            after: Cursor returned as 'next_cursor' by the previous page, None for the first page
+            search: Optional case-insensitive substring filter on the product name
+            
+        Returns:
+            Dictionary with 'rows' (formatted like get_all_products) and 'next_cursor',
+            which is None on the last page
+        """
+        if sort_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort_by}")
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+
+        direction = 'DESC' if descending else 'ASC'
+        comparison = '<' if descending else '>'
+        conditions = []
+        params: List = []
+        if search:
+            escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("product_name LIKE ? ESCAPE '\\'")
+            params.append(f'%{escaped}%')
+        if after is not None:
+            conditions.append(f'({sort_by}, id) {comparison} (?, ?)')
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        try:
+            with self._read() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(f'''
+                    SELECT id, product_name, url, price, delivery_time, timestamp
+                    FROM products
+                    {where}
+                    ORDER BY {sort_by} {direction}, id {direction}
+                    LIMIT ?
+                ''', params + [page_size + 1])
+                rows = cursor.fetchall()
+
+            next_cursor = None
+            if len(rows) > page_size:
+                rows = rows[:page_size]
+                next_cursor = [rows[-1][sort_by], rows[-1]['id']]
+            return {
+                'rows': [self._format_product(row) for row in rows],
+                'next_cursor': next_cursor
+            }
+        except Exception as e:
+            logging.error(f"Error retrieving products page: {e}")
+            raise
+
+    def iter_product_urls(self, chunk_size: int = 1000) -> Iterator[str]:
+        """
+        Lazily yields the URL of every stored product, e.g. to re-crawl the catalog.
+
+        URLs are read in keyset chunks by id, so memory stays constant and no read
+        transaction is held open while the caller processes a chunk.
+
+        Args:
+            chunk_size: Number of URLs read per query
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        last_id = 0
+        while True:
+            try:
+                with self._read() as conn:
+                    rows = conn.execute(
+                        'SELECT id, url FROM products WHERE id > ? ORDER BY id LIMIT ?',
+                        (last_id, chunk_size)
+                    ).fetchall()
+            except Exception as e:
+                logging.error(f"Error retrieving product URLs: {e}")
+                raise
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            for _, url in rows:
+                yield url
+
+    def get_products_changed_since(self, since: Optional[str] = None,
+                                   generation: Optional[int] = None) -> Dict:
+        """
+        Retrieve only the products that changed since a watermark.
+        
+        The query is an index range scan on timestamp, so its cost depends on the
+        number of changes rather than the size of the catalog. Timestamps have a
+        resolution of one second, so rows from the watermark second itself are
+        returned again; callers merge rows by URL, which makes that harmless.
+        
+        Args:
+            since: Watermark returned by the previous call, None for a full load
+            generation: Generation returned by the previous call. If rows were deleted
+                        since then, a full load is returned instead of a delta.
+            
+        Returns:
+            Dictionary with 'rows' (formatted like get_all_products plus 'timestamp'),
+            'watermark', 'generation' and 'full' (True if the rows replace everything)
+        """
+        try:
+            with self._read() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                # Read the generation and the rows from the same snapshot
+                cursor.execute('BEGIN')
+                current_generation = int(cursor.execute(
+                    "SELECT value FROM db_meta WHERE key = 'generation'"
+                ).fetchone()[0])
+                full = since is None or generation != current_generation
+                cursor.execute('''
+                    SELECT id, product_name, url, price, delivery_time, timestamp
+                    FROM products
+                    WHERE timestamp >= ?
+                    ORDER BY timestamp
+                ''', ('' if full else since,))
+                rows = cursor.fetchall()
+                conn.rollback()
+
+            watermark = rows[-1]['timestamp'] if rows else (None if full else since)
+            return {
+                'rows': [{**self._format_product(row), 'timestamp': row['timestamp']} for row in rows],
+                'watermark': watermark,
+                'generation': current_generation,
+                'full': full
+            }
+        except Exception as e:
+            logging.error(f"Error retrieving changed products: {e}")
+            raise
+
+    def get_price_history(self, url: str, granularity: str = 'day',
+                          since: Optional[str] = None) -> List[Dict]:
+        """
+        Retrieve the price trend of a product from the hourly or daily rollups.
+        
+        Args:
+            url: Product URL
+            granularity: 'hour' or 'day'
+            since: Optional 'YYYY-MM-DD HH:MM:SS' (UTC) lower bound for the bucket start
+            
+        Returns:
+            List of dictionaries with bucket start, min, max and last price, oldest first
+        """
+        if granularity not in ROLLUP_GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        try:
+            with self._read() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute('''
+                    SELECT r.bucket_start, r.min_price, r.max_price, r.last_price, r.observations
+                    FROM price_rollups r
+                    JOIN products p ON p.id = r.product_id
+                    WHERE p.url = ? AND r.granularity = ? AND r.bucket_start >= ?
+                    ORDER BY r.bucket_start
+                ''', (url, granularity, since or ''))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logging.error(f"Error retrieving price history: {e}")
+            raise
+
+    def get_price_observations(self, url: str, since: Optional[str] = None) -> List[Dict]:
+        """
+        Retrieve the raw price observations of a product, oldest first.
+        
+        Args:
+            url: Product URL
+            since: Optional 'YYYY-MM-DD HH:MM:SS' (UTC) lower bound
+        """
+        try:
+            with self._read() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute('''
+                    SELECT o.price, o.delivery_time, o.observed_at
+                    FROM price_observations o
+                    JOIN products p ON p.id = o.product_id
+                    WHERE p.url = ? AND o.observed_at >= ?
+                    ORDER BY o.observed_at, o.id
+                ''', (url, since or ''))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logging.error(f"Error retrieving price observations: {e}")
+            raise
+
+    def add_to_frontier(self, urls: Iterable[str], batch_size: int = 1000) -> int:
+        """
+        Adds URLs to the crawl frontier as pending; URLs already in it keep their state.
+        
+        Every batch is committed on its own, so a slow producer such as the discovery
+        crawler does not hold the write lock while it fetches.
+        
+        Args:
+            urls: Iterable of URLs, consumed lazily
+            batch_size: Number of URLs inserted per transaction
+            
+        Returns:
+            Number of URLs that were new
+        """
+        added = 0
+        urls = iter(urls)
+        try:
+            while True:
+                batch = list(islice(urls, batch_size))
+                if not batch:
+                    break
+                with self._write() as conn:
+                    before = conn.total_changes
+                    conn.executemany('INSERT OR IGNORE INTO frontier (url) VALUES (?)',
+                                     [(url,) for url in batch])
+                    added += conn.total_changes - before
+            return added
+        except Exception as e:
+            logging.error(f"Error adding URLs to the frontier: {e}")
+            raise
+
+    def claim_frontier(self, limit: int = 100) -> List[str]:
+        """
+        Marks up to limit pending URLs as in flight and returns them, oldest first.
+        
+        Args:
+            limit: Maximum number of URLs to claim
+        """
+        try:
+            with self._write() as conn:
+                rows = conn.execute('''
+                    UPDATE frontier SET state = 'in_flight', attempts = attempts + 1
+                    WHERE rowid IN (
+                        SELECT rowid FROM frontier WHERE state = 'pending' ORDER BY rowid LIMIT ?
+                    )
+                    RETURNING url
+                ''', (limit,)).fetchall()
+            return [url for (url,) in rows]
+        except Exception as e:
+            logging.error(f"Error claiming frontier URLs: {e}")
+            raise
+
+    def checkpoint_frontier(self, done: Iterable[str] = (), failed: Iterable[Tuple[str, str]] = (),
+                            max_attempts: int = 3) -> None:
+        """
+        Records the outcome of claimed URLs in a single transaction.
+        
+        Args:
+            done: URLs that were scraped and saved
+            failed: (url, error) pairs; they return to pending until max_attempts is reached
+            max_attempts: Attempts after which a failing URL is given up on
+        """
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            with self._write() as conn:
+                conn.executemany('''
+                    UPDATE frontier SET state = 'done', last_fetched = ?, last_error = NULL
+                    WHERE url = ?
+                ''', [(now, url) for url in done])
+                conn.executemany('''
+                    UPDATE frontier
+                    SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                        last_fetched = ?, last_error = ?
+                    WHERE url = ?
+                ''', [(max_attempts, now, error, url) for url, error in failed])
+        except Exception as e:
+            logging.error(f"Error checkpointing the frontier: {e}")
+            raise
+
+    def lease_frontier(self, owner: str, limit: int = 100, lease_seconds: float = 300.0,
+                       max_attempts: int = 3, now: Optional[float] = None) -> List[str]:
+        """
+        Claims up to limit URLs for owner until the lease expires, oldest first.
+        
+        Pending URLs and URLs whose lease has expired (their worker died or
+        stalled) are claimed in one statement, so concurrent workers, in this
+        or other processes, never get the same URL while its lease runs.
+        Expired URLs that already used max_attempts are marked failed instead.
+        
+        Args:
+            owner: Unique id of the claiming worker
+            limit: Maximum number of URLs to claim
+            lease_seconds: How long the claim holds without being renewed
+            max_attempts: Attempts after which an abandoned URL is given up on
+            now: Current time as a Unix timestamp
+        
+        Returns:
+            The claimed URLs
+        """
+        now = time.time() if now is None else now
+        try:
+            with self._write() as conn:
+                conn.execute('''
+                    UPDATE frontier
+                    SET state = 'failed', last_error = 'lease expired', lease_owner = NULL, lease_expires = NULL
+                    WHERE state = 'in_flight' AND lease_expires < ? AND attempts >= ?
+                ''', (now, max_attempts))
+                rows = conn.execute('''
+                    UPDATE frontier
+                    SET state = 'in_flight', attempts = attempts + 1, lease_owner = ?, lease_expires = ?
+                    WHERE rowid IN (
+                        SELECT rowid FROM frontier
+                        WHERE state = 'pending' OR (state = 'in_flight' AND lease_expires < ?)
+                        ORDER BY rowid LIMIT ?
+                    )
+                    RETURNING url
+                ''', (owner, now + lease_seconds, now, limit)).fetchall()
+            return [url for (url,) in rows]
+        except Exception as e:
+            logging.error(f"Error leasing frontier URLs: {e}")
+            raise
+
+    def ack_frontier(self, owner: str, done: Iterable[str] = (), failed: Iterable[Tuple[str, str]] = (),
+                     max_attempts: int = 3) -> List[str]:
+        """
+        Records the outcome of leased URLs in a single transaction, like
+        checkpoint_frontier, but only for URLs owner still holds: a URL whose
+        lease expired and was claimed by another worker is left to that worker.
+        
+        Args:
+            owner: Id the URLs were leased with
+            done: URLs that were scraped and saved
+            failed: (url, error) pairs; they return to pending until max_attempts is reached
+            max_attempts: Attempts after which a failing URL is given up on
+        
+        Returns:
+            URLs that were acknowledged
+        """
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        acked = []
+        try:
+            with self._write() as conn:
+                for url in done:
+                    if conn.execute('''
+                        UPDATE frontier
+                        SET state = 'done', last_fetched = ?, last_error = NULL,
+                            lease_owner = NULL, lease_expires = NULL
+                        WHERE url = ? AND state = 'in_flight' AND lease_owner = ?
+                    ''', (now, url, owner)).rowcount:
+                        acked.append(url)
+                for url, error in failed:
+                    if conn.execute('''
+                        UPDATE frontier
+                        SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                            last_fetched = ?, last_error = ?, lease_owner = NULL, lease_expires = NULL
+                        WHERE url = ? AND state = 'in_flight' AND lease_owner = ?
+                    ''', (max_attempts, now, error, url, owner)).rowcount:
+                        acked.append(url)
+            return acked
+        except Exception as e:
+            logging.error(f"Error acknowledging frontier URLs: {e}")
+            raise
+
+    def renew_frontier_leases(self, owner: str, urls: Iterable[str], lease_seconds: float = 300.0,
+                              now: Optional[float] = None) -> int:
+        """
+        Extends the leases owner still holds on urls, for batches that take long.
+        
+        Returns:
+            Number of leases renewed
+        """
+        now = time.time() if now is None else now
+        try:
+            with self._write() as conn:
+                return conn.executemany('''
+                    UPDATE frontier SET lease_expires = ?
+                    WHERE url = ? AND state = 'in_flight' AND lease_owner = ?
+                ''', [(now + lease_seconds, url, owner) for url in urls]).rowcount
+        except Exception as e:
+            logging.error(f"Error renewing frontier leases: {e}")
+            raise
+
+    def release_frontier(self, owner: str, urls: Iterable[str]) -> int:
+        """
+        Returns URLs leased by owner to pending without counting the attempt,
+        so a worker shutting down hands its unfinished batch to the others at once.
+        
+        Returns:
+            Number of released URLs
+        """
+        try:
+            with self._write() as conn:
+                return conn.executemany('''
+                    UPDATE frontier
+                    SET state = 'pending', attempts = MAX(attempts - 1, 0),
+                        lease_owner = NULL, lease_expires = NULL
+                    WHERE url = ? AND state = 'in_flight' AND lease_owner = ?
+                ''', [(url, owner) for url in urls]).rowcount
+        except Exception as e:
+            logging.error(f"Error releasing frontier URLs: {e}")
+            raise
+
+    def recover_frontier(self) -> int:
+        """
+        Returns URLs left in flight by an interrupted crawl to pending.
+        
+        Only URLs claimed with claim_frontier are recovered; leased URLs may
+        belong to a worker that is still running and come back when their lease expires.
+        
+        Returns:
+            Number of recovered URLs
+        """
+        try:
+            with self._write() as conn:
+                return conn.execute(
+                    "UPDATE frontier SET state = 'pending' WHERE state = 'in_flight' AND lease_owner IS NULL"
+                ).rowcount
+        except Exception as e:
+            logging.error(f"Error recovering the frontier: {e}")
+            raise
+
+    def restart_frontier(self) -> None:
+        """Makes every frontier URL pending again, to start a new crawl round"""
+        try:
+            with self._write() as conn:
+                conn.execute('''
+                    UPDATE frontier
+                    SET state = 'pending', attempts = 0, last_error = NULL, lease_owner = NULL, lease_expires = NULL
+                ''')
+        except Exception as e:
+            logging.error(f"Error restarting the frontier: {e}")
+            raise
+
+    def frontier_counts(self) -> Dict[str, int]:
+        """Number of frontier URLs in each state"""
+        try:
+            with self._read() as conn:
+                counts = dict(conn.execute('SELECT state, COUNT(*) FROM frontier GROUP BY state').fetchall())
+            return {state: counts.get(state, 0) for state in FRONTIER_STATES}
+        except Exception as e:
+            logging.error(f"Error counting frontier URLs: {e}")
+            raise
+
+    def add_seen_urls(self, urls: Iterable[Tuple[str, str]]) -> None:
+        """
+        Records URLs seen by the discovery crawler.
+        
+        Args:
+            urls: (url, kind) pairs, kind being e.g. 'product' or 'listing'
+        """
+        try:
+            with self._write() as conn:
+                conn.executemany('INSERT OR IGNORE INTO seen_urls (url, kind) VALUES (?, ?)', urls)
+        except Exception as e:
+            logging.error(f"Error recording seen URLs: {e}")
+            raise
+
+    def filter_seen_urls(self, urls: List[str]) -> set:
+        """Returns the subset of urls that were recorded with add_seen_urls"""
+        seen = set()
+        try:
+            with self._read() as conn:
+                # Stay below SQLite's default limit of bound parameters
+                for start in range(0, len(urls), 500):
+                    chunk = urls[start:start + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    seen.update(url for (url,) in conn.execute(
+                        f'SELECT url FROM seen_urls WHERE url IN ({placeholders})', chunk))
+            return seen
+        except Exception as e:
+            logging.error(f"Error looking up seen URLs: {e}")
+            raise
+
+    def iter_seen_urls(self, kind: Optional[str] = None, chunk_size: int = 10000) -> Iterator[str]:
+        """
+        Lazily yields the recorded seen URLs in keyset chunks.
+        
+        Args:
+            kind: Only yield URLs of this kind
+            chunk_size: Number of URLs read per query
+        """
+        last = ''
+        while True:
+            try:
+                with self._read() as conn:
+                    if kind is None:
+                        rows = conn.execute('SELECT url FROM seen_urls WHERE url > ? ORDER BY url LIMIT ?',
+                                            (last, chunk_size)).fetchall()
+                    else:
+                        rows = conn.execute('''
+                            SELECT url FROM seen_urls WHERE url > ? AND kind = ? ORDER BY url LIMIT ?
+                        ''', (last, kind, chunk_size)).fetchall()
+            except Exception as e:
+                logging.error(f"Error retrieving seen URLs: {e}")
+                raise
+            if not rows:
+                return
+            last = rows[-1][0]
+            for (url,) in rows:
+                yield url
+
+    def backup(self, path: str) -> None:
+        """
+        Writes a consistent copy of the whole database to path with the SQLite backup API.
+        
+        The copy is taken from a read-only connection, so in WAL mode it never
+        blocks writers; it sees the data as of the moment the copy started.
+        
+        Args:
+            path: Path of the copy, overwritten if it exists
+        """
+        try:
+            target = sqlite3.connect(path)
+            try:
+                with self._read() as conn:
+                    conn.backup(target)
+            finally:
+                target.close()
+            logging.info(f"Database '{self.db_name}' backed up to '{path}'")
+        except Exception as e:
+            logging.error(f"Error backing up database to {path}: {e}")
+            raise
+
     def clear_table(self) -> None:
         """Clear all records from the products table"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM products')
-                conn.commit()
+            with self._write() as conn:
+                conn.execute('DELETE FROM products')
+                conn.execute('DELETE FROM price_observations')
+                conn.execute('DELETE FROM price_rollups')
+                # Rows were removed, so incremental readers have to start over
+                conn.execute('''
+                    UPDATE db_meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'generation'
+                ''')
+                self._bump_revision(conn)
             logging.info("Products table cleared successfully")
         except Exception as e:
             logging.error(f"Error clearing products table: {e}")
             raise
 
     def close(self) -> None:
-        """Close any open database connections"""
+        """Close any open database connections. They are reopened on the next use."""
         try:
+            with self._readers_lock:
+                for conn in self._all_readers:
+                    conn.close()
+                self._all_readers = []
+                self._readers = queue.LifoQueue()
+            with self._version_lock:
+                if self._version_conn is not None:
+                    self._version_conn.close()
+                    self._version_conn = None
+            with self._write_lock:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
             logging.info(f"Database '{self.db_name}' closed successfully.")
         except Exception as e:
             logging.error(f"Error closing database: {e}")
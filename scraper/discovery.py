@@ -0,0 +1,267 @@
+import re
+import math
+import hashlib
+import logging
+import requests
+from collections import deque
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from .db_manager import DatabaseManager
+from .rate_limit import RateLimiter
+from .scraper import fetch_response
+from .session import get_session, check_response
+
+# Product pages look like /product/<slug>/<id>, as in main.py
+PRODUCT_PATTERN = r'^/product/[^/]+/\d+/?$'
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|gclid|fbclid|msclkid|mc_cid|mc_eid|sessionid|sid)$', re.IGNORECASE)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def canonicalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Normalizes a link so that every spelling of the same page maps to one URL.
+
+    Relative links are resolved against base, scheme and host are lowercased,
+    default ports, fragments and tracking parameters are removed and the
+    remaining query parameters are sorted.
+
+    Args:
+        url: Link as found in the page
+        base: URL of the page the link was found on
+
+    Returns:
+        The canonical URL, or None if the link is not an http(s) URL
+    """
+    url = urljoin(base, url.strip()) if base else url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    netloc = parts.hostname.lower()
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f'{netloc}:{port}'
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not TRACKING_PARAMS.match(key)))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+class _LinkParser(HTMLParser):
+    """Collects the href of every <a> and of <link rel="next">"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.base: Optional[str] = None
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in ('a', 'link', 'base'):
+            return
+        attributes = dict(attrs)
+        href = attributes.get('href')
+        if not href:
+            return
+        if tag == 'base':
+            self.base = self.base or href
+        elif tag == 'a' or 'next' in (attributes.get('rel') or '').lower().split():
+            self.links.append(href)
+
+def extract_links(html: str, page_url: str) -> List[str]:
+    """
+    Returns the canonical URLs of the links on a page, in page order without duplicates.
+
+    Args:
+        html: Raw HTML of the page
+        page_url: URL the page was fetched from, to resolve relative links
+    """
+    parser = _LinkParser()
+    parser.feed(html)
+    parser.close()
+    base = urljoin(page_url, parser.base) if parser.base else page_url
+
+    links = []
+    for href in parser.links:
+        url = canonicalize_url(href, base)
+        if url is not None:
+            links.append(url)
+    return list(dict.fromkeys(links))
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set: no false negatives, about error_rate false positives.
+
+    A million URLs at a 0.1% error rate take under 2 MB, against well over
+    100 MB for a Python set of the same strings.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Args:
+            capacity: Number of items the filter is sized for
+            error_rate: False positive rate at capacity
+        """
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate between 0 and 1")
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class SeenSet:
+    """
+    Set of seen URLs: a Bloom filter in memory, backed by the seen_urls table.
+
+    The filter answers "definitely new" for nearly every new URL without touching
+    the database; only its rare positives are confirmed against the table. The
+    table keeps the set across restarts and is used to rebuild the filter.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        Args:
+            db_manager: DatabaseManager holding the seen_urls table
+            capacity: Expected number of URLs, sizes the Bloom filter
+            error_rate: Bloom filter false positive rate at capacity
+        """
+        self.db_manager = db_manager
+        self.bloom = BloomFilter(capacity, error_rate)
+        for url in db_manager.iter_seen_urls():
+            self.bloom.add(url)
+        if self.bloom.count > capacity:
+            logging.warning(f"{self.bloom.count} seen URLs exceed the Bloom filter capacity of {capacity}")
+
+    def add_new(self, urls: List[str], kind: str = 'product') -> List[str]:
+        """
+        Records the URLs and returns those that had not been seen before.
+
+        Args:
+            urls: Canonical URLs without duplicates
+            kind: Stored with new URLs
+        """
+        maybe_seen = [url for url in urls if url in self.bloom]
+        confirmed = self.db_manager.filter_seen_urls(maybe_seen) if maybe_seen else set()
+        new = [url for url in urls if url not in confirmed]
+        if new:
+            self.db_manager.add_seen_urls((url, kind) for url in new)
+            for url in new:
+                self.bloom.add(url)
+        return new
+
+def discover_products(start_urls: Iterable[str], db_manager: DatabaseManager,
+                      product_pattern: Union[str, Pattern] = PRODUCT_PATTERN,
+                      listing_prefixes: Optional[List[str]] = None,
+                      max_pages: Optional[int] = None,
+                      session: Optional[requests.Session] = None,
+                      limiter: Optional[RateLimiter] = None,
+                      seen: Optional[SeenSet] = None,
+                      include_known: bool = False) -> Iterator[str]:
+    """
+    Walks category and listing pages and yields every product URL found, once.
+
+    Links on the start URLs' hosts whose path matches product_pattern are
+    yielded as products; links whose path starts with one of listing_prefixes
+    are queued as further listing pages (breadth first). Listing pages are
+    walked again on every run, but seen products are remembered across runs,
+    so a later run only yields new products. Feed the result to
+    DatabaseManager.add_to_frontier or iter_scrape with include_known: the seen
+    URLs are committed as each listing page is parsed, before the consumer has
+    stored them, so only include_known survives an interrupted run, and it keeps
+    known products refreshed when they are scraped directly.
+
+    Args:
+        start_urls: Category pages to start from
+        db_manager: DatabaseManager holding the seen URLs
+        product_pattern: Regular expression for product page paths
+        listing_prefixes: Path prefixes of listing pages, defaults to the start URLs' paths
+        max_pages: Maximum number of listing pages to fetch
+        session: Session to fetch with, defaults to the shared pooled session
+        limiter: Optional per-host RateLimiter
+        seen: SeenSet to deduplicate with, defaults to one on db_manager
+        include_known: Also yield products seen in earlier runs, once per run
+
+    Yields:
+        Canonical product URLs
+    """
+    session = session or get_session()
+    product_re = re.compile(product_pattern) if isinstance(product_pattern, str) else product_pattern
+    seen = seen or SeenSet(db_manager)
+
+    start_urls = [url for url in (canonicalize_url(url) for url in start_urls) if url]
+    hosts = {urlsplit(url).netloc for url in start_urls}
+    prefixes = tuple(listing_prefixes or (urlsplit(url).path.rstrip('/') or '/' for url in start_urls))
+
+    # Listing pages are few compared to products, a plain set per run is enough
+    visited = set(start_urls)
+    # Only kept with include_known: exact, since a false positive would skip a product on every run
+    yielded: set = set()
+    queue = deque(start_urls)
+    pages = found = 0
+    while queue and (max_pages is None or pages < max_pages):
+        page_url = queue.popleft()
+        pages += 1
+        try:
+            response = fetch_response(page_url, session, limiter=limiter)
+            response.raise_for_status()
+            problem = check_response(page_url, response.status_code,
+                                     response.headers.get('Content-Type'), response.url)
+            if problem:
+                logging.warning(f"Skipping listing page {page_url}: {problem}")
+                continue
+            links = extract_links(response.text, response.url or page_url)
+        except requests.RequestException as e:
+            logging.error(f"Error fetching {page_url}: {e}")
+            continue
+        except Exception as e:
+            logging.error(f"Unexpected error processing {page_url}: {e}")
+            continue
+
+        products, listings = _classify(links, hosts, product_re, prefixes)
+        for url in listings:
+            if url not in visited:
+                visited.add(url)
+                queue.append(url)
+        new = seen.add_new(products)
+        if include_known:
+            new = [url for url in products if url not in yielded]
+            yielded.update(new)
+        for url in new:
+            found += 1
+            yield url
+        logging.info(f"Discovered {found} products on {pages} pages, {len(queue)} pages queued")
+
+def _classify(links: List[str], hosts: set, product_re: Pattern,
+              prefixes: Tuple[str, ...]) -> Tuple[List[str], List[str]]:
+    """Splits links into product pages and listing pages; other links are dropped"""
+    products, listings = [], []
+    for url in links:
+        parts = urlsplit(url)
+        if parts.netloc not in hosts:
+            continue
+        if product_re.search(parts.path):
+            # The query string never selects a different product
+            products.append(urlunsplit((parts.scheme, parts.netloc, parts.path.rstrip('/'), '', '')))
+        elif parts.path.startswith(prefixes):
+            listings.append(url)
+    return list(dict.fromkeys(products)), listings
@@ -0,0 +1,161 @@
+"""
+Snapshot export of the products table for analytics jobs.
+
+The live database is only touched for a single backup-API copy; the export
+itself reads that private copy in chunks, so it neither holds a read
+transaction on the live database nor loads the whole table into memory.
+
+Usage:
+    python -m scraper.export OUTPUT [--db product_data.db] [--format parquet|arrow|csv.gz]
+"""
+import os
+import gzip
+import sqlite3
+import logging
+import argparse
+import tempfile
+from typing import Optional
+import pandas as pd
+from .db_manager import DatabaseManager
+
+# Formats that need pyarrow come first; csv.gz always works
+EXPORT_FORMATS = ('parquet', 'arrow', 'csv.gz')
+
+EXPORT_QUERY = '''
+    SELECT id, product_name, url, price, delivery_time, timestamp, fingerprint, last_seen, last_changed
+    FROM products
+    ORDER BY id
+'''
+
+DATE_COLUMNS = ['timestamp', 'last_seen', 'last_changed']
+
+def have_pyarrow() -> bool:
+    """Returns True if the optional pyarrow package is installed"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def export_format(path: str, fmt: Optional[str] = None) -> str:
+    """
+    Picks the export format: fmt if given, else from the file extension, else
+    Parquet when pyarrow is installed and gzipped CSV otherwise.
+    """
+    if fmt is None:
+        if path.endswith('.csv.gz'):
+            fmt = 'csv.gz'
+        elif path.endswith(('.arrow', '.feather')):
+            fmt = 'arrow'
+        elif path.endswith('.parquet'):
+            fmt = 'parquet'
+        else:
+            fmt = 'parquet' if have_pyarrow() else 'csv.gz'
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt}, expected one of {', '.join(EXPORT_FORMATS)}")
+    if fmt != 'csv.gz' and not have_pyarrow():
+        raise ImportError(f"Exporting {fmt} needs pyarrow (pip install pyarrow), or export csv.gz")
+    return fmt
+
+def _arrow_schema():
+    """Column types of the exported products, fixed so every chunk matches"""
+    import pyarrow as pa
+    return pa.schema([
+        ('id', pa.int64()),
+        ('product_name', pa.string()),
+        ('url', pa.string()),
+        ('price', pa.float64()),
+        ('delivery_time', pa.string()),
+        ('timestamp', pa.timestamp('ns')),
+        ('fingerprint', pa.string()),
+        ('last_seen', pa.timestamp('ns')),
+        ('last_changed', pa.timestamp('ns')),
+    ])
+
+def _write_chunks(chunks, path: str, fmt: str) -> int:
+    """Writes DataFrame chunks to path in fmt and returns the number of rows"""
+    rows = 0
+    if fmt == 'csv.gz':
+        with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=i == 0, index=False)
+                rows += len(chunk)
+        return rows
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = _arrow_schema()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(path, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+    try:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return rows
+
+def export_products(db_manager: DatabaseManager, path: str, fmt: Optional[str] = None,
+                    chunk_size: int = 50000) -> int:
+    """
+    Exports a snapshot of the products table to a compressed columnar file.
+
+    The database is first copied with the SQLite backup API, which does not block
+    the crawler, and the copy is then read in chunks of chunk_size rows with typed
+    columns. The output is written next to path and renamed into place, so readers
+    never see a partial file.
+
+    Args:
+        db_manager: DatabaseManager of the live database
+        path: Output file
+        fmt: One of EXPORT_FORMATS, see export_format for the default
+        chunk_size: Rows converted and written at a time
+
+    Returns:
+        Number of exported products
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    fmt = export_format(path, fmt)
+    directory = os.path.dirname(os.path.abspath(path))
+
+    try:
+        with tempfile.TemporaryDirectory(dir=directory) as workdir:
+            copy_path = os.path.join(workdir, 'snapshot.db')
+            db_manager.backup(copy_path)
+
+            partial_path = os.path.join(workdir, 'export.partial')
+            conn = sqlite3.connect(copy_path)
+            try:
+                chunks = pd.read_sql(EXPORT_QUERY, conn, chunksize=chunk_size,
+                                     dtype={'price': 'float64'}, parse_dates=DATE_COLUMNS)
+                rows = _write_chunks(chunks, partial_path, fmt)
+            finally:
+                conn.close()
+            os.replace(partial_path, path)
+    except Exception as e:
+        logging.error(f"Error exporting products to {path}: {e}")
+        raise
+
+    logging.info(f"Exported {rows} products to {path} as {fmt}")
+    return rows
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help='Output file')
+    parser.add_argument('--db', default='product_data.db', help='Database to export')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, help='Defaults to the extension of output')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Rows written at a time')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    db_manager = DatabaseManager(args.db)
+    try:
+        export_products(db_manager, args.output, args.format, args.chunk_size)
+    finally:
+        db_manager.close()
+
+if __name__ == '__main__':
+    main()
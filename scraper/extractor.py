@@ -0,0 +1,166 @@
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+# Elements that are closed as soon as they are opened (same list as BeautifulSoup's tree builder)
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem',
+    'meta', 'param', 'source', 'track', 'wbr',
+    'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex', 'nextid', 'spacer'
+])
+
+# Text inside these elements is not part of get_text()
+NON_TEXT_ELEMENTS = frozenset(['script', 'style', 'template'])
+
+DELIVERY_TIME_KEY = 'product-delivery-time'
+
+class _ExtractorParser(HTMLParser):
+    """
+    Event handler doing the actual single pass; created once per page.
+
+    Only the stack of open tag names is kept instead of a tree. Tags are opened
+    and closed exactly like BeautifulSoup's html.parser builder does, so text is
+    split and elements are closed at the same points and the extracted strings
+    are identical.
+    """
+
+    def __init__(self, extractor: 'ProductExtractor'):
+        super().__init__(convert_charrefs=True)
+        self.wanted = extractor.properties
+        self.delivery_tag = extractor.delivery_tag
+        self.delivery_class = extractor.delivery_class
+        self.found: Dict[str, str] = {}
+        self.open_tags: List[str] = []
+        # Void elements closed at their start tag; a later end tag for them is ignored
+        self.closed_voids: List[str] = []
+        # Stack depth at which the delivery time element was opened, None while outside it
+        self.delivery_depth: Optional[int] = None
+        self.delivery_parts: Optional[List[str]] = None
+        self.delivery_done = False
+        self.text_buffer: List[str] = []
+        self.skip_depth = 0
+
+    @property
+    def done(self) -> bool:
+        return self.delivery_done and len(self.found) == len(self.wanted)
+
+    def handle_starttag(self, tag, attrs, handle_void=True):
+        self._flush_text()
+        if tag == 'meta' and len(self.found) < len(self.wanted):
+            attributes = dict(attrs)
+            prop = attributes.get('property')
+            if prop in self.wanted and prop not in self.found:
+                self.found[prop] = attributes.get('content') or ''
+
+        self.open_tags.append(tag)
+        if self.delivery_depth is not None:
+            if tag in NON_TEXT_ELEMENTS:
+                self.skip_depth += 1
+        elif tag == self.delivery_tag and self.delivery_parts is None:
+            classes = (dict(attrs).get('class') or '').split()
+            if self.delivery_class in classes:
+                self.delivery_parts = []
+                self.delivery_depth = len(self.open_tags)
+
+        if handle_void and tag in VOID_ELEMENTS:
+            self.handle_endtag(tag, check_closed_voids=False)
+            self.closed_voids.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_void=False)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag, check_closed_voids=True):
+        if check_closed_voids and tag in self.closed_voids:
+            self.closed_voids.remove(tag)
+            return
+        self._flush_text()
+        if tag not in self.open_tags:
+            return
+        # Close everything up to and including the most recent matching tag
+        while self.open_tags:
+            closed = self.open_tags.pop()
+            if self.delivery_depth is not None:
+                if len(self.open_tags) < self.delivery_depth:
+                    self.delivery_depth = None
+                    self.delivery_done = True
+                elif closed in NON_TEXT_ELEMENTS:
+                    self.skip_depth -= 1
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        if self.delivery_depth is not None and not self.skip_depth:
+            self.text_buffer.append(data)
+
+    def handle_comment(self, data):
+        # Comments, declarations and processing instructions end the current string
+        self._flush_text()
+
+    handle_decl = handle_pi = handle_comment
+
+    def unknown_decl(self, data):
+        # CDATA sections are kept as a separate string
+        self._flush_text()
+        if data.upper().startswith('CDATA['):
+            self.handle_data(data[len('CDATA['):])
+            self._flush_text()
+
+    def _flush_text(self):
+        if self.text_buffer:
+            text = ''.join(self.text_buffer).strip()
+            if text:
+                self.delivery_parts.append(text)
+            self.text_buffer = []
+
+    def result(self, properties: List[str]) -> Dict[str, Optional[str]]:
+        self._flush_text()
+        meta_data = {prop: self.found.get(prop) for prop in properties}
+        if self.delivery_parts is None:
+            meta_data[DELIVERY_TIME_KEY] = None
+        else:
+            meta_data[DELIVERY_TIME_KEY] = ''.join(self.delivery_parts).replace('timer', '')
+        return meta_data
+
+class ProductExtractor:
+    """
+    Extracts meta properties and the delivery time from a product page in one streaming pass.
+
+    The extractor is compiled once from the property list and the delivery time
+    selector and can be reused for every page. It produces the same dictionaries
+    as the BeautifulSoup implementation without building a tree, and stops
+    reading as soon as every field has been found.
+    """
+
+    def __init__(self, properties: List[str], delivery_tag: str = 'span',
+                 delivery_class: str = DELIVERY_TIME_KEY, chunk_size: int = 16384):
+        """
+        Args:
+            properties: List of meta properties to extract
+            delivery_tag: Tag name of the delivery time element
+            delivery_class: CSS class of the delivery time element
+            chunk_size: Number of characters fed to the parser between early-exit checks
+        """
+        self.property_list = list(properties)
+        self.properties = frozenset(properties)
+        self.delivery_tag = delivery_tag
+        self.delivery_class = delivery_class
+        self.chunk_size = chunk_size
+
+    def extract(self, html: str) -> Dict[str, Optional[str]]:
+        """
+        Extracts all fields from a page.
+
+        Args:
+            html: Raw HTML of the product page
+
+        Returns:
+            Dictionary mapping each property (and 'product-delivery-time') to its value or None
+        """
+        parser = _ExtractorParser(self)
+        for start in range(0, len(html), self.chunk_size):
+            parser.feed(html[start:start + self.chunk_size])
+            if parser.done:
+                break
+        else:
+            parser.close()
+        return parser.result(self.property_list)
@@ -0,0 +1,159 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+import logging
+from typing import Dict, List, Optional
+
+class CacheEntry:
+    """A cached response: validators, the compressed body and the data extracted from it"""
+
+    def __init__(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                 compressed_body: bytes, meta_data: Optional[Dict]):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.compressed_body = compressed_body
+        self.meta_data = meta_data
+
+    @property
+    def body(self) -> str:
+        """Decompressed HTML body"""
+        return zlib.decompress(self.compressed_body).decode('utf-8')
+
+    def has_properties(self, properties: List[str]) -> bool:
+        """True if the cached extraction covers every requested property"""
+        return self.meta_data is not None and all(prop in self.meta_data for prop in properties)
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache keyed by URL, stored in its own SQLite file.
+
+    Bodies are zlib-compressed and the cache is bounded by the total compressed
+    size; when it grows past max_bytes the least recently used entries are evicted.
+
+    Lookups don't write: access times are kept in memory and written in one
+    transaction with the next store, or once access_batch_size of them are pending.
+    """
+
+    def __init__(self, path: str = 'http_cache.db', max_bytes: int = 256 * 1024 * 1024,
+                 access_batch_size: int = 256):
+        """Open (or create) the cache file"""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.access_batch_size = access_batch_size
+        self._lock = threading.Lock()
+        self._pending_access: Dict[str, float] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                meta_data TEXT,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)')
+        self._conn.commit()
+        self._total_size = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Returns the cached entry for url and marks it as recently used"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified, body, meta_data FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._pending_access[url] = time.time()
+            if len(self._pending_access) >= self.access_batch_size:
+                self._flush_access()
+                self._conn.commit()
+        etag, last_modified, body, meta_data = row
+        return CacheEntry(url, etag, last_modified, body, json.loads(meta_data) if meta_data else None)
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Builds If-None-Match / If-Modified-Since headers for a cached entry"""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def store(self, url: str, headers, body: str, meta_data: Optional[Dict] = None) -> bool:
+        """
+        Stores a response if it carries validators.
+
+        Args:
+            url: Requested URL
+            headers: Response headers (any mapping supporting .get)
+            body: Response body
+            meta_data: Data extracted from the body, reused on a 304
+
+        Returns:
+            True if the response was cached
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return False
+
+        compressed = zlib.compress(body.encode('utf-8'), 6)
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+            self._conn.execute('''
+                INSERT OR REPLACE INTO responses (url, etag, last_modified, body, meta_data, size, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (url, etag, last_modified, compressed,
+                  json.dumps(meta_data) if meta_data is not None else None,
+                  len(compressed), time.time()))
+            self._total_size += len(compressed) - (old[0] if old else 0)
+            self._pending_access.pop(url, None)
+            # Eviction must see the latest access times
+            self._flush_access()
+            self._evict()
+            self._conn.commit()
+        return True
+
+    def _flush_access(self) -> None:
+        """Writes the buffered access times. Caller holds the lock and commits."""
+        if self._pending_access:
+            self._conn.executemany('UPDATE responses SET last_access = ? WHERE url = ?',
+                                   [(accessed, url) for url, accessed in self._pending_access.items()])
+            self._pending_access.clear()
+
+    def _evict(self) -> None:
+        """Drops least recently used entries until the cache fits in max_bytes. Caller holds the lock."""
+        while self._total_size > self.max_bytes:
+            rows = self._conn.execute(
+                'SELECT url, size FROM responses ORDER BY last_access LIMIT 64'
+            ).fetchall()
+            if not rows:
+                self._total_size = 0
+                return
+            for url, size in rows:
+                self._conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+                self._total_size -= size
+                if self._total_size <= self.max_bytes:
+                    break
+        logging.debug(f"Response cache size: {self._total_size} bytes")
+
+    @property
+    def total_size(self) -> int:
+        """Total compressed size of all cached bodies in bytes"""
+        return self._total_size
+
+    def close(self) -> None:
+        """Close the cache file"""
+        with self._lock:
+            self._flush_access()
+            self._conn.commit()
+            self._conn.close()
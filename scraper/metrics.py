@@ -0,0 +1,207 @@
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+# Bucket upper bounds in seconds, from sub-millisecond parses to slow downloads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def host_of(url: str) -> str:
+    """Host label of a URL"""
+    return urlsplit(url).netloc.lower()
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}_total{_labels(self.labelnames, key)} {value}' for key, value in values]
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        """Observes the duration of the with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def count(self, *labelvalues: str) -> int:
+        with self._lock:
+            series = self._series.get(labelvalues)
+            return sum(series[0]) if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {total}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+FETCH_SECONDS = REGISTRY.register(Histogram(
+    'scraper_fetch_seconds', 'HTTP request duration per phase (ttfb includes connecting)', ['host', 'phase']))
+RESPONSES = REGISTRY.register(Counter(
+    'scraper_responses', 'HTTP responses by status code', ['host', 'status']))
+FETCH_ERRORS = REGISTRY.register(Counter(
+    'scraper_fetch_errors', 'Requests that failed without a response', ['host']))
+PARSE_SECONDS = REGISTRY.register(Histogram(
+    'scraper_parse_seconds', 'Time to extract the properties from a page'))
+VALIDATION_SECONDS = REGISTRY.register(Histogram(
+    'scraper_validation_seconds', 'Time to check the extracted properties'))
+MISSING_PROPERTIES = REGISTRY.register(Counter(
+    'scraper_missing_properties', 'Pages skipped because required properties were missing', ['host']))
+UPSERT_SECONDS = REGISTRY.register(Histogram(
+    'db_upsert_seconds', 'Time to write a batch of products', ['operation']))
+UPSERT_ROWS = REGISTRY.register(Counter(
+    'db_upsert_rows', 'Products written to the database', ['outcome']))
+
+def record_response(url: str, status: Optional[int], ttfb: Optional[float], total: float) -> None:
+    """
+    Records one HTTP request.
+
+    Args:
+        url: The requested URL
+        status: HTTP status code, None if the request failed without a response
+        ttfb: Seconds until the response headers arrived, None if unknown
+        total: Seconds until the body was read or the request failed
+    """
+    host = host_of(url)
+    if status is None:
+        FETCH_ERRORS.inc(host)
+        return
+    RESPONSES.inc(host, str(status))
+    if ttfb is None:
+        FETCH_SECONDS.observe(total, host, 'total')
+    else:
+        FETCH_SECONDS.observe(ttfb, host, 'ttfb')
+        FETCH_SECONDS.observe(max(0.0, total - ttfb), host, 'download')
+
+def serve_metrics(port: int, host: str = '0.0.0.0', registry: Optional[Registry] = None) -> ThreadingHTTPServer:
+    """
+    Serves registry at /metrics from a daemon thread, for processes without a
+    web app such as crawl workers. Metrics live in the memory of the process
+    that records them, so every crawler exposes its own.
+
+    Args:
+        port: Port to listen on, 0 picks a free one
+        host: Interface to listen on
+        registry: Registry to serve, defaults to REGISTRY
+
+    Returns:
+        The running server; call shutdown() to stop it
+    """
+    registry = registry or REGISTRY
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scraped every few seconds; not worth a log line each time
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logging.info(f"Serving metrics at http://{host}:{server.server_address[1]}/metrics")
+    return server
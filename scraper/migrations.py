@@ -0,0 +1,278 @@
+"""
+Versioned schema migrations for the product database.
+
+The schema version is kept in PRAGMA user_version. Each entry of MIGRATIONS
+upgrades the database by one version and sets user_version in the same
+transaction as its last step, so an up-to-date database is recognised with a
+single PRAGMA and migrating it costs milliseconds.
+
+Migrations that touch every row work in chunks of chunk_size rows, one
+transaction per chunk, and record their progress in the database. The write
+lock is only held for one chunk at a time, and an interrupted migration
+continues where it stopped on the next run.
+
+DatabaseManager.create_table creates the baseline schema and then runs
+migrate, so opening a database always brings it up to date. Schema changes
+go here as new migrations, never into create_table alone.
+"""
+import sqlite3
+import logging
+from contextlib import closing
+from typing import Callable, List, Optional, Tuple
+
+# Columns added to products after its first release, with their definitions
+PRODUCT_COLUMNS = {
+    'fingerprint': 'TEXT',
+    'last_seen': 'DATETIME',
+    'last_changed': 'DATETIME',
+}
+
+# Columns added to frontier for leased claims by several crawler processes
+FRONTIER_COLUMNS = {
+    'lease_owner': 'TEXT',
+    'lease_expires': 'REAL',
+}
+
+# Called as progress(version, name, rows_done, rows_total) after every chunk
+ProgressCallback = Callable[[int, str, int, int], None]
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Returns the schema version recorded in the database"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def log_progress(version: int, name: str, done: int, total: int) -> None:
+    """Default progress callback, logs every chunk"""
+    logging.info(f"Migration {version} ({name}): {done}/{total} rows")
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (table,)).fetchone() is not None
+
+def _has_unique_url(conn: sqlite3.Connection) -> bool:
+    """True if products has a unique index on url alone"""
+    for index in conn.execute('PRAGMA index_list(products)').fetchall():
+        if index[2] and [column[2] for column in conn.execute(f"PRAGMA index_info('{index[1]}')")] == ['url']:
+            return True
+    return False
+
+def _get_progress(conn: sqlite3.Connection, version: int) -> Optional[int]:
+    conn.execute('CREATE TABLE IF NOT EXISTS db_meta (key TEXT PRIMARY KEY, value TEXT)')
+    row = conn.execute('SELECT value FROM db_meta WHERE key = ?', (f'migration_{version}_last_id',)).fetchone()
+    return int(row[0]) if row else None
+
+def _set_progress(conn: sqlite3.Connection, version: int, last_id: Optional[int]) -> None:
+    key = f'migration_{version}_last_id'
+    if last_id is None:
+        conn.execute('DELETE FROM db_meta WHERE key = ?', (key,))
+    else:
+        conn.execute('INSERT OR REPLACE INTO db_meta (key, value) VALUES (?, ?)', (key, str(last_id)))
+
+def _next_chunk(conn: sqlite3.Connection, last_id: int, chunk_size: int) -> Optional[int]:
+    """Returns the highest products id of the next chunk after last_id, None when done"""
+    return conn.execute('''
+        SELECT MAX(id) FROM (SELECT id FROM products WHERE id > ? ORDER BY id LIMIT ?)
+    ''', (last_id, chunk_size)).fetchone()[0]
+
+def _unique_product_urls(conn: sqlite3.Connection, version: int, chunk_size: int,
+                         progress: ProgressCallback) -> None:
+    """
+    Rebuilds products with a unique url, keeping the most recent row of every URL.
+
+    Databases whose products table already has a unique url (every database
+    created by DatabaseManager) are left untouched.
+    """
+    # Imported here, db_manager imports this module
+    from .db_manager import SORTABLE_COLUMNS
+
+    if not _table_exists(conn, 'products') or _has_unique_url(conn):
+        return
+
+    last_id = _get_progress(conn, version)
+    if last_id is None:
+        conn.execute('DROP TABLE IF EXISTS products_new')
+        conn.execute('''
+            CREATE TABLE products_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_name TEXT NOT NULL,
+                url TEXT NOT NULL UNIQUE,
+                price REAL NOT NULL,
+                delivery_time TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        last_id = 0
+        _set_progress(conn, version, last_id)
+        conn.commit()
+
+    total = conn.execute('SELECT COUNT(*) FROM products').fetchone()[0]
+    done = conn.execute('SELECT COUNT(*) FROM products WHERE id <= ?', (last_id,)).fetchone()[0]
+    while True:
+        upper = _next_chunk(conn, last_id, chunk_size)
+        if upper is None:
+            break
+        # Of several rows with the same URL the newest one wins, whole row at once
+        conn.execute('''
+            INSERT INTO products_new (id, product_name, url, price, delivery_time, timestamp)
+            SELECT id, product_name, url, price, delivery_time, timestamp
+            FROM products
+            WHERE id > ? AND id <= ?
+            ORDER BY id
+            ON CONFLICT(url) DO UPDATE SET
+                id = excluded.id,
+                product_name = excluded.product_name,
+                price = excluded.price,
+                delivery_time = excluded.delivery_time,
+                timestamp = excluded.timestamp
+            WHERE (COALESCE(excluded.timestamp, ''), excluded.id)
+                > (COALESCE(products_new.timestamp, ''), products_new.id)
+        ''', (last_id, upper))
+        done += conn.execute('SELECT COUNT(*) FROM products WHERE id > ? AND id <= ?',
+                             (last_id, upper)).fetchone()[0]
+        last_id = upper
+        _set_progress(conn, version, last_id)
+        conn.commit()
+        progress(version, 'unique product URLs', done, total)
+
+    # The swap is one transaction, committed together with the new user_version
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute('DROP TABLE products')
+    conn.execute('ALTER TABLE products_new RENAME TO products')
+    # Dropping the old table dropped its indexes
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_url ON products(url)')
+    for column in SORTABLE_COLUMNS:
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_products_{column} ON products({column}, id)')
+    _set_progress(conn, version, None)
+    # Duplicate rows were removed, so incremental readers have to start over
+    conn.execute("UPDATE db_meta SET value = CAST(value AS INTEGER) + 1 WHERE key IN ('generation', 'revision')")
+
+def _product_fingerprints(conn: sqlite3.Connection, version: int, chunk_size: int,
+                          progress: ProgressCallback) -> None:
+    """
+    Adds the fingerprint, last_seen and last_changed columns and backfills them.
+    """
+    # Imported here, db_manager imports this module
+    from .db_manager import product_fingerprint
+
+    if not _table_exists(conn, 'products'):
+        return
+
+    existing = {column[1] for column in conn.execute('PRAGMA table_info(products)')}
+    missing = [column for column in PRODUCT_COLUMNS if column not in existing]
+    for column in missing:
+        conn.execute(f'ALTER TABLE products ADD COLUMN {column} {PRODUCT_COLUMNS[column]}')
+    if missing:
+        conn.commit()
+        logging.info(f"Added columns {missing} to the products table")
+
+    conn.create_function('product_fingerprint', 3, product_fingerprint, deterministic=True)
+    total = conn.execute('SELECT COUNT(*) FROM products WHERE fingerprint IS NULL').fetchone()[0]
+    if not total:
+        return
+    # Rows are backfilled in id order, so the first one without a fingerprint is where to resume
+    last_id = conn.execute('SELECT MIN(id) FROM products WHERE fingerprint IS NULL').fetchone()[0] - 1
+    done = 0
+    while True:
+        upper = _next_chunk(conn, last_id, chunk_size)
+        if upper is None:
+            break
+        cursor = conn.execute('''
+            UPDATE products
+            SET fingerprint = product_fingerprint(product_name, price, delivery_time),
+                last_seen = COALESCE(last_seen, timestamp),
+                last_changed = COALESCE(last_changed, timestamp)
+            WHERE id > ? AND id <= ? AND fingerprint IS NULL
+        ''', (last_id, upper))
+        done += cursor.rowcount
+        last_id = upper
+        conn.commit()
+        progress(version, 'product fingerprints', done, total)
+
+def _frontier_leases(conn: sqlite3.Connection, version: int, chunk_size: int,
+                     progress: ProgressCallback) -> None:
+    """
+    Adds the lease columns to frontier. URLs already in flight keep a NULL
+    lease, which only recover_frontier hands out again.
+    """
+    if not _table_exists(conn, 'frontier'):
+        return
+    existing = {column[1] for column in conn.execute('PRAGMA table_info(frontier)')}
+    missing = [column for column in FRONTIER_COLUMNS if column not in existing]
+    for column in missing:
+        conn.execute(f'ALTER TABLE frontier ADD COLUMN {column} {FRONTIER_COLUMNS[column]}')
+    if missing:
+        logging.info(f"Added columns {missing} to the frontier table")
+
+# Ordered migrations; entry i upgrades the database from version i to i + 1
+MIGRATIONS: List[Tuple[str, Callable[[sqlite3.Connection, int, int, ProgressCallback], None]]] = [
+    ('unique product URLs', _unique_product_urls),
+    ('product fingerprints', _product_fingerprints),
+    ('frontier leases', _frontier_leases),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate(conn: sqlite3.Connection, chunk_size: int = 10000,
+            progress: Optional[ProgressCallback] = None) -> int:
+    """
+    Applies the pending migrations to an open database.
+
+    Args:
+        conn: Connection to the database, not inside a transaction
+        chunk_size: Rows copied or backfilled per transaction
+        progress: Called after every chunk, defaults to log_progress
+
+    Returns:
+        Number of migrations applied, 0 if the database was up to date
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    current = schema_version(conn)
+    if current >= SCHEMA_VERSION:
+        return 0
+
+    progress = progress or log_progress
+    for version in range(current + 1, SCHEMA_VERSION + 1):
+        name, apply = MIGRATIONS[version - 1]
+        try:
+            logging.info(f"Applying migration {version} ({name})")
+            apply(conn, version, chunk_size, progress)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Error applying migration {version} ({name}): {e}")
+            raise
+    logging.info(f"Database migrated from version {current} to {SCHEMA_VERSION}")
+    return SCHEMA_VERSION - current
+
+def migrate_database(db_name: str = 'product_data.db', chunk_size: int = 10000) -> int:
+    """
+    Brings a database file up to date the way opening it with DatabaseManager
+    does: missing tables are created and pending migrations applied.
+
+    Returns:
+        Number of migrations applied
+    """
+    # Imported here, db_manager imports this module
+    from .db_manager import DatabaseManager
+
+    with closing(sqlite3.connect(db_name)) as conn:
+        before = schema_version(conn)
+    DatabaseManager(db_name, migration_chunk_size=chunk_size).close()
+    return max(0, SCHEMA_VERSION - before)
+
+def check_duplicates(db_name: str = 'product_data.db') -> List[Tuple]:
+    """
+    Returns (product_name, url, count) for every URL stored more than once.
+    """
+    try:
+        with closing(sqlite3.connect(db_name)) as conn:
+            return conn.execute('''
+                SELECT product_name, url, COUNT(*) as count
+                FROM products
+                GROUP BY url
+                HAVING COUNT(*) > 1
+            ''').fetchall()
+    except Exception as e:
+        logging.error(f"Error checking duplicates: {e}")
+        raise
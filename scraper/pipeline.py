@@ -0,0 +1,158 @@
+import os
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+import requests
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+from .db_manager import DatabaseManager
+from .scraper import parse_product_page, check_properties, flush_products, fetch_response
+from .rate_limit import RateLimiter
+from .metrics import PARSE_SECONDS
+from .session import get_session, check_response
+
+# Marks the end of a stream between stages
+_DONE = object()
+
+def _parse_page(html: str, properties: List[str]) -> Tuple[dict, float]:
+    """
+    Runs in a parser process; the compiled extractor is cached per process.
+    The parse time is returned so the parent process can record it.
+    """
+    start = time.perf_counter()
+    meta_data = parse_product_page(html, properties)
+    return meta_data, time.perf_counter() - start
+
+def run_pipeline(urls: Iterable[str], properties: List[str], db_manager: DatabaseManager,
+                 fetch_workers: int = 8, parse_workers: Optional[int] = None,
+                 batch_size: int = 100, queue_size: int = 256,
+                 session: Optional[requests.Session] = None,
+                 parse_executor: Optional[Executor] = None,
+                 limiter: Optional[RateLimiter] = None) -> List[dict]:
+    """
+    Scrapes URLs with overlapping fetch, parse and write stages.
+
+    Fetcher threads download pages and hand the raw HTML through a bounded queue
+    to a pool of parser processes. A single writer thread takes the parse
+    futures in submission order, waits for each one, validates the product and
+    saves the products in batches. Every queue is bounded, so a slow stage
+    makes the stages before it wait instead of buffering without limit.
+
+    Args:
+        urls: URLs to scrape
+        properties: List of meta properties to extract
+        db_manager: DatabaseManager instance for saving data
+        fetch_workers: Number of fetcher threads
+        parse_workers: Number of parser processes, defaults to the number of CPUs
+        batch_size: Number of products per database write
+        queue_size: Maximum number of items waiting between two stages
+        session: Session to fetch with, defaults to the shared pooled session
+        parse_executor: Executor to parse with instead of a new process pool
+        limiter: Optional per-host RateLimiter shared by the fetcher threads
+
+    Returns:
+        List of dictionaries containing the scraped data, in the order the pages were fetched
+    """
+    session = session or get_session()
+    url_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    html_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    parsed_queue: queue.Queue = queue.Queue()
+    # Limits pages submitted to the parsers but not yet written, keeping parsed_queue bounded too
+    parse_slots = threading.BoundedSemaphore(queue_size)
+    results: List[dict] = []
+
+    def feed() -> None:
+        try:
+            for url in urls:
+                url_queue.put(url)
+        except Exception as e:
+            logging.error(f"Error reading URLs: {e}")
+        finally:
+            for _ in range(fetch_workers):
+                url_queue.put(_DONE)
+
+    def fetch() -> None:
+        while True:
+            url = url_queue.get()
+            if url is _DONE:
+                html_queue.put(_DONE)
+                return
+            try:
+                response = fetch_response(url, session, limiter=limiter)
+                response.raise_for_status()
+                problem = check_response(url, response.status_code,
+                                         response.headers.get('Content-Type'), response.url)
+                if problem:
+                    logging.warning(f"Skipping invalid URL {url}: {problem}")
+                    continue
+                html_queue.put((url, response.text))
+            except requests.RequestException as e:
+                logging.error(f"Error fetching {url}: {e}")
+            except Exception as e:
+                logging.error(f"Unexpected error processing {url}: {e}")
+
+    def dispatch(executor: Executor) -> None:
+        finished_fetchers = 0
+        try:
+            while finished_fetchers < fetch_workers:
+                item = html_queue.get()
+                if item is _DONE:
+                    finished_fetchers += 1
+                    continue
+                url, html = item
+                parse_slots.acquire()
+                try:
+                    future = executor.submit(_parse_page, html, properties)
+                except Exception as e:
+                    # Keep draining the queue so the fetchers can still finish
+                    parse_slots.release()
+                    logging.error(f"Unexpected error processing {url}: {e}")
+                    continue
+                # Queued right away: the end marker below can't overtake a product
+                parsed_queue.put((url, future))
+        finally:
+            if parse_executor is None:
+                executor.shutdown(wait=True)
+            parsed_queue.put(_DONE)
+
+    def write() -> None:
+        buffer: List[dict] = []
+        while True:
+            item = parsed_queue.get()
+            if item is _DONE:
+                break
+            url, future = item
+            try:
+                meta_data, parse_seconds = future.result()
+            except Exception as e:
+                logging.error(f"Unexpected error processing {url}: {e}")
+                continue
+            finally:
+                parse_slots.release()
+            PARSE_SECONDS.observe(parse_seconds)
+            if not check_properties(url, meta_data, properties):
+                continue
+            buffer.append(meta_data)
+            results.append(meta_data)
+            if len(buffer) >= batch_size:
+                flush_products(db_manager, buffer)
+        flush_products(db_manager, buffer)
+
+    executor = parse_executor or ProcessPoolExecutor(
+        max_workers=parse_workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context('spawn')
+    )
+    threads = [threading.Thread(target=feed, name='pipeline-feed', daemon=True),
+               threading.Thread(target=dispatch, args=(executor,), name='pipeline-dispatch', daemon=True),
+               threading.Thread(target=write, name='pipeline-write', daemon=True)]
+    threads += [threading.Thread(target=fetch, name=f'pipeline-fetch-{i}', daemon=True)
+                for i in range(fetch_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    logging.info(f"Pipeline finished: {len(results)} products scraped")
+    return results
@@ -0,0 +1,200 @@
+import asyncio
+import time
+import threading
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+# Responses that mean the host wants us to slow down
+THROTTLE_STATUSES = frozenset([429, 503])
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parses a Retry-After header into a number of seconds.
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP date
+        now: Current time as a Unix timestamp
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+class HostLimiter:
+    """
+    Token bucket plus AIMD concurrency window for a single host.
+
+    The bucket caps the request rate; the window caps the requests in flight.
+    Fast successful responses grow the window by one (additive increase), while
+    429/503 responses or latency above the target shrink both the window and the
+    rate (multiplicative decrease). A Retry-After header pauses the host.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = 10, min_rate: float = 0.2,
+                 max_rate: float = 50.0, initial_concurrency: int = 2, max_concurrency: int = 32,
+                 target_latency: float = 2.0, decrease_factor: float = 0.5,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate: Initial requests per second
+            burst: Bucket capacity, the largest burst allowed after an idle period
+            min_rate: Lowest rate the limiter backs off to
+            max_rate: Highest rate the limiter grows to
+            initial_concurrency: Initial number of requests allowed in flight
+            max_concurrency: Upper bound of the concurrency window
+            target_latency: Responses slower than this (seconds) count as congestion
+            decrease_factor: Multiplier applied to rate and window on congestion
+            clock: Monotonic time source, replaceable in tests
+        """
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = float(initial_concurrency)
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.clock = clock
+        self.tokens = float(burst)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """
+        Takes a slot if one is available.
+
+        Returns:
+            0 if the request may start now, otherwise the number of seconds to wait before retrying
+        """
+        with self._lock:
+            now = self.clock()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self._refill(now)
+            if self.in_flight >= int(self.concurrency):
+                # Woken up by release(); poll at a short interval meanwhile
+                return min(0.05, 1.0 / self.rate)
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+            self.tokens -= 1
+            self.in_flight += 1
+            return 0.0
+
+    def release(self, status: Optional[int] = None, latency: Optional[float] = None,
+                retry_after: Optional[float] = None) -> None:
+        """
+        Returns a slot and adapts rate and concurrency to the outcome.
+
+        Args:
+            status: HTTP status code, None if the request failed without a response
+            latency: Request duration in seconds
+            retry_after: Seconds from a Retry-After header
+        """
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            congested = (status is None or status in THROTTLE_STATUSES
+                         or (latency is not None and latency > self.target_latency))
+            if congested:
+                self.concurrency = max(1.0, self.concurrency * self.decrease_factor)
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            elif status is not None and status < 400:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / max(1.0, self.concurrency))
+                self.rate = min(self.max_rate, self.rate + 1 / max(1.0, self.rate))
+            if retry_after:
+                self.paused_until = max(self.paused_until, self.clock() + retry_after)
+
+    def stats(self) -> Dict[str, float]:
+        """Current rate, concurrency window and requests in flight"""
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'concurrency': int(self.concurrency),
+                'in_flight': self.in_flight,
+                'paused_for': max(0.0, self.paused_until - self.clock()),
+            }
+
+class RateLimiter:
+    """
+    Per-host limiters, created on first use with shared settings.
+
+    Use it around every request to a host, either with the blocking
+    acquire/release pair or with the async variants:
+
+        limiter.acquire(url)
+        response = session.get(url)
+        limiter.release(url, response.status_code, latency, response.headers.get('Retry-After'))
+    """
+
+    def __init__(self, **host_settings):
+        """
+        Args:
+            host_settings: Keyword arguments passed to every HostLimiter
+        """
+        self.host_settings = host_settings
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def host(self, url: str) -> HostLimiter:
+        """Returns the limiter of the URL's host"""
+        netloc = urlsplit(url).netloc.lower()
+        with self._lock:
+            if netloc not in self._hosts:
+                self._hosts[netloc] = HostLimiter(**self.host_settings)
+            return self._hosts[netloc]
+
+    def acquire(self, url: str) -> None:
+        """Blocks until a request to the URL's host may start"""
+        limiter = self.host(url)
+        while True:
+            wait = limiter.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str) -> None:
+        """Waits without blocking the event loop until a request to the URL's host may start"""
+        limiter = self.host(url)
+        while True:
+            wait = limiter.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, url: str, status: Optional[int] = None, latency: Optional[float] = None,
+                retry_after: Optional[str] = None) -> None:
+        """
+        Reports the outcome of a request started with acquire.
+
+        Args:
+            url: The requested URL
+            status: HTTP status code, None if no response was received
+            latency: Request duration in seconds
+            retry_after: Raw Retry-After header value
+        """
+        delay = parse_retry_after(retry_after)
+        if delay:
+            logging.warning(f"{urlsplit(url).netloc} asked to retry after {delay:.0f} seconds")
+        self.host(url).release(status, latency, delay)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Current rate and in-flight counts per host"""
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {netloc: limiter.stats() for netloc, limiter in hosts.items()}
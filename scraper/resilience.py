@@ -0,0 +1,259 @@
+import time
+import logging
+import threading
+import requests
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+from tenacity import Retrying, retry_if_exception_type, retry_if_result, stop_after_attempt, wait_random_exponential
+from .rate_limit import RateLimiter
+from .scraper import fetch_response
+from .session import get_session
+
+# Responses worth another attempt; anything else is final
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+class CircuitBreaker:
+    """
+    Circuit breaker for a single host.
+
+    After failure_threshold consecutive failures the circuit opens and requests
+    fail fast. Once reset_timeout has passed, a single trial request is let
+    through (half-open): its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half-open'"""
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            return 'open' if self.clock() - self.opened_at < self.reset_timeout else 'half-open'
+
+    def allow(self) -> bool:
+        """Returns True if a request may be sent now"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+class LatencyTracker:
+    """Sliding window of recent request latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float) -> None:
+        with self._lock:
+            self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Returns the given percentile of the window, None if it is empty"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+class ResilientFetcher:
+    """
+    Session-like wrapper that adds retries, per-host circuit breakers and hedging.
+
+    It can be passed wherever a session is accepted, e.g.
+    scrape_and_save_to_db(urls, properties, db_manager, session=ResilientFetcher()).
+
+    - Connection errors, timeouts and 429/5xx responses are retried with
+      jittered exponential backoff.
+    - Hosts that keep failing are skipped with CircuitOpenError until their
+      circuit breaker lets a trial request through.
+    - With hedge=True, a request still running after the host's p95 latency is
+      duplicated and whichever attempt answers first wins, cutting tail latency
+      at the cost of a few extra requests.
+    """
+
+    # Every attempt is recorded by fetch_response, so callers must not record the outer call
+    records_metrics = True
+
+    def __init__(self, session: Optional[requests.Session] = None, retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = 10, failure_threshold: int = 5,
+                 reset_timeout: float = 30, hedge: bool = False, hedge_percentile: float = 95,
+                 hedge_min_samples: int = 20, hedge_workers: int = 8,
+                 limiter: Optional[RateLimiter] = None, timeout: float = 10,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            session: Session to fetch with, defaults to the shared pooled session
+            retries: Maximum number of attempts per request
+            backoff: Base of the exponential backoff in seconds
+            max_backoff: Longest wait between two attempts in seconds
+            failure_threshold: Consecutive failures that open a host's circuit
+            reset_timeout: Seconds an open circuit waits before a trial request
+            hedge: Send a second attempt when the first exceeds the latency percentile
+            hedge_percentile: Latency percentile that triggers a hedged attempt
+            hedge_min_samples: Latency samples needed per host before hedging starts
+            hedge_workers: Threads available for hedged attempts
+            limiter: Optional per-host RateLimiter applied to every attempt
+            timeout: Timeout of a single attempt in seconds
+            clock: Monotonic time source, replaceable in tests
+            sleep: Sleep function used between retries, replaceable in tests
+        """
+        self.session = session or get_session()
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.limiter = limiter
+        self.timeout = timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix='hedge') if hedge else None
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """Returns the circuit breaker of the URL's host"""
+        netloc = urlsplit(url).netloc.lower()
+        with self._lock:
+            if netloc not in self._breakers:
+                self._breakers[netloc] = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+            return self._breakers[netloc]
+
+    def latencies(self, url: str) -> LatencyTracker:
+        """Returns the latency window of the URL's host"""
+        netloc = urlsplit(url).netloc.lower()
+        with self._lock:
+            if netloc not in self._latencies:
+                self._latencies[netloc] = LatencyTracker()
+            return self._latencies[netloc]
+
+    def get(self, url: str, headers: Optional[dict] = None, timeout: Optional[float] = None) -> requests.Response:
+        """
+        Sends a GET request with retries, circuit breaking and optional hedging.
+
+        Returns:
+            The final response, which may still carry an error status after the last retry
+
+        Raises:
+            CircuitOpenError: If the host's circuit is open
+            RequestException: If the last attempt failed without a response
+        """
+        retrying = Retrying(
+            stop=stop_after_attempt(self.retries),
+            wait=wait_random_exponential(multiplier=self.backoff, max=self.max_backoff),
+            retry=(retry_if_exception_type((requests.ConnectionError, requests.Timeout))
+                   | retry_if_result(lambda response: response.status_code in RETRY_STATUSES)),
+            retry_error_callback=lambda state: state.outcome.result(),
+            before_sleep=lambda state: logging.warning(f"Retrying {url} (attempt {state.attempt_number} failed)"),
+            sleep=self.sleep,
+        )
+        return retrying(self._attempt, url, headers, timeout or self.timeout)
+
+    def _attempt(self, url: str, headers: Optional[dict], timeout: float) -> requests.Response:
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+        try:
+            response = self._hedged_send(url, headers, timeout)
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        if response.status_code >= 500 or response.status_code == 429:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def _send(self, url: str, headers: Optional[dict], timeout: float) -> requests.Response:
+        start = self.clock()
+        response = fetch_response(url, self.session, headers, self.limiter, timeout)
+        self.latencies(url).add(self.clock() - start)
+        return response
+
+    def _hedged_send(self, url: str, headers: Optional[dict], timeout: float) -> requests.Response:
+        tracker = self.latencies(url)
+        if self._executor is None or len(tracker) < self.hedge_min_samples:
+            return self._send(url, headers, timeout)
+
+        delay = tracker.percentile(self.hedge_percentile)
+        primary = self._executor.submit(self._send, url, headers, timeout)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self.hedges_sent += 1
+        hedged = self._executor.submit(self._send, url, headers, timeout)
+        pending = {primary, hedged}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.RequestException as e:
+                    error = e
+                    continue
+                if future is hedged:
+                    with self._lock:
+                        self.hedges_won += 1
+                return response
+        raise error
+
+    def stats(self) -> Dict[str, object]:
+        """Circuit states, p95 latencies and hedging counters"""
+        with self._lock:
+            breakers = dict(self._breakers)
+            latencies = dict(self._latencies)
+        return {
+            'circuits': {netloc: breaker.state for netloc, breaker in breakers.items()},
+            'p95_latency': {netloc: tracker.percentile(95) for netloc, tracker in latencies.items()},
+            'hedges_sent': self.hedges_sent,
+            'hedges_won': self.hedges_won,
+        }
+
+    def close(self) -> None:
+        """Stops the hedging threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,154 @@
+import heapq
+import time
+import logging
+import threading
+import requests
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .db_manager import DatabaseManager
+from .http_cache import ResponseCache
+from .scraper import fetch_product, flush_products
+from .rate_limit import RateLimiter
+
+class RevisitScheduler:
+    """
+    Long-running scheduler that revisits product URLs when they are due.
+
+    URLs live in a priority queue keyed by their next due time. Every visit
+    compares the price and delivery time with the previous visit: a change
+    halves the revisit interval of that URL, no change grows it. Volatile
+    products end up being checked every few minutes and static ones about
+    once a day, so the fetch budget goes where the changes are.
+    """
+
+    def __init__(self, urls: Iterable[str], properties: List[str], db_manager: DatabaseManager,
+                 min_interval: float = 300, max_interval: float = 86400,
+                 initial_interval: float = 3600, growth: float = 1.5,
+                 batch_size: int = 20, session: Optional[requests.Session] = None,
+                 cache: Optional[ResponseCache] = None,
+                 limiter: Optional[RateLimiter] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            urls: Product URLs to keep fresh; all of them are due immediately
+            properties: List of meta properties to extract
+            db_manager: DatabaseManager instance for saving data
+            min_interval: Shortest revisit interval in seconds
+            max_interval: Longest revisit interval in seconds
+            initial_interval: Interval of a URL until its first change is seen
+            growth: Factor by which the interval grows after an unchanged visit
+            batch_size: Maximum number of URLs scraped per run_once call
+            session: Session to fetch with, defaults to the shared pooled session
+            cache: Optional ResponseCache for conditional requests
+            limiter: Optional per-host RateLimiter
+            clock: Time source, replaceable in tests
+        """
+        self.properties = properties
+        self.db_manager = db_manager
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.growth = growth
+        self.batch_size = batch_size
+        self.session = session
+        self.cache = cache
+        self.limiter = limiter
+        self.clock = clock
+        self.intervals: Dict[str, float] = {}
+        self.last_seen: Dict[str, Tuple] = {}
+        self._queue: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+        now = self.clock()
+        for url in urls:
+            self.add_url(url, due=now)
+
+    def add_url(self, url: str, due: Optional[float] = None) -> None:
+        """Schedules a new URL; URLs that are already scheduled are left alone"""
+        with self._lock:
+            if url in self.intervals:
+                return
+            self.intervals[url] = self.initial_interval
+            heapq.heappush(self._queue, (self.clock() if due is None else due, url))
+
+    def next_due(self) -> Optional[float]:
+        """Time at which the next URL becomes due, None if nothing is scheduled"""
+        with self._lock:
+            return self._queue[0][0] if self._queue else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """Removes and returns up to batch_size URLs whose due time has passed"""
+        now = self.clock() if now is None else now
+        due = []
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now and len(due) < self.batch_size:
+                due.append(heapq.heappop(self._queue)[1])
+        return due
+
+    def record(self, url: str, meta_data: Optional[Dict], now: Optional[float] = None) -> float:
+        """
+        Adapts the interval of a visited URL and schedules its next visit.
+
+        Args:
+            url: The visited URL
+            meta_data: Scraped data, or None if the visit failed
+            now: Time of the visit
+
+        Returns:
+            The new revisit interval in seconds
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            interval = self.intervals.get(url, self.initial_interval)
+            if meta_data is not None:
+                observed = (meta_data.get('product:price:amount'), meta_data.get('product-delivery-time'))
+                previous = self.last_seen.get(url)
+                self.last_seen[url] = observed
+                if previous is not None and previous != observed:
+                    interval = max(self.min_interval, interval / 2)
+                else:
+                    interval = min(self.max_interval, interval * self.growth)
+            self.intervals[url] = interval
+            heapq.heappush(self._queue, (now + interval, url))
+        return interval
+
+    def run_once(self) -> List[dict]:
+        """
+        Scrapes the URLs that are due and saves them in one batch.
+
+        Returns:
+            List of dictionaries containing the scraped data
+        """
+        results = []
+        for url in self.pop_due():
+            meta_data = None
+            try:
+                meta_data = fetch_product(url, self.properties, self.session, self.cache, self.limiter)
+            except requests.RequestException as e:
+                logging.error(f"Error fetching {url}: {e}")
+            except Exception as e:
+                logging.error(f"Unexpected error processing {url}: {e}")
+            interval = self.record(url, meta_data)
+            logging.debug(f"Next visit of {url} in {interval:.0f} seconds")
+            if meta_data is not None:
+                results.append(meta_data)
+
+        flush_products(self.db_manager, list(results))
+        return results
+
+    def run_forever(self, stop_event: Optional[threading.Event] = None, max_sleep: float = 60) -> None:
+        """
+        Keeps scraping due URLs until stop_event is set.
+
+        Args:
+            stop_event: Event that ends the loop, e.g. set from a signal handler
+            max_sleep: Longest time to sleep between checks, so new URLs are picked up
+        """
+        stop_event = stop_event or threading.Event()
+        logging.info(f"Revisit scheduler started with {len(self.intervals)} URLs")
+        while not stop_event.is_set():
+            self.run_once()
+            next_due = self.next_due()
+            wait = max_sleep if next_due is None else min(max_sleep, max(0.0, next_due - self.clock()))
+            if wait:
+                stop_event.wait(wait)
+        logging.info("Revisit scheduler stopped")
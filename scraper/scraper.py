@@ -1,80 +1,363 @@
 import requests
-from bs4 import BeautifulSoup
+import time
 import logging
-from typing import List, Optional
+from datetime import timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from .db_manager import DatabaseManager
+from .session import get_session, check_response
+from .http_cache import ResponseCache
+from .extractor import ProductExtractor
+from .rate_limit import RateLimiter
+from .work_queue import WorkQueue
+from .metrics import MISSING_PROPERTIES, PARSE_SECONDS, VALIDATION_SECONDS, host_of, record_response
 
-def scrape_and_save_to_db(urls: List[str], properties: List[str], db_manager: DatabaseManager) -> List[dict]:
+@lru_cache(maxsize=32)
+def get_extractor(properties: Tuple[str, ...]) -> ProductExtractor:
+    """Returns the compiled extractor for a property list, compiling it on first use"""
+    return ProductExtractor(list(properties))
+
+def parse_product_page(html: str, properties: List[str]) -> dict:
     """
-    Iterates over URLs, scrapes the required properties, and saves the data to the database.
+    Extracts the requested meta properties and the delivery time from a product page
+    in a single streaming pass.
     
     Args:
-        urls: List of URLs to scrape
+        html: Raw HTML of the product page
         properties: List of meta properties to extract
-        db_manager: DatabaseManager instance for saving data
         
     Returns:
-        List of dictionaries containing the scraped data
+        Dictionary mapping each property (and 'product-delivery-time') to its value or None
+    """
+    return get_extractor(tuple(properties)).extract(html)
+
+def parse_product_page_soup(html: str, properties: List[str]) -> dict:
+    """
+    Reference implementation of parse_product_page on top of a full BeautifulSoup tree.
+    Kept for the extractor benchmark and equivalence tests.
+    
+    Args:
+        html: Raw HTML of the product page
+        properties: List of meta properties to extract
+        
+    Returns:
+        Dictionary mapping each property (and 'product-delivery-time') to its value or None
+    """
+    # Only the reference implementation needs bs4, so crawlers don't pay for importing it
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    meta_data = {}
+    # Scrape meta properties
+    for prop in properties:
+        meta_tag = soup.find('meta', {'property': prop})
+        meta_data[prop] = meta_tag.get('content', '') if meta_tag else None
+
+    # Scrape delivery time
+    span_tag = soup.find('span', class_='product-delivery-time')
+    meta_data['product-delivery-time'] = span_tag.get_text(strip=True).replace('timer', '') if span_tag else None
+
+    return meta_data
+
+def has_required_properties(meta_data: dict, properties: List[str]) -> bool:
+    """Returns True if every requested property was found with a non-empty value"""
+    return all(meta_data.get(prop) for prop in properties)
+
+def check_properties(url: str, meta_data: dict, properties: List[str]) -> bool:
+    """
+    Validates a scraped page, logging and counting the pages that are skipped.
+    
+    Returns:
+        True if every requested property was found
+    """
+    with VALIDATION_SECONDS.time():
+        complete = has_required_properties(meta_data, properties)
+    if not complete:
+        MISSING_PROPERTIES.inc(host_of(url))
+        logging.warning(f"Missing required properties for URL: {url}")
+    return complete
+
+def fetch_response(url: str, session: requests.Session, headers: Optional[dict] = None,
+                   limiter: Optional[RateLimiter] = None, timeout: float = 10) -> requests.Response:
+    """
+    Sends a GET request, waiting for the host's rate limiter first if one is given.
+    The outcome (status, latency, Retry-After) is reported back to the limiter
+    and recorded in the fetch metrics.
     
     Raises:
         RequestException: If there's an error fetching the URL
-        Exception: For any other unexpected errors
     """
-    results = []
+    # Sessions that record their own attempts (ResilientFetcher) are not recorded twice
+    record = getattr(session, 'records_metrics', False) is not True
+    if limiter:
+        limiter.acquire(url)
+    start = time.monotonic()
+    status = retry_after = ttfb = None
+    try:
+        response = session.get(url, headers=headers or {}, timeout=timeout)
+        status = response.status_code
+        retry_after = response.headers.get('Retry-After')
+        # requests measures up to the parsed headers, so this includes connecting
+        if isinstance(getattr(response, 'elapsed', None), timedelta):
+            ttfb = response.elapsed.total_seconds()
+        return response
+    finally:
+        total = time.monotonic() - start
+        if limiter:
+            limiter.release(url, status, total, retry_after)
+        if record:
+            record_response(url, status, ttfb, total)
+
+def fetch_product(url: str, properties: List[str], session: Optional[requests.Session] = None,
+                  cache: Optional[ResponseCache] = None,
+                  limiter: Optional[RateLimiter] = None) -> Optional[dict]:
+    """
+    Fetches a single product page and extracts the required properties.
+    With a cache, the request is conditional and a 304 reuses the cached
+    extraction, so neither the body is downloaded nor the page re-parsed.
     
-    for url in urls:
-        try:
-            # Set up headers to mimic a browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            meta_data = {}
-            # Scrape meta properties
-            for prop in properties:
-                meta_tag = soup.find('meta', {'property': prop})
-                meta_data[prop] = meta_tag.get('content', '') if meta_tag else None
-
-            # Scrape delivery time
-            span_tag = soup.find('span', class_='product-delivery-time')
-            meta_data['product-delivery-time'] = span_tag.get_text(strip=True).replace('timer', '') if span_tag else None
-
-            # Validate required fields
-            if not all(meta_data.get(prop) for prop in properties):
-                logging.warning(f"Missing required properties for URL: {url}")
+    Args:
+        url: URL to scrape
+        properties: List of meta properties to extract
+        session: Session to fetch with, defaults to the shared pooled session
+        cache: Optional ResponseCache for conditional requests
+        limiter: Optional per-host RateLimiter
+        
+    Returns:
+        Dictionary with the scraped data, or None if the page was invalid or incomplete
+    
+    Raises:
+        RequestException: If there's an error fetching the URL
+    """
+    session = session or get_session()
+    entry = cache.get(url) if cache else None
+
+    response = fetch_response(url, session, ResponseCache.conditional_headers(entry), limiter)
+    response.raise_for_status()
+
+    if entry is not None and response.status_code == 304:
+        logging.info(f"Not modified, using cached data for URL: {url}")
+        if entry.has_properties(properties):
+            meta_data = entry.meta_data
+        else:
+            with PARSE_SECONDS.time():
+                meta_data = parse_product_page(entry.body, properties)
+    else:
+        # Validate the URL from the response we already have
+        problem = check_response(url, response.status_code,
+                                 response.headers.get('Content-Type'), response.url)
+        if problem:
+            logging.warning(f"Skipping invalid URL {url}: {problem}")
+            return None
+
+        html = response.text
+        with PARSE_SECONDS.time():
+            meta_data = parse_product_page(html, properties)
+        if cache:
+            cache.store(url, response.headers, html, meta_data)
+
+    # Validate required fields
+    if not check_properties(url, meta_data, properties):
+        return None
+
+    return meta_data
+
+def iter_scrape(urls: Iterable[str], properties: List[str], db_manager: Optional[DatabaseManager] = None,
+                session: Optional[requests.Session] = None,
+                cache: Optional[ResponseCache] = None,
+                batch_size: int = 100,
+                limiter: Optional[RateLimiter] = None) -> Iterator[dict]:
+    """
+    Lazily scrapes URLs and yields each product as soon as it is scraped.
+    URLs are consumed one at a time and nothing is accumulated, so a crawl of
+    any size runs in constant memory when fed from e.g. sources.iter_urls.
+    With a db_manager, products are also saved in batches of batch_size; the
+    last batch is written when the generator is exhausted or closed.
+    
+    Args:
+        urls: Iterable of URLs to scrape
+        properties: List of meta properties to extract
+        db_manager: Optional DatabaseManager instance for saving data
+        session: Session to fetch with, defaults to the shared pooled session
+        cache: Optional ResponseCache to revalidate unchanged pages with conditional GETs
+        batch_size: Number of scraped products written to the database per transaction
+        limiter: Optional per-host RateLimiter for polite, adaptive request pacing
+        
+    Yields:
+        Dictionaries containing the scraped data
+    """
+    buffer = []
+    session = session or get_session()
+    
+    try:
+        for url in urls:
+            try:
+                meta_data = fetch_product(url, properties, session, cache, limiter)
+                if meta_data is None:
+                    continue
+
+                logging.info(f"Data successfully scraped for URL: {url}")
+                if db_manager is not None:
+                    buffer.append(meta_data)
+                    if len(buffer) >= batch_size:
+                        flush_products(db_manager, buffer)
+                
+            except requests.RequestException as e:
+                logging.error(f"Error fetching {url}: {e}")
+                continue
+            except Exception as e:
+                logging.error(f"Unexpected error processing {url}: {e}")
                 continue
 
-            # Save to database
-            db_manager.insert_product(meta_data)
-            results.append(meta_data)
-            
-            logging.info(f"Data successfully scraped and saved for URL: {url}")
-            
-        except requests.RequestException as e:
-            logging.error(f"Error fetching {url}: {e}")
-            continue
-        except Exception as e:
-            logging.error(f"Unexpected error processing {url}: {e}")
-            continue
+            yield meta_data
+    finally:
+        if db_manager is not None:
+            flush_products(db_manager, buffer)
 
-    return results
+def scrape_and_save_to_db(urls: Iterable[str], properties: List[str], db_manager: DatabaseManager,
+                          session: Optional[requests.Session] = None,
+                          cache: Optional[ResponseCache] = None,
+                          batch_size: int = 100,
+                          limiter: Optional[RateLimiter] = None) -> List[dict]:
+    """
+    Iterates over URLs, scrapes the required properties, and saves the data to the database.
+    Every URL costs a single pooled GET; the URL is validated from that same response.
+    Scraped products are buffered and written in batches of batch_size.
+    Use iter_scrape to process products while the crawl is running.
+    
+    Args:
+        urls: List of URLs to scrape
+        properties: List of meta properties to extract
+        db_manager: DatabaseManager instance for saving data
+        session: Session to fetch with, defaults to the shared pooled session
+        cache: Optional ResponseCache to revalidate unchanged pages with conditional GETs
+        batch_size: Number of scraped products written to the database per transaction
+        limiter: Optional per-host RateLimiter for polite, adaptive request pacing
+        
+    Returns:
+        List of dictionaries containing the scraped data
+    """
+    return list(iter_scrape(urls, properties, db_manager, session, cache, batch_size, limiter))
+
+def crawl_frontier(properties: List[str], db_manager: DatabaseManager,
+                   session: Optional[requests.Session] = None,
+                   cache: Optional[ResponseCache] = None,
+                   batch_size: int = 100,
+                   max_attempts: int = 3,
+                   limiter: Optional[RateLimiter] = None,
+                   queue: Optional[WorkQueue] = None) -> Dict[str, int]:
+    """
+    Scrapes the pending URLs of the database's crawl frontier until none are left.
+
+    URLs are claimed in batches of batch_size. After each batch the products are
+    saved and then the batch outcome is checkpointed, so after a crash or restart
+    at most one batch is fetched again and finished URLs are never redone.
+
+    With a queue, URLs are leased instead, so several processes can run this on
+    the same frontier: each gets its own batches, and the batch of a worker that
+    dies is picked up by the others once its lease expires. Without one, the
+    crawl assumes it is the only one and takes back every URL left in flight.
+
+    Args:
+        properties: List of meta properties to extract
+        db_manager: DatabaseManager holding the frontier and the products
+        session: Session to fetch with, defaults to the shared pooled session
+        cache: Optional ResponseCache to revalidate unchanged pages with conditional GETs
+        batch_size: Number of URLs claimed, saved and checkpointed together
+        max_attempts: Attempts after which a failing URL is marked failed
+        limiter: Optional per-host RateLimiter for polite, adaptive request pacing
+        queue: Optional WorkQueue to share the frontier with other workers; its
+            max_attempts applies instead of the argument
+
+    Returns:
+        Dictionary with the number of 'done' and 'failed' attempts of this run
+    """
+    session = session or get_session()
+    stats = {'done': 0, 'failed': 0}
+
+    if queue is None:
+        recovered = db_manager.recover_frontier()
+        if recovered:
+            logging.info(f"Resuming crawl, {recovered} interrupted URLs are pending again")
+
+    while True:
+        urls = queue.claim(batch_size) if queue else db_manager.claim_frontier(batch_size)
+        if not urls:
+            break
+
+        buffer, done, failed = [], [], []
+        try:
+            for url in urls:
+                try:
+                    meta_data = fetch_product(url, properties, session, cache, limiter)
+                except requests.RequestException as e:
+                    logging.error(f"Error fetching {url}: {e}")
+                    failed.append((url, str(e)))
+                    continue
+                except Exception as e:
+                    logging.error(f"Unexpected error processing {url}: {e}")
+                    failed.append((url, str(e)))
+                    continue
+                finally:
+                    if queue:
+                        queue.keep_alive(urls)
+                if meta_data is None:
+                    failed.append((url, 'invalid or incomplete page'))
+                    continue
+                logging.info(f"Data successfully scraped for URL: {url}")
+                buffer.append(meta_data)
+                done.append(url)
+        except BaseException:
+            # Stopped mid-batch: the other workers can take the batch over right away
+            if queue:
+                queue.release(urls)
+            raise
+
+        if buffer:
+            try:
+                db_manager.bulk_upsert_products(buffer, batch_size=len(buffer))
+            except Exception as e:
+                # Not saved, so not done: the URLs are retried like failed fetches
+                logging.error(f"Error saving {len(buffer)} scraped products: {e}")
+                failed += [(url, f"Error saving product: {e}") for url in done]
+                done = []
+        if queue:
+            queue.ack(done, failed)
+        else:
+            db_manager.checkpoint_frontier(done, failed, max_attempts)
+        stats['done'] += len(done)
+        stats['failed'] += len(failed)
+
+    logging.info(f"Frontier crawl finished: {stats['done']} done, {stats['failed']} failed attempts")
+    return stats
+
+def flush_products(db_manager: DatabaseManager, buffer: List[dict]) -> None:
+    """Saves the buffered products in one bulk upsert and empties the buffer"""
+    if not buffer:
+        return
+    try:
+        db_manager.bulk_upsert_products(buffer, batch_size=len(buffer))
+    except Exception as e:
+        logging.error(f"Error saving {len(buffer)} scraped products: {e}")
+    finally:
+        buffer.clear()
 
-def validate_url(url: str) -> bool:
+def validate_url(url: str, session: Optional[requests.Session] = None) -> bool:
     """
     Validates if the given URL is properly formatted and accessible.
+    scrape_and_save_to_db already validates every page it fetches, so this is
+    only needed to check a URL without scraping it.
     
     Args:
         url: URL to validate
+        session: Session to use, defaults to the shared pooled session
         
     Returns:
         bool: True if URL is valid, False otherwise
     """
     try:
-        response = requests.head(url, timeout=5)
+        response = (session or get_session()).head(url, timeout=5)
         return response.status_code == 200
     except:
         return False
\ No newline at end of file
@@ -0,0 +1,84 @@
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional
+
+# Set up headers to mimic a browser request
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+_shared_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def create_session(pool_connections: int = 10, pool_maxsize: int = 10,
+                   host_pool_sizes: Optional[Dict[str, int]] = None) -> requests.Session:
+    """
+    Creates a requests session with keep-alive connection pooling.
+
+    Args:
+        pool_connections: Number of per-host connection pools to keep cached
+        pool_maxsize: Maximum number of kept-alive connections per host
+        host_pool_sizes: Optional mapping of host name to a dedicated pool size,
+                         e.g. {'azerty.nl': 32} for the host we crawl the most
+
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    for host, size in (host_pool_sizes or {}).items():
+        host_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+        session.mount(f'http://{host}/', host_adapter)
+        session.mount(f'https://{host}/', host_adapter)
+
+    return session
+
+def get_session() -> requests.Session:
+    """Returns the process-wide pooled session, creating it on first use"""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
+
+def configure_session(pool_connections: int = 10, pool_maxsize: int = 10,
+                      host_pool_sizes: Optional[Dict[str, int]] = None) -> requests.Session:
+    """
+    Replaces the process-wide session with one using the given pool sizes.
+    Call this once at startup, before any scraping starts.
+    """
+    global _shared_session
+    with _session_lock:
+        if _shared_session is not None:
+            _shared_session.close()
+        _shared_session = create_session(pool_connections, pool_maxsize, host_pool_sizes)
+        return _shared_session
+
+def check_response(url: str, status_code: int, content_type: Optional[str],
+                   final_url: Optional[str] = None) -> Optional[str]:
+    """
+    Validates a fetched product page using the data the fetch already returned.
+
+    Args:
+        url: The requested URL
+        status_code: HTTP status code of the final response
+        content_type: Content-Type header of the final response
+        final_url: URL after following redirects
+
+    Returns:
+        None if the response is a usable HTML page, otherwise the reason it was rejected
+    """
+    if final_url and final_url != url:
+        logging.info(f"URL {url} redirected to {final_url}")
+    if status_code != 200:
+        return f"unexpected status code {status_code}"
+    if not isinstance(content_type, str) or 'html' not in content_type.lower():
+        return f"unexpected content type {content_type!r}"
+    return None
@@ -0,0 +1,45 @@
+import sys
+import logging
+from typing import IO, Iterator, Union
+from .db_manager import DatabaseManager
+
+def iter_url_lines(lines: Iterator[str]) -> Iterator[str]:
+    """
+    Yields the URLs of a line-based input, one per line.
+    Blank lines and lines starting with '#' are skipped.
+    """
+    for line in lines:
+        url = line.strip()
+        if url and not url.startswith('#'):
+            yield url
+
+def iter_urls_from_file(path: str) -> Iterator[str]:
+    """
+    Lazily reads URLs from a text file, or from stdin if path is '-'.
+
+    Args:
+        path: Path of a file with one URL per line, or '-'
+    """
+    if path == '-':
+        yield from iter_url_lines(sys.stdin)
+        return
+    try:
+        with open(path, encoding='utf-8') as f:
+            yield from iter_url_lines(f)
+    except OSError as e:
+        logging.error(f"Error reading URLs from {path}: {e}")
+        raise
+
+def iter_urls(source: Union[str, IO, DatabaseManager]) -> Iterator[str]:
+    """
+    Lazily yields URLs from a file path, '-' for stdin, an open file or the
+    products of a database, so crawls of any size run in constant memory.
+
+    Args:
+        source: Where to read the URLs from
+    """
+    if isinstance(source, DatabaseManager):
+        return source.iter_product_urls()
+    if isinstance(source, str):
+        return iter_urls_from_file(source)
+    return iter_url_lines(source)
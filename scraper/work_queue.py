@@ -0,0 +1,108 @@
+"""
+Shared crawl work queue on top of the frontier table.
+
+Any number of crawler processes can split one crawl by each using a WorkQueue
+on the same database, on one host or on several hosts sharing the database
+file (over a filesystem with working SQLite locking). Workers claim batches of
+URLs under a time-limited lease:
+
+- a claim is a single UPDATE ... RETURNING, so two workers never get the same URL
+- a worker that dies or stalls loses its URLs when the lease expires, and the
+  next claim by any worker picks them up again
+- a batch outcome is acknowledged in one transaction, and only for URLs the
+  worker still holds, so a worker whose lease ran out cannot overwrite the
+  result of the worker that took over
+
+Leases are compared against each worker's wall clock, so hosts should keep
+their clocks synchronised well within lease_seconds.
+"""
+import os
+import time
+import uuid
+import socket
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .db_manager import DatabaseManager
+
+def default_owner() -> str:
+    """Worker id unique across hosts, processes and queues: host-pid-random"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+class WorkQueue:
+    """
+    Lease-based view of the crawl frontier for one worker.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, owner: Optional[str] = None,
+                 lease_seconds: float = 300.0, max_attempts: int = 3,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            db_manager: DatabaseManager holding the frontier
+            owner: Worker id, defaults to default_owner()
+            lease_seconds: How long claimed URLs stay reserved without being renewed
+            max_attempts: Attempts after which a failing or abandoned URL is marked failed
+            clock: Wall clock returning Unix timestamps, replaceable in tests
+        """
+        if lease_seconds <= 0:
+            raise ValueError("lease_seconds must be positive")
+        self.db_manager = db_manager
+        self.owner = owner or default_owner()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._renewed = 0.0
+
+    def claim(self, limit: int = 100) -> List[str]:
+        """
+        Leases up to limit URLs to this worker, reclaiming expired leases.
+
+        Returns:
+            The claimed URLs, empty when the frontier has nothing left to hand out
+        """
+        now = self.clock()
+        urls = self.db_manager.lease_frontier(self.owner, limit, self.lease_seconds,
+                                              self.max_attempts, now=now)
+        self._renewed = now
+        return urls
+
+    def ack(self, done: Iterable[str] = (), failed: Iterable[Tuple[str, str]] = ()) -> List[str]:
+        """
+        Records the outcome of a batch in one transaction.
+
+        Args:
+            done: URLs that were scraped and saved
+            failed: (url, error) pairs, retried until max_attempts is reached
+
+        Returns:
+            URLs acknowledged; the others had lost their lease to another worker
+        """
+        done, failed = list(done), list(failed)
+        acked = self.db_manager.ack_frontier(self.owner, done, failed, self.max_attempts)
+        lost = len(done) + len(failed) - len(acked)
+        if lost:
+            logging.warning(f"Worker {self.owner} lost the lease on {lost} URLs before acknowledging them")
+        return acked
+
+    def renew(self, urls: Iterable[str]) -> int:
+        """Extends the lease on urls; returns how many are still held"""
+        now = self.clock()
+        renewed = self.db_manager.renew_frontier_leases(self.owner, urls, self.lease_seconds, now=now)
+        self._renewed = now
+        return renewed
+
+    def keep_alive(self, urls: Iterable[str]) -> None:
+        """
+        Renews the lease on urls once half of it has passed. Cheap enough to
+        call after every fetch of a batch.
+        """
+        if self.clock() - self._renewed >= self.lease_seconds / 2:
+            self.renew(urls)
+
+    def release(self, urls: Iterable[str]) -> int:
+        """Hands unfinished URLs back to the other workers right away"""
+        return self.db_manager.release_frontier(self.owner, urls)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of frontier URLs in each state, over all workers"""
+        return self.db_manager.frontier_counts()
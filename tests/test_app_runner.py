@@ -1,13 +1,18 @@
 import pytest
 import pandas as pd
-from app.app_runner import fetch_data
+from unittest.mock import patch
+import gzip
+import json
+from app import app_runner
+from app.app_runner import (fetch_data, render_table, load_page, load_changes, initial_page_state, run_application,
+                            register_metrics_endpoint, create_app, get_table_snapshot, TABLE_SNAPSHOT_PATH)
 from scraper.db_manager import DatabaseManager
 import dash
 
 @pytest.fixture
-def sample_db_manager():
+def sample_db_manager(tmp_path):
     """Fixture to provide a test database manager with sample data"""
-    db = DatabaseManager('test.db')
+    db = DatabaseManager(str(tmp_path / 'test.db'))
     sample_products = [
         {
             'og:title': 'Test Product 1',
@@ -28,6 +33,7 @@ def sample_db_manager():
     
     yield db
     db.clear_table()
+    db.close()
 
 def test_fetch_data_structure(sample_db_manager):
     """Test if fetch_data returns correct DataFrame structure"""
@@ -43,5 +49,136 @@ def test_fetch_data_content(sample_db_manager):
     df = fetch_data(sample_db_manager)
     
     assert len(df) == 2  # Should have two products
-    assert df['Price'].str.startswith('€').all()  # All prices should start with €
-    assert df['URL'].str.startswith('http').all()  # All URLs should start with http
\ No newline at end of file
+    assert pd.api.types.is_float_dtype(df['Price'])  # Prices stay numeric until rendered
+    assert sorted(df['Price']) == [99.99, 199.99]
+    assert df['URL'].str.startswith('http').all()  # All URLs should start with http
+
+def test_load_page_navigation(sample_db_manager):
+    """Test next, previous and reset navigation of the paginated table"""
+    rows, state = load_page(sample_db_manager, initial_page_state(), None, None, 'Price (low to high)', 1)
+    assert [row['Product name'] for row in rows] == ['Test Product 1']
+    assert state['next'] is not None
+
+    rows, state = load_page(sample_db_manager, state, 'next', None, 'Price (low to high)', 1)
+    assert [row['Product name'] for row in rows] == ['Test Product 2']
+    assert state['next'] is None
+    assert len(state['cursors']) == 2
+
+    rows, state = load_page(sample_db_manager, state, 'prev', None, 'Price (low to high)', 1)
+    assert [row['Product name'] for row in rows] == ['Test Product 1']
+
+    rows, state = load_page(sample_db_manager, state, 'reset', 'Product 2', 'Price (low to high)', 1)
+    assert [row['Product name'] for row in rows] == ['Test Product 2']
+    assert state['cursors'] == [None]
+
+@pytest.mark.parametrize('mode', [{}, {'paginated': True}, {'incremental': True}])
+def test_run_application_builds_layout(sample_db_manager, mode):
+    """Test that the app can be built in both table modes without starting the server"""
+    with patch.object(dash.Dash, 'run') as mock_run:
+        run_application(sample_db_manager, **mode)
+    mock_run.assert_called_once()
+
+def test_load_changes_sends_patch(sample_db_manager):
+    """Test that only the first load sends the full catalog"""
+    products, sync_state = load_changes(sample_db_manager, None)
+    assert set(products) == {'http://test.com/1', 'http://test.com/2'}
+
+    update, sync_state = load_changes(sample_db_manager, sync_state)
+    assert isinstance(update, dash.Patch)
+    assert sync_state['watermark'] is not None
+
+def test_run_application_rejects_conflicting_modes(sample_db_manager):
+    """Test that paginated and incremental modes are mutually exclusive"""
+    with pytest.raises(ValueError):
+        run_application(sample_db_manager, paginated=True, incremental=True)
+
+def test_fetch_data_is_shared_until_data_changes(sample_db_manager):
+    """Test that fetch_data reuses one DataFrame until the products change"""
+    first = fetch_data(sample_db_manager)
+    assert fetch_data(sample_db_manager) is first
+
+    # Crawl progress commits but leaves the products alone
+    sample_db_manager.add_to_frontier(['http://test.com/3'])
+    sample_db_manager.checkpoint_frontier(done=sample_db_manager.claim_frontier(1))
+    assert fetch_data(sample_db_manager) is first
+
+    sample_db_manager.insert_product({
+        'og:title': 'Test Product 3',
+        'og:url': 'http://test.com/3',
+        'product:price:amount': '5.00'
+    })
+    refreshed = fetch_data(sample_db_manager)
+    assert refreshed is not first
+    assert len(refreshed) == 3
+
+def test_render_table_formats_prices(sample_db_manager):
+    """Test that numeric prices are formatted when the table is rendered"""
+    df = fetch_data(sample_db_manager)
+    table = render_table(list(df.columns), df.to_dict('records'))
+    cells = [cell.children for row in table.children[1].children for cell in row.children]
+    assert '€ 99.99' in cells and '€ 199.99' in cells
+
+def test_metrics_endpoint(sample_db_manager):
+    """Test that /metrics serves the Prometheus text format"""
+    app = dash.Dash(__name__)
+    app.layout = dash.html.Div()
+    register_metrics_endpoint(app)
+
+    response = app.server.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert '# TYPE db_upsert_seconds histogram' in response.get_data(as_text=True)
+
+def test_workers_do_not_serve_metrics(sample_db_manager, tmp_path):
+    """Test that multi-worker serving leaves out the per-process /metrics"""
+    def routes(app):
+        return {rule.rule for rule in app.server.url_map.iter_rules()}
+
+    assert '/metrics' in routes(create_app(sample_db_manager))
+
+    with patch.object(app_runner, 'serve_production') as serve_production:
+        run_application(sample_db_manager, workers=4, snapshot_dir=str(tmp_path / 'snapshots'))
+    app_factory = serve_production.call_args.args[0]
+    assert '/metrics' not in routes(app_factory())
+
+def test_table_snapshot_is_served_with_etag(sample_db_manager):
+    """Test that the pre-rendered table is sent gzipped once and then answered with 304s"""
+    client = create_app(sample_db_manager).server.test_client()
+
+    response = client.get(TABLE_SNAPSHOT_PATH, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    etag = response.headers['ETag']
+    payload = json.loads(gzip.decompress(response.get_data()))
+    assert payload['error'] is None and '€ 99.99' in json.dumps(payload['table'], ensure_ascii=False)
+
+    response = client.get(TABLE_SNAPSHOT_PATH, headers={'If-None-Match': etag})
+    assert response.status_code == 304 and not response.get_data()
+
+    sample_db_manager.insert_product({
+        'og:title': 'Test Product 3',
+        'og:url': 'http://test.com/3',
+        'product:price:amount': '5.00'
+    })
+    response = client.get(TABLE_SNAPSHOT_PATH, headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+    # Without gzip support the body is decompressed
+    assert '€ 5.00' in response.get_data(as_text=True)
+
+def test_table_snapshot_is_rendered_once_per_change(sample_db_manager, tmp_path):
+    """Test that unrelated commits and other workers reuse the rendered snapshot"""
+    snapshot_dir = str(tmp_path / 'snapshots')
+    with patch.object(app_runner, 'render_snapshot', wraps=app_runner.render_snapshot) as render:
+        first = get_table_snapshot(sample_db_manager, snapshot_dir)
+        # Crawl progress commits but leaves the products alone
+        sample_db_manager.add_to_frontier(['http://test.com/4'])
+        assert get_table_snapshot(sample_db_manager, snapshot_dir) is first
+
+        # A second worker process finds the snapshot on disk
+        worker = DatabaseManager(sample_db_manager.db_name)
+        try:
+            assert get_table_snapshot(worker, snapshot_dir).etag == first.etag
+        finally:
+            worker.close()
+    assert render.call_count == 1
+    sample_db_manager.restart_frontier()
@@ -0,0 +1,117 @@
+import pytest
+import asyncio
+from unittest.mock import patch
+from aiohttp import web
+from scraper.db_manager import DatabaseManager
+from scraper.async_scraper import scrape_and_save_to_db_async
+
+PRODUCT_PAGE = '''
+<html><head>
+<meta property="og:title" content="Product {id}">
+<meta property="og:url" content="{url}">
+<meta property="product:price:amount" content="{id}9.99">
+</head><body><span class="product-delivery-time"><i>timer</i> 1-2 days</span></body></html>
+'''
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Fixture to provide a test database manager"""
+    db = DatabaseManager(str(tmp_path / 'test.db'))
+    yield db
+    db.close()
+
+async def _run_with_server(coro_factory):
+    """Starts a local product server, runs the coroutine against it and reports peak concurrency"""
+    state = {'in_flight': 0, 'peak': 0}
+
+    async def product(request):
+        state['in_flight'] += 1
+        state['peak'] = max(state['peak'], state['in_flight'])
+        await asyncio.sleep(0.02)
+        state['in_flight'] -= 1
+        page_id = request.match_info['id']
+        return web.Response(text=PRODUCT_PAGE.format(id=page_id, url=str(request.url)),
+                            content_type='text/html')
+
+    async def missing(request):
+        return web.Response(text='<html></html>', content_type='text/html')
+
+    async def error(request):
+        return web.Response(status=500)
+
+    app = web.Application()
+    app.router.add_get('/product/{id}', product)
+    app.router.add_get('/missing', missing)
+    app.router.add_get('/error', error)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        return await coro_factory(f'http://127.0.0.1:{port}'), state
+    finally:
+        await runner.cleanup()
+
+def test_async_scrape_saves_products_in_order(db_manager):
+    """Test that results keep the input order and are saved to the database"""
+    properties = ['og:title', 'og:url', 'product:price:amount']
+
+    async def scrape(base):
+        urls = [f'{base}/product/{i}' for i in range(5)]
+        return await scrape_and_save_to_db_async(urls, properties, db_manager, max_concurrency=5)
+
+    results, _ = asyncio.run(_run_with_server(scrape))
+
+    assert [r['og:title'] for r in results] == [f'Product {i}' for i in range(5)]
+    assert results[0]['product-delivery-time'] == '1-2 days'
+    assert len(db_manager.get_all_products()) == 5
+
+def test_async_scrape_batches_writes(db_manager):
+    """Test that products are saved in bulk upserts of batch_size rows"""
+    properties = ['og:title', 'og:url', 'product:price:amount']
+
+    async def scrape(base):
+        urls = [f'{base}/product/{i}' for i in range(7)]
+        return await scrape_and_save_to_db_async(urls, properties, db_manager, max_concurrency=4,
+                                                 batch_size=3)
+
+    with patch.object(db_manager, 'insert_product') as insert, \
+            patch.object(db_manager, 'bulk_upsert_products', wraps=db_manager.bulk_upsert_products) as bulk:
+        asyncio.run(_run_with_server(scrape))
+
+    insert.assert_not_called()
+    assert [call.kwargs['batch_size'] for call in bulk.call_args_list] == [3, 3, 1]
+    assert len(db_manager.get_all_products()) == 7
+
+def test_async_scrape_respects_per_host_limit(db_manager):
+    """Test that no more than per_host_limit requests hit the host at once"""
+    properties = ['og:title', 'og:url', 'product:price:amount']
+
+    async def scrape(base):
+        urls = [f'{base}/product/{i}' for i in range(12)]
+        return await scrape_and_save_to_db_async(urls, properties, db_manager,
+                                                 max_concurrency=10, per_host_limit=3)
+
+    results, state = asyncio.run(_run_with_server(scrape))
+
+    assert len(results) == 12
+    assert state['peak'] <= 3
+
+def test_async_scrape_skips_failures(db_manager):
+    """Test that HTTP errors and incomplete pages are skipped without raising"""
+    properties = ['og:title', 'og:url', 'product:price:amount']
+
+    async def scrape(base):
+        urls = [f'{base}/error', f'{base}/missing', f'{base}/product/1']
+        return await scrape_and_save_to_db_async(urls, properties, db_manager)
+
+    results, _ = asyncio.run(_run_with_server(scrape))
+
+    assert len(results) == 1
+    assert results[0]['og:title'] == 'Product 1'
+
+def test_async_scrape_rejects_invalid_limits(db_manager):
+    """Test that non-positive limits are rejected"""
+    with pytest.raises(ValueError):
+        asyncio.run(scrape_and_save_to_db_async([], [], db_manager, max_concurrency=0))
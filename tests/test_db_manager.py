@@ -1,17 +1,17 @@
 import pytest
 import os
 import sqlite3
+from contextlib import closing
 from scraper.db_manager import DatabaseManager
 from typing import Dict
+from unittest.mock import patch
 
 @pytest.fixture
-def db_manager():
+def db_manager(tmp_path):
     """Fixture to provide a test database manager"""
-    test_db = 'test.db'
-    db = DatabaseManager(test_db)
+    db = DatabaseManager(str(tmp_path / 'test.db'))
     yield db
-    if os.path.exists(test_db):
-        os.remove(test_db)
+    db.close()
 
 @pytest.fixture
 def sample_product() -> Dict:
@@ -28,7 +28,7 @@ def test_database_initialization(db_manager):
     assert os.path.exists(db_manager.db_name)
     
     # Check if table exists and has correct structure
-    with sqlite3.connect(db_manager.db_name) as conn:
+    with closing(sqlite3.connect(db_manager.db_name)) as conn, conn:
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='products'")
         assert cursor.fetchone() is not None
@@ -105,4 +105,306 @@ def test_invalid_product_data(db_manager):
 def test_get_all_products_empty(db_manager):
     """Test getting products from empty database"""
     products = db_manager.get_all_products()
-    assert len(products) == 0  # Should return empty list
\ No newline at end of file
+    assert len(products) == 0  # Should return empty list
+
+def test_bulk_upsert_products(db_manager, sample_product):
+    """Test bulk upserts report inserted, updated and rejected rows"""
+    db_manager.insert_product(sample_product)
+    updated_product = sample_product.copy()
+    updated_product['product:price:amount'] = '149.99'
+    products = [
+        updated_product,
+        {
+            'og:title': 'Product 2',
+            'og:url': 'http://test.com/2',
+            'product:price:amount': '199.99',
+            'product-delivery-time': '2-3 days'
+        },
+        {
+            'og:title': 'Broken',
+            'og:url': 'http://test.com/3',
+            'product:price:amount': 'invalid'
+        },
+        {'og:title': 'Incomplete'}
+    ]
+
+    stats = db_manager.bulk_upsert_products(products, batch_size=2)
+
+    assert stats == {'inserted': 1, 'updated': 1, 'unchanged': 0, 'rejected': 2}
+    stored = {p['URL']: p for p in db_manager.get_all_products()}
+    assert len(stored) == 2
+    assert stored['http://test.com']['Price'] == '€ 149.99'
+
+def test_bulk_upsert_duplicates_in_batch(db_manager, sample_product):
+    """Test that a URL repeated within one batch counts as one insert, then by content"""
+    changed = dict(sample_product, **{'product:price:amount': '1.00'})
+    stats = db_manager.bulk_upsert_products([sample_product, sample_product, changed])
+
+    assert stats == {'inserted': 1, 'updated': 1, 'unchanged': 1, 'rejected': 0}
+    assert len(db_manager.get_all_products()) == 1
+
+def test_wal_mode_and_pragmas(db_manager):
+    """Test that connections are configured with WAL and the deployment pragmas"""
+    with closing(sqlite3.connect(db_manager.db_name)) as conn, conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    custom = DatabaseManager(db_manager.db_name, pragmas={'cache_size': -1024})
+    with custom._read() as conn:
+        assert conn.execute('PRAGMA cache_size').fetchone()[0] == -1024
+    custom.close()
+
+def test_connections_are_reused(db_manager, sample_product):
+    """Test that the manager keeps its connections open between calls"""
+    db_manager.insert_product(sample_product)
+    writer = db_manager._writer
+    db_manager.get_all_products()
+    db_manager.get_all_products()
+
+    assert db_manager._writer is writer
+    assert len(db_manager._all_readers) == 1
+
+def test_read_while_writing(db_manager, sample_product):
+    """Test that readers see committed data while a write transaction is open"""
+    db_manager.insert_product(sample_product)
+
+    with db_manager._write() as conn:
+        conn.execute("UPDATE products SET price = 1 WHERE url = 'http://test.com'")
+        # Product writes move the revision along, as _upsert_rows does
+        db_manager._bump_revision(conn)
+        products = db_manager.get_all_products()
+
+    assert products[0]['Price'] == '€ 99.99'
+    assert db_manager.get_all_products()[0]['Price'] == '€ 1.00'
+
+def test_readers_are_read_only(db_manager):
+    """Test that pooled reader connections cannot write"""
+    with db_manager._read() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute('DELETE FROM products')
+
+def test_price_observations_are_appended(db_manager, sample_product):
+    """Test that every upsert appends to the price history"""
+    db_manager.insert_product(sample_product)
+    updated_product = sample_product.copy()
+    updated_product['product:price:amount'] = '149.99'
+    db_manager.bulk_upsert_products([updated_product])
+
+    observations = db_manager.get_price_observations(sample_product['og:url'])
+    assert [o['price'] for o in observations] == [99.99, 149.99]
+    assert len(db_manager.get_all_products()) == 1
+
+def test_price_rollups(db_manager, sample_product):
+    """Test that hourly and daily rollups keep min, max and last price"""
+    db_manager.insert_product(sample_product)
+    with db_manager._write() as conn:
+        product_id = conn.execute('SELECT id FROM products').fetchone()[0]
+        conn.execute('DELETE FROM price_observations')
+        conn.execute('DELETE FROM price_rollups')
+        conn.executemany(
+            'INSERT INTO price_observations (product_id, price, observed_at) VALUES (?, ?, ?)',
+            [(product_id, 100.0, '2024-01-01 10:05:00'),
+             (product_id, 80.0, '2024-01-01 10:30:00'),
+             (product_id, 120.0, '2024-01-01 09:59:00'),  # arrives late
+             (product_id, 90.0, '2024-01-02 08:00:00')]
+        )
+
+    daily = db_manager.get_price_history(sample_product['og:url'], 'day')
+    assert [(d['bucket_start'], d['min_price'], d['max_price'], d['last_price']) for d in daily] == [
+        ('2024-01-01 00:00:00', 80.0, 120.0, 80.0),
+        ('2024-01-02 00:00:00', 90.0, 90.0, 90.0),
+    ]
+
+    hourly = db_manager.get_price_history(sample_product['og:url'], 'hour', since='2024-01-01 10:00:00')
+    assert [(h['bucket_start'], h['observations']) for h in hourly] == [
+        ('2024-01-01 10:00:00', 2),
+        ('2024-01-02 08:00:00', 1),
+    ]
+
+    with pytest.raises(ValueError):
+        db_manager.get_price_history(sample_product['og:url'], 'week')
+
+def _insert_numbered_products(db_manager, count):
+    db_manager.bulk_upsert_products([{
+        'og:title': f'Product {i:02d}',
+        'og:url': f'http://test.com/{i}',
+        'product:price:amount': str(i * 10),
+        'product-delivery-time': '1-2 days'
+    } for i in range(count)])
+
+def test_products_page_walks_catalog(db_manager):
+    """Test that keyset pages cover every product exactly once in sort order"""
+    _insert_numbered_products(db_manager, 7)
+
+    seen = []
+    cursor = None
+    while True:
+        page = db_manager.get_products_page(page_size=3, sort_by='price', descending=False, after=cursor)
+        seen.extend(row['Price'] for row in page['rows'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert seen == [f"€ {i * 10:.2f}" for i in range(7)]
+
+def test_products_page_filter_and_sort(db_manager):
+    """Test that filtering and descending sort run in SQL"""
+    _insert_numbered_products(db_manager, 12)
+
+    page = db_manager.get_products_page(page_size=5, sort_by='product_name', descending=True, search='product 1')
+
+    assert [row['Product name'] for row in page['rows']] == ['Product 11', 'Product 10']
+    assert page['next_cursor'] is None
+    assert db_manager.get_products_page(search='100%')['rows'] == []
+
+def test_products_page_rejects_unknown_sort(db_manager):
+    """Test that only indexed columns can be used for sorting"""
+    with pytest.raises(ValueError):
+        db_manager.get_products_page(sort_by='url; DROP TABLE products')
+
+def test_products_changed_since(db_manager):
+    """Test that a delta only returns rows changed at or after the watermark"""
+    _insert_numbered_products(db_manager, 3)
+    with db_manager._write() as conn:
+        conn.execute("UPDATE products SET timestamp = '2024-01-01 00:00:00'")
+        conn.execute("UPDATE products SET timestamp = '2024-01-02 00:00:00' WHERE url = 'http://test.com/2'")
+
+    full = db_manager.get_products_changed_since()
+    assert full['full'] and len(full['rows']) == 3
+    assert full['watermark'] == '2024-01-02 00:00:00'
+
+    delta = db_manager.get_products_changed_since(full['watermark'], full['generation'])
+    assert not delta['full']
+    assert [row['URL'] for row in delta['rows']] == ['http://test.com/2']
+
+def test_products_changed_since_after_clear(db_manager, sample_product):
+    """Test that deleting rows forces a full reload"""
+    db_manager.insert_product(sample_product)
+    first = db_manager.get_products_changed_since()
+    db_manager.clear_table()
+
+    delta = db_manager.get_products_changed_since(first['watermark'], first['generation'])
+    assert delta['full']
+    assert delta['rows'] == []
+
+def test_data_version_tracks_all_writers(db_manager, sample_product):
+    """Test that the data version changes on our writes and on writes by other connections"""
+    version = db_manager.data_version()
+    db_manager.insert_product(sample_product)
+    assert db_manager.data_version() != version
+
+    version = db_manager.data_version()
+    with closing(sqlite3.connect(db_manager.db_name)) as conn, conn:
+        conn.execute("UPDATE products SET price = 1")
+    assert db_manager.data_version() != version
+
+def test_get_all_products_is_cached_until_write(db_manager, sample_product):
+    """Test that unchanged data is served from the cache"""
+    db_manager.insert_product(sample_product)
+    db_manager.get_all_products()
+
+    with patch.object(db_manager, '_query_all_products', wraps=db_manager._query_all_products) as mock_query:
+        db_manager.get_all_products()
+        assert mock_query.call_count == 0
+
+        db_manager.clear_table()
+        assert db_manager.get_all_products() == []
+        assert mock_query.call_count == 1
+
+def test_get_all_products_survives_crawl_progress(db_manager, sample_product):
+    """Test that commits that don't touch the products keep the cached rows"""
+    db_manager.insert_product(sample_product)
+    db_manager.get_all_products()
+
+    with patch.object(db_manager, '_query_all_products', wraps=db_manager._query_all_products) as mock_query:
+        db_manager.add_to_frontier(['http://test.com/next'])
+        db_manager.checkpoint_frontier(done=db_manager.claim_frontier(1))
+        assert len(db_manager.get_all_products()) == 1
+        assert mock_query.call_count == 0
+
+        db_manager.insert_product({**sample_product, 'og:url': 'http://test.com/other'})
+        assert len(db_manager.get_all_products()) == 2
+        assert mock_query.call_count == 1
+
+def test_frontier_life_cycle(db_manager):
+    """Test claiming, checkpointing, retrying and giving up on frontier URLs"""
+    assert db_manager.add_to_frontier(f'http://test.com/{i}' for i in range(5)) == 5
+    assert db_manager.add_to_frontier(['http://test.com/0']) == 0
+
+    claimed = db_manager.claim_frontier(3)
+    assert claimed == ['http://test.com/0', 'http://test.com/1', 'http://test.com/2']
+    assert db_manager.frontier_counts() == {'pending': 2, 'in_flight': 3, 'done': 0, 'failed': 0}
+
+    db_manager.checkpoint_frontier(done=claimed[:2], failed=[(claimed[2], 'timeout')], max_attempts=2)
+    assert db_manager.frontier_counts() == {'pending': 3, 'in_flight': 0, 'done': 2, 'failed': 0}
+
+    # The failed URL is retried once more, after the URLs that were already waiting
+    assert db_manager.claim_frontier(10) == ['http://test.com/2', 'http://test.com/3', 'http://test.com/4']
+    db_manager.checkpoint_frontier(failed=[('http://test.com/2', 'timeout')], max_attempts=2)
+    assert db_manager.frontier_counts()['failed'] == 1
+
+def test_frontier_recovery_and_restart(db_manager):
+    """Test that interrupted URLs become pending again and a new round starts from scratch"""
+    db_manager.add_to_frontier(['http://test.com/1', 'http://test.com/2'])
+    db_manager.claim_frontier(1)
+    assert db_manager.recover_frontier() == 1
+    assert db_manager.frontier_counts()['pending'] == 2
+
+    db_manager.checkpoint_frontier(done=db_manager.claim_frontier(2))
+    db_manager.restart_frontier()
+    assert db_manager.frontier_counts() == {'pending': 2, 'in_flight': 0, 'done': 0, 'failed': 0}
+
+def test_unchanged_products_are_not_rewritten(db_manager, sample_product):
+    """Test that identical re-crawls skip the write and keep timestamp and history"""
+    db_manager.insert_product(sample_product)
+    with db_manager._write() as conn:
+        conn.execute("UPDATE products SET timestamp = '2024-01-01 00:00:00'")
+    version = db_manager.data_version()
+
+    stats = db_manager.bulk_upsert_products([sample_product])
+
+    assert stats['unchanged'] == 1
+    assert db_manager.data_version() == version  # recently seen, so nothing was written
+    with closing(sqlite3.connect(db_manager.db_name)) as conn, conn:
+        assert conn.execute('SELECT timestamp FROM products').fetchone()[0] == '2024-01-01 00:00:00'
+    assert len(db_manager.get_price_observations(sample_product['og:url'])) == 1
+
+def test_last_seen_is_refreshed_when_stale(db_manager, sample_product):
+    """Test that an unchanged product only gets last_seen updated once it is old"""
+    db_manager.insert_product(sample_product)
+    with db_manager._write() as conn:
+        conn.execute("UPDATE products SET last_seen = '2024-01-01 00:00:00', last_changed = '2024-01-01 00:00:00'")
+
+    db_manager.insert_product(sample_product)
+
+    with closing(sqlite3.connect(db_manager.db_name)) as conn, conn:
+        last_seen, last_changed = conn.execute('SELECT last_seen, last_changed FROM products').fetchone()
+    assert last_seen > '2024-01-01 00:00:00'
+    assert last_changed == '2024-01-01 00:00:00'
+
+def test_fingerprint_columns_are_added_to_old_databases(tmp_path):
+    """Test that a products table without the new columns is upgraded and backfilled"""
+    path = str(tmp_path / 'old.db')
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute('''
+            CREATE TABLE products (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_name TEXT NOT NULL,
+                url TEXT NOT NULL UNIQUE,
+                price REAL NOT NULL,
+                delivery_time TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT INTO products (product_name, url, price, delivery_time) "
+                     "VALUES ('Test Product', 'http://test.com', 99.99, '1-2 days')")
+    conn.close()
+
+    db = DatabaseManager(path)
+    stats = db.bulk_upsert_products([{
+        'og:title': 'Test Product',
+        'og:url': 'http://test.com',
+        'product:price:amount': '99.99',
+        'product-delivery-time': '1-2 days'
+    }])
+    db.close()
+    assert stats['unchanged'] == 1
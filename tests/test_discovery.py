@@ -0,0 +1,107 @@
+import pytest
+from unittest.mock import MagicMock
+from scraper.db_manager import DatabaseManager
+from scraper.discovery import BloomFilter, SeenSet, canonicalize_url, discover_products, extract_links
+
+SITE = {
+    'https://azerty.nl/componenten': '''
+        <a href="/componenten/cpu">CPU</a>
+        <a href="/componenten/moederborden#top">Moederborden</a>
+        <a href="https://other.com/product/x/1">Elsewhere</a>
+        <a href="/over-ons">About</a>''',
+    'https://azerty.nl/componenten/cpu': '''
+        <a href="/product/amd-ryzen-7/8739079?utm_source=list">Ryzen</a>
+        <a href="/product/intel-i7/123">i7</a>
+        <link rel="next" href="/componenten/cpu?page=2">''',
+    'https://azerty.nl/componenten/cpu?page=2': '''
+        <a href="/product/intel-i7/123/">i7 again</a>
+        <a href="/product/intel-i9/456">i9</a>
+        <a href="/componenten">Back</a>''',
+    'https://azerty.nl/componenten/moederborden': '''
+        <a href="/product/asrock-x870/8599265">X870</a>''',
+}
+
+def _session():
+    def get(url, **kwargs):
+        return MagicMock(status_code=200, headers={'Content-Type': 'text/html'}, url=url, text=SITE.get(url, ''))
+    session = MagicMock()
+    session.get.side_effect = get
+    return session
+
+@pytest.fixture
+def db_manager(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'discovery.db'))
+    yield db
+    db.close()
+
+def test_canonicalize_url():
+    """Test that spellings of the same page collapse into one URL"""
+    assert canonicalize_url('HTTPS://Azerty.NL:443/product/a/1?utm_source=x&b=2&a=1#reviews') == \
+        'https://azerty.nl/product/a/1?a=1&b=2'
+    assert canonicalize_url('../cpu', 'https://azerty.nl/componenten/gpu') == 'https://azerty.nl/cpu'
+    assert canonicalize_url('http://azerty.nl:8080') == 'http://azerty.nl:8080/'
+    assert canonicalize_url('mailto:info@azerty.nl') is None
+    assert canonicalize_url('javascript:void(0)', 'https://azerty.nl/') is None
+
+def test_extract_links_honours_base():
+    """Test relative links, <base href> and duplicate removal"""
+    html = '<base href="/shop/"><a href="a">1</a><a href="a#x">2</a><link rel="stylesheet" href="s.css">'
+    assert extract_links(html, 'https://azerty.nl/') == ['https://azerty.nl/shop/a']
+
+def test_bloom_filter():
+    """Test that there are no false negatives and few false positives"""
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(f'https://azerty.nl/product/{i}')
+
+    assert all(f'https://azerty.nl/product/{i}' in bloom for i in range(10000))
+    false_positives = sum(f'https://azerty.nl/other/{i}' in bloom for i in range(10000))
+    assert false_positives < 300
+    assert len(bloom.bits) < 15000
+
+def test_seen_set_persists(db_manager):
+    """Test that seen URLs survive a new SeenSet on the same database"""
+    seen = SeenSet(db_manager, capacity=1000)
+    assert seen.add_new(['http://a.com/1', 'http://a.com/2'], 'product') == ['http://a.com/1', 'http://a.com/2']
+    assert seen.add_new(['http://a.com/2', 'http://a.com/3'], 'product') == ['http://a.com/3']
+
+    restarted = SeenSet(db_manager, capacity=1000)
+    assert 'http://a.com/1' in restarted.bloom
+    assert restarted.add_new(['http://a.com/1', 'http://a.com/4'], 'product') == ['http://a.com/4']
+
+def test_discover_products(db_manager):
+    """Test that listing pages are walked and every product is yielded once"""
+    products = list(discover_products(['https://azerty.nl/componenten'], db_manager, session=_session()))
+
+    assert products == [
+        'https://azerty.nl/product/amd-ryzen-7/8739079',
+        'https://azerty.nl/product/intel-i7/123',
+        'https://azerty.nl/product/asrock-x870/8599265',
+        'https://azerty.nl/product/intel-i9/456',
+    ]
+
+    # A second run only reports products that appeared since
+    SITE['https://azerty.nl/componenten/moederborden'] += '<a href="/product/msi-b650/777">B650</a>'
+    try:
+        again = list(discover_products(['https://azerty.nl/componenten'], db_manager, session=_session()))
+    finally:
+        SITE['https://azerty.nl/componenten/moederborden'] = '<a href="/product/asrock-x870/8599265">X870</a>'
+    assert again == ['https://azerty.nl/product/msi-b650/777']
+
+def test_discover_products_include_known(db_manager):
+    """Test that known products are yielded again on a refresh run, still once each"""
+    list(discover_products(['https://azerty.nl/componenten'], db_manager, session=_session()))
+    again = list(discover_products(['https://azerty.nl/componenten'], db_manager, session=_session(),
+                                   include_known=True))
+    assert sorted(again) == [
+        'https://azerty.nl/product/amd-ryzen-7/8739079',
+        'https://azerty.nl/product/asrock-x870/8599265',
+        'https://azerty.nl/product/intel-i7/123',
+        'https://azerty.nl/product/intel-i9/456',
+    ]
+
+def test_discover_products_max_pages(db_manager):
+    """Test that the crawl stops after max_pages listing pages"""
+    session = _session()
+    list(discover_products(['https://azerty.nl/componenten'], db_manager, session=session, max_pages=2))
+    assert session.get.call_count == 2
@@ -0,0 +1,76 @@
+import gzip
+import sqlite3
+import pytest
+import pandas as pd
+from scraper import export
+from scraper.db_manager import DatabaseManager
+from scraper.export import export_format, export_products
+
+@pytest.fixture
+def db_manager(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'live.db'))
+    db.bulk_upsert_products([{
+        'og:title': f'Product {i}',
+        'og:url': f'http://test.com/{i}',
+        'product:price:amount': f'{i}.50',
+        'product-delivery-time': '1-2 days' if i % 2 else None,
+    } for i in range(25)])
+    yield db
+    db.close()
+
+def test_backup_copies_database(db_manager, tmp_path):
+    """Test that the backup is a complete, independent copy"""
+    copy = tmp_path / 'copy.db'
+    db_manager.backup(str(copy))
+
+    conn = sqlite3.connect(copy)
+    assert conn.execute('SELECT COUNT(*) FROM products').fetchone()[0] == 25
+    conn.close()
+
+def test_export_csv_gz_in_chunks(db_manager, tmp_path):
+    """Test that a chunked csv.gz export round-trips every row with numeric prices"""
+    path = tmp_path / 'products.csv.gz'
+    assert export_products(db_manager, str(path), chunk_size=10) == 25
+
+    with gzip.open(path, 'rt') as f:
+        df = pd.read_csv(f)
+    assert len(df) == 25
+    assert df['price'].dtype == 'float64'
+    assert df['price'].sum() == pytest.approx(sum(i + 0.5 for i in range(25)))
+    # Only the snapshot is left behind, no temporary files
+    assert sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith('live.db')) == ['products.csv.gz']
+
+def test_export_parquet(db_manager, tmp_path):
+    """Test that Parquet snapshots keep the column types"""
+    path = tmp_path / 'products.parquet'
+    assert export_products(db_manager, str(path), chunk_size=10) == 25
+
+    df = pd.read_parquet(path)
+    assert len(df) == 25
+    assert df['price'].dtype == 'float64'
+    assert pd.api.types.is_datetime64_any_dtype(df['timestamp'])
+
+def test_export_arrow(db_manager, tmp_path):
+    """Test that Arrow IPC snapshots keep the column types"""
+    import pyarrow.feather as feather
+    path = tmp_path / 'products.arrow'
+    assert export_products(db_manager, str(path), chunk_size=10) == 25
+
+    df = feather.read_table(str(path)).to_pandas()
+    assert len(df) == 25
+    assert df['price'].dtype == 'float64'
+    assert pd.api.types.is_datetime64_any_dtype(df['timestamp'])
+
+def test_export_format(monkeypatch):
+    """Test format selection and the pyarrow fallback"""
+    monkeypatch.setattr(export, 'have_pyarrow', lambda: False)
+    assert export_format('out.csv.gz') == 'csv.gz'
+    assert export_format('snapshot') == 'csv.gz'
+    with pytest.raises(ImportError):
+        export_format('out.parquet')
+    with pytest.raises(ValueError):
+        export_format('out', 'xlsx')
+
+    monkeypatch.setattr(export, 'have_pyarrow', lambda: True)
+    assert export_format('snapshot') == 'parquet'
+    assert export_format('out.feather') == 'arrow'
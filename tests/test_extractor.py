@@ -0,0 +1,66 @@
+import pytest
+from html.parser import HTMLParser
+from unittest.mock import patch
+from scraper.extractor import ProductExtractor, _ExtractorParser
+from scraper.scraper import parse_product_page, parse_product_page_soup
+
+PROPERTIES = ['og:title', 'og:url', 'product:price:amount']
+
+PAGES = [
+    # Typical product page
+    '''<html><head>
+    <meta property="og:title" content="AMD Ryzen 7 &amp; Cooler">
+    <meta property="og:url" content="https://azerty.nl/product/1">
+    <meta property="product:price:amount" content="479.00">
+    </head><body><div>
+    <span class="text-success product-delivery-time"><i class="material-icons">timer</i> Morgen in huis</span>
+    </div></body></html>''',
+    # Missing properties and no delivery time
+    '<html><head><meta property="og:title" content=""></head><body></body></html>',
+    # Duplicate properties: the first one wins
+    '<meta property="og:title" content="first"><meta property="og:title" content="second">',
+    # Nested markup, comments and scripts inside the delivery time
+    '<span class="product-delivery-time">1 <b>-</b> 2<!-- x --> days<script>var a = 1;</script></span>',
+    # Unclosed delivery time element is closed by its parent
+    '<div><span class="product-delivery-time">Op voorraad</div><p>Not part of it</p>',
+    # Self-closing and void tags
+    '<br><span class="product-delivery-time">a<br/>b<img src="x">c</span><meta property="og:url" content="u"/>',
+    '',
+]
+
+@pytest.mark.parametrize('html', PAGES)
+def test_matches_beautifulsoup(html):
+    """Test that the streaming extractor returns exactly what the BeautifulSoup path returns"""
+    assert parse_product_page(html, PROPERTIES) == parse_product_page_soup(html, PROPERTIES)
+
+def test_extracts_fields():
+    """Test the extracted values of a typical page"""
+    meta_data = ProductExtractor(PROPERTIES).extract(PAGES[0])
+
+    assert meta_data == {
+        'og:title': 'AMD Ryzen 7 & Cooler',
+        'og:url': 'https://azerty.nl/product/1',
+        'product:price:amount': '479.00',
+        'product-delivery-time': 'Morgen in huis'
+    }
+
+def test_extractor_is_reusable():
+    """Test that one compiled extractor can be used for many pages"""
+    extractor = ProductExtractor(PROPERTIES)
+    first = extractor.extract(PAGES[0])
+    second = extractor.extract(PAGES[1])
+
+    assert first['og:title'] == 'AMD Ryzen 7 & Cooler'
+    assert second['og:title'] == ''
+    assert second['product-delivery-time'] is None
+
+def test_stops_after_all_fields_found():
+    """Test that parsing stops once every field has been found"""
+    extractor = ProductExtractor(PROPERTIES, chunk_size=64)
+    trailing = '<p>Product description</p>' * 1000
+
+    with patch.object(_ExtractorParser, 'feed', autospec=True, side_effect=HTMLParser.feed) as mock_feed:
+        meta_data = extractor.extract(PAGES[0] + trailing)
+
+    assert meta_data['product-delivery-time'] == 'Morgen in huis'
+    assert mock_feed.call_count < 20
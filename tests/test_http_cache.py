@@ -0,0 +1,90 @@
+import pytest
+import zlib
+from unittest.mock import patch, MagicMock
+from scraper.http_cache import ResponseCache
+from scraper.scraper import fetch_product
+
+PAGE = '<html><head><meta property="og:title" content="Cached Product"></head></html>'
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture to provide an empty response cache"""
+    response_cache = ResponseCache(str(tmp_path / 'cache.db'))
+    yield response_cache
+    response_cache.close()
+
+def test_store_and_get(cache):
+    """Test that bodies and validators round-trip through the cache"""
+    assert cache.store('http://test.com/1', {'ETag': '"abc"'}, PAGE, {'og:title': 'Cached Product'})
+
+    entry = cache.get('http://test.com/1')
+    assert entry.body == PAGE
+    assert entry.meta_data == {'og:title': 'Cached Product'}
+    assert ResponseCache.conditional_headers(entry) == {'If-None-Match': '"abc"'}
+    assert len(entry.compressed_body) < len(PAGE.encode()) * 2
+
+def test_responses_without_validators_are_not_cached(cache):
+    """Test that responses without ETag or Last-Modified are skipped"""
+    assert not cache.store('http://test.com/1', {}, PAGE)
+    assert cache.get('http://test.com/1') is None
+    assert ResponseCache.conditional_headers(None) == {}
+
+def test_lru_eviction(tmp_path):
+    """Test that the least recently used entry is evicted when the cache is full"""
+    body = 'x' * 1000
+    entry_size = len(zlib.compress(body.encode(), 6))
+    cache = ResponseCache(str(tmp_path / 'cache.db'), max_bytes=entry_size * 2)
+
+    cache.store('http://test.com/1', {'ETag': '1'}, body)
+    cache.store('http://test.com/2', {'ETag': '2'}, body)
+    cache.get('http://test.com/1')  # 1 is now more recent than 2
+    cache.store('http://test.com/3', {'ETag': '3'}, body)
+
+    assert cache.get('http://test.com/2') is None
+    assert cache.get('http://test.com/1') is not None
+    assert cache.total_size <= cache.max_bytes
+    cache.close()
+
+def test_not_modified_skips_parse(cache):
+    """Test that a 304 reuses the cached extraction without parsing"""
+    cache.store('http://test.com/1', {'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'},
+                PAGE, {'og:title': 'Cached Product', 'product-delivery-time': None})
+    session = MagicMock()
+    session.get.return_value = MagicMock(status_code=304)
+
+    with patch('scraper.scraper.parse_product_page') as mock_parse:
+        meta_data = fetch_product('http://test.com/1', ['og:title'], session, cache)
+
+    mock_parse.assert_not_called()
+    assert meta_data['og:title'] == 'Cached Product'
+    sent_headers = session.get.call_args.kwargs['headers']
+    assert sent_headers == {'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+
+def test_full_response_is_cached(cache):
+    """Test that a 200 response with validators is stored for the next run"""
+    response = MagicMock(status_code=200, url='http://test.com/1', text=PAGE)
+    response.headers = {'Content-Type': 'text/html', 'ETag': '"v1"'}
+    session = MagicMock()
+    session.get.return_value = response
+
+    meta_data = fetch_product('http://test.com/1', ['og:title'], session, cache)
+
+    assert meta_data['og:title'] == 'Cached Product'
+    assert cache.get('http://test.com/1').etag == '"v1"'
+
+def test_lookups_do_not_write(tmp_path):
+    """Test that access times are buffered and written in batches"""
+    cache = ResponseCache(str(tmp_path / 'cache.db'), access_batch_size=3)
+    for i in range(3):
+        cache.store(f'http://test.com/{i}', {'ETag': str(i)}, PAGE)
+    changes = cache._conn.total_changes
+
+    cache.get('http://test.com/0')
+    cache.get('http://test.com/1')
+    cache.get('http://test.com/0')
+    cache.get('http://test.com/missing')
+    assert cache._conn.total_changes == changes
+
+    cache.get('http://test.com/2')  # third URL pending: one batch of three updates
+    assert cache._conn.total_changes == changes + 3
+    cache.close()
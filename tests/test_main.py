@@ -0,0 +1,93 @@
+import os
+import sys
+import subprocess
+import pytest
+from unittest.mock import patch
+import main
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_parse_args_defaults_to_run():
+    """Test that the old `main.py [URL_FILE]` invocation still scrapes and serves"""
+    args = main.parse_args(['urls.txt'])
+    assert args.command == 'run' and args.urls == 'urls.txt' and args.mode == 'frontier'
+
+    args = main.parse_args(['--db', 'other.db'])
+    assert args.command == 'run' and args.db == 'other.db' and args.urls is None
+
+def test_db_option_anywhere():
+    """Test that --db works before or after the command, with or without '='"""
+    for argv in (['--db=x.db', 'scrape'], ['scrape', '--db', 'x.db'], ['scrape', '-', '--db=x.db'],
+                 ['--db', 'x.db', 'export', 'out.csv.gz'], ['--db=x.db']):
+        args = main.parse_args(argv)
+        assert args.db == 'x.db', argv
+    assert main.parse_args(['serve']).db == os.environ.get('DATABASE_PATH', 'product_data.db')
+
+def test_parse_args_subcommands():
+    """Test the scrape and serve options"""
+    args = main.parse_args(['--db', 'x.db', 'scrape', '-', '--mode', 'pipeline', '--rate-limit', '--hedge'])
+    assert (args.db, args.command, args.urls, args.mode) == ('x.db', 'scrape', '-', 'pipeline')
+    assert args.rate_limit and args.hedge
+    assert args.lease is None
+    assert main.parse_args(['scrape', '--lease', '120']).lease == 120
+    assert main.parse_args(['scrape', '--metrics-port', '9100']).metrics_port == 9100
+
+    args = main.parse_args(['serve', '--incremental', '--port', '9000'])
+    assert args.command == 'serve' and args.incremental and args.port == 9000
+
+def test_scrape_does_not_import_the_dashboard(tmp_path):
+    """Test that a crawl worker never loads pandas, dash or bs4"""
+    (tmp_path / 'urls.txt').write_text('')
+    script = (
+        "import sys, main\n"
+        "main.main(['--db', 'worker.db', 'scrape', 'urls.txt', '--no-cache'])\n"
+        "print(sorted(m for m in ('pandas', 'dash', 'bs4') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=tmp_path, capture_output=True, text=True,
+                            env={**os.environ, 'PYTHONPATH': REPO}, check=True)
+    assert result.stdout.strip() == '[]'
+
+def test_serve_passes_options(tmp_path):
+    """Test that serve starts the dashboard with the requested layout"""
+    args = main.parse_args(['--db', str(tmp_path / 'serve.db'), 'serve', '--paginated', '--page-size', '20',
+                            '--workers', '4'])
+    with patch('app.app_runner.run_application') as run_application:
+        main.serve(args)
+    _, kwargs = run_application.call_args
+    assert kwargs['paginated'] and kwargs['page_size'] == 20 and not kwargs['incremental']
+    assert kwargs['port'] == 8080 and kwargs['workers'] == 4
+
+def test_discover_yields_known_products_in_every_mode():
+    """Test that no mode relies on the seen-set to skip known products"""
+    for mode in ('frontier', 'pipeline', 'scheduler'):
+        args = main.parse_args(['scrape', '--mode', mode, '--discover', 'https://azerty.nl/componenten'])
+        with patch('scraper.discovery.discover_products') as discover:
+            main._iter_discovered(args, None, None, None)
+        assert discover.call_args.kwargs['include_known'] is True
+
+def test_interrupted_discovery_loses_no_products(tmp_path):
+    """Test that products seen before a crash still reach the frontier on the next run"""
+    from scraper.db_manager import DatabaseManager
+    from tests.test_discovery import _session
+
+    class Crash(BaseException):
+        """Stands in for the container being stopped"""
+
+    session = _session()
+    fetch = session.get.side_effect
+
+    def crash_on_second_page(url, **kwargs):
+        if session.get.call_count == 2:
+            raise Crash()
+        return fetch(url, **kwargs)
+
+    session.get.side_effect = crash_on_second_page
+    db_manager = DatabaseManager(str(tmp_path / 'discovery.db'))
+    args = main.parse_args(['scrape', '--discover', 'https://azerty.nl/componenten/cpu'])
+    with pytest.raises(Crash):
+        db_manager.add_to_frontier(main._iter_discovered(args, db_manager, session, None))
+    assert db_manager.frontier_counts()['pending'] == 0  # the batch was never written
+
+    db_manager.add_to_frontier(main._iter_discovered(args, db_manager, _session(), None))
+    assert db_manager.frontier_counts()['pending'] == 3
+    db_manager.close()
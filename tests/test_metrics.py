@@ -0,0 +1,69 @@
+import pytest
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock
+from scraper.metrics import Counter, Histogram, Registry, RESPONSES, MISSING_PROPERTIES, serve_metrics
+from scraper.scraper import fetch_product
+
+def test_histogram_buckets_are_cumulative():
+    """Test bucket assignment, sum and count in the exposition output"""
+    histogram = Histogram('test_seconds', 'Test', ['phase'], buckets=(0.1, 1.0))
+    histogram.observe(0.05, 'a')
+    histogram.observe(0.5, 'a')
+    histogram.observe(5, 'a')
+
+    lines = histogram.samples()
+    assert 'test_seconds_bucket{phase="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{phase="a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{phase="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_sum{phase="a"} 5.55' in lines
+    assert 'test_seconds_count{phase="a"} 3' in lines
+
+def test_histogram_time():
+    """Test that the timer observes once per block"""
+    histogram = Histogram('test_timer_seconds', 'Test')
+    with histogram.time():
+        pass
+    assert histogram.count() == 1
+
+def test_registry_render():
+    """Test HELP/TYPE lines, label escaping and duplicate names"""
+    registry = Registry()
+    counter = registry.register(Counter('test_requests', 'Requests', ['host']))
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+
+    text = registry.render()
+    assert '# HELP test_requests Requests\n# TYPE test_requests counter\n' in text
+    assert 'test_requests_total{host="a\\"b"} 3' in text
+    with pytest.raises(ValueError):
+        registry.register(Counter('test_requests', 'Again'))
+
+def test_fetch_product_records_metrics():
+    """Test that status codes and missing-property skips are counted per host"""
+    response = MagicMock(status_code=200, headers={'Content-Type': 'text/html'},
+                         url='http://metrics.test/1', text='<html></html>')
+    session = MagicMock()
+    session.get.return_value = response
+    responses = RESPONSES.value('metrics.test', '200')
+    missing = MISSING_PROPERTIES.value('metrics.test')
+
+    assert fetch_product('http://metrics.test/1', ['og:title'], session) is None
+    assert RESPONSES.value('metrics.test', '200') == responses + 1
+    assert MISSING_PROPERTIES.value('metrics.test') == missing + 1
+
+def test_serve_metrics():
+    """Test that a crawler without a web app exposes its registry over HTTP"""
+    registry = Registry()
+    registry.register(Counter('test_pages', 'Pages')).inc()
+    server = serve_metrics(0, host='127.0.0.1', registry=registry)
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with urllib.request.urlopen(f'{base}/metrics') as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert 'test_pages_total 1' in response.read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f'{base}/other')
+    finally:
+        server.shutdown()
+        server.server_close()
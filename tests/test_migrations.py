@@ -0,0 +1,127 @@
+import sqlite3
+import pytest
+from scraper import migrations
+from scraper.db_manager import DatabaseManager
+from scraper.migrations import SCHEMA_VERSION, check_duplicates, migrate, migrate_database, schema_version
+
+def _legacy_db(path, rows):
+    """Creates a products table from before url was unique"""
+    with sqlite3.connect(path) as conn:
+        conn.execute('''
+            CREATE TABLE products (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_name TEXT NOT NULL,
+                url TEXT NOT NULL,
+                price REAL NOT NULL,
+                delivery_time TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.executemany('INSERT INTO products (product_name, url, price, delivery_time, timestamp) '
+                         'VALUES (?, ?, ?, ?, ?)', rows)
+    conn.close()
+
+LEGACY_ROWS = [
+    ('A', 'http://test.com/a', 10.0, 'slow', '2024-01-01 10:00:00'),
+    ('B', 'http://test.com/b', 20.0, 'fast', '2024-01-01 10:00:00'),
+    ('A', 'http://test.com/a', 12.0, 'fast', '2024-01-03 10:00:00'),
+    ('C', 'http://test.com/c', 30.0, None, '2024-01-01 10:00:00'),
+    ('A', 'http://test.com/a', 11.0, 'slow', '2024-01-02 10:00:00'),
+]
+
+def test_new_database_is_at_current_version(tmp_path):
+    """Test that a fresh database starts at the current version and migrates no-op"""
+    path = str(tmp_path / 'new.db')
+    DatabaseManager(path).close()
+
+    with sqlite3.connect(path) as conn:
+        assert schema_version(conn) == SCHEMA_VERSION
+        assert migrate(conn) == 0
+    conn.close()
+    assert migrate_database(path) == 0
+
+def test_legacy_database_keeps_latest_row(tmp_path):
+    """Test that duplicates collapse into the most recent row, whole row at once"""
+    path = str(tmp_path / 'legacy.db')
+    _legacy_db(path, LEGACY_ROWS)
+    progress = []
+
+    with sqlite3.connect(path) as conn:
+        assert migrate(conn, chunk_size=2, progress=lambda *args: progress.append(args)) == SCHEMA_VERSION
+        rows = conn.execute('SELECT url, price, delivery_time, fingerprint FROM products ORDER BY url').fetchall()
+    conn.close()
+
+    assert [row[:3] for row in rows] == [
+        ('http://test.com/a', 12.0, 'fast'),
+        ('http://test.com/b', 20.0, 'fast'),
+        ('http://test.com/c', 30.0, None),
+    ]
+    assert all(row[3] for row in rows)
+    # Three chunks of the copy, then the fingerprint backfill of the three kept rows
+    assert [p[2:] for p in progress if p[0] == 1] == [(2, 5), (4, 5), (5, 5)]
+    assert progress[-1][2:] == (3, 3)
+    assert check_duplicates(path) == []
+
+    # Opening the database adds everything else and finds nothing left to migrate
+    db = DatabaseManager(path)
+    assert db.get_products_page(sort_by='price', descending=False)['rows'][0]['Price'] == '€ 12.00'
+    assert db.frontier_counts()['pending'] == 0
+    db.close()
+
+def test_interrupted_migration_resumes(tmp_path):
+    """Test that a migration stopped after a chunk continues where it stopped"""
+    path = str(tmp_path / 'legacy.db')
+    _legacy_db(path, LEGACY_ROWS)
+
+    def crash(version, name, done, total):
+        raise RuntimeError("killed")
+
+    with sqlite3.connect(path) as conn:
+        with pytest.raises(RuntimeError):
+            migrate(conn, chunk_size=2, progress=crash)
+        assert schema_version(conn) == 0
+        assert conn.execute("SELECT value FROM db_meta WHERE key = 'migration_1_last_id'").fetchone() == ('2',)
+
+        calls = []
+        migrate(conn, chunk_size=2, progress=lambda *args: calls.append(args))
+        assert schema_version(conn) == SCHEMA_VERSION
+        assert [c[2] for c in calls if c[0] == 1] == [4, 5]
+        assert conn.execute('SELECT COUNT(*) FROM products').fetchone()[0] == 3
+        assert conn.execute("SELECT price FROM products WHERE url = 'http://test.com/a'").fetchone() == (12.0,)
+    conn.close()
+
+def test_failed_migration_keeps_version(tmp_path, monkeypatch):
+    """Test that a failing migration does not advance the schema version"""
+    path = str(tmp_path / 'legacy.db')
+    _legacy_db(path, LEGACY_ROWS[:1])
+
+    def broken(conn, version, chunk_size, progress):
+        raise sqlite3.OperationalError("boom")
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [migrations.MIGRATIONS[0], ('broken', broken)])
+    with sqlite3.connect(path) as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            migrate(conn)
+        assert schema_version(conn) == 1
+    conn.close()
+
+def test_frontier_gains_lease_columns(tmp_path):
+    """Test that a frontier from before leases keeps its URLs and can be leased"""
+    path = str(tmp_path / 'old_frontier.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute('''
+            CREATE TABLE frontier (
+                url TEXT PRIMARY KEY,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_fetched DATETIME,
+                last_error TEXT
+            )
+        ''')
+        conn.execute("INSERT INTO frontier (url) VALUES ('http://test.com/a')")
+        conn.execute('PRAGMA user_version = 2')
+    conn.close()
+
+    db = DatabaseManager(path)
+    assert db.lease_frontier('worker', 10) == ['http://test.com/a']
+    db.close()
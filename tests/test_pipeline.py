@@ -0,0 +1,113 @@
+import time
+import pytest
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from scraper.db_manager import DatabaseManager
+from scraper.pipeline import run_pipeline
+
+PROPERTIES = ['og:title', 'og:url', 'product:price:amount']
+
+class ProductHandler(BaseHTTPRequestHandler):
+    """Serves /product/<n> pages, an incomplete /missing page and a failing /error page"""
+
+    def do_GET(self):
+        if self.path.startswith('/product/'):
+            page_id = self.path.rsplit('/', 1)[1]
+            body = (f'<meta property="og:title" content="Product {page_id}">'
+                    f'<meta property="og:url" content="http://test.com/{page_id}">'
+                    f'<meta property="product:price:amount" content="{page_id}.50">')
+            self._send(200, body)
+        elif self.path == '/missing':
+            self._send(200, '<html></html>')
+        else:
+            self._send(500, 'error')
+
+    def _send(self, status, body):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+class LateCallbackFuture(Future):
+    """Future whose done callbacks run well after waiters were woken"""
+
+    def _invoke_callbacks(self):
+        time.sleep(0.05)
+        super()._invoke_callbacks()
+
+class LateCallbackExecutor(Executor):
+    """Runs every call in its own thread and returns a LateCallbackFuture"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = LateCallbackFuture()
+
+        def run():
+            time.sleep(0.01)  # finish after the caller has added its callbacks
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+@pytest.fixture
+def base_url():
+    """Fixture to run a local product server"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ProductHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Fixture to provide a test database manager"""
+    db = DatabaseManager(str(tmp_path / 'test.db'))
+    yield db
+    db.close()
+
+def test_pipeline_scrapes_and_saves(base_url, db_manager):
+    """Test that all stages run and small queues and batches still finish"""
+    urls = [f'{base_url}/product/{i}' for i in range(30)]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = run_pipeline(urls, PROPERTIES, db_manager, fetch_workers=4,
+                               batch_size=7, queue_size=2, parse_executor=executor)
+
+    assert sorted(r['og:title'] for r in results) == sorted(f'Product {i}' for i in range(30))
+    assert len(db_manager.get_all_products()) == 30
+
+def test_pipeline_skips_failures(base_url, db_manager):
+    """Test that fetch errors and incomplete pages are logged and skipped"""
+    urls = [f'{base_url}/error', f'{base_url}/missing', f'{base_url}/product/1']
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = run_pipeline(urls, PROPERTIES, db_manager, fetch_workers=2, parse_executor=executor)
+
+    assert [r['og:title'] for r in results] == ['Product 1']
+
+def test_pipeline_with_parser_processes(base_url, db_manager):
+    """Test the default process pool for parsing"""
+    urls = [f'{base_url}/product/{i}' for i in range(4)]
+
+    results = run_pipeline(urls, PROPERTIES, db_manager, fetch_workers=2, parse_workers=2)
+
+    assert len(results) == 4
+    assert db_manager.get_all_products()[0]['Price'].startswith('€')
+
+def test_pipeline_keeps_products_parsed_at_the_end(base_url, db_manager):
+    """Test that the writer gets every product even when parse callbacks run late"""
+    urls = [f'{base_url}/product/{i}' for i in range(5)]
+
+    results = run_pipeline(urls, PROPERTIES, db_manager, fetch_workers=2,
+                           parse_executor=LateCallbackExecutor())
+
+    assert len(results) == 5
+    assert len(db_manager.get_all_products()) == 5
@@ -0,0 +1,96 @@
+import pytest
+from unittest.mock import MagicMock
+from scraper.rate_limit import HostLimiter, RateLimiter, parse_retry_after
+from scraper.scraper import fetch_response
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_token_bucket_limits_rate(clock):
+    """Test that the bucket allows a burst and then spaces requests by the rate"""
+    limiter = HostLimiter(rate=2.0, burst=2, initial_concurrency=10, clock=clock)
+
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert limiter.try_acquire() == 0
+
+def test_concurrency_window(clock):
+    """Test that no more requests than the window start until one is released"""
+    limiter = HostLimiter(rate=100.0, burst=100, initial_concurrency=2, clock=clock)
+
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() > 0
+
+    limiter.release(200, 0.1)
+    assert limiter.try_acquire() == 0
+
+def test_aimd(clock):
+    """Test additive increase on fast successes and multiplicative decrease on throttling"""
+    limiter = HostLimiter(rate=4.0, initial_concurrency=4, max_concurrency=8, clock=clock)
+
+    for _ in range(5):  # about one window's worth of responses grows it by one
+        limiter.release(200, 0.1)
+    assert limiter.stats()['concurrency'] == 5
+    assert limiter.rate > 4.0
+
+    limiter.release(429, 0.1)
+    assert limiter.stats()['concurrency'] == 2
+
+    rate = limiter.rate
+    limiter.release(200, 10.0)  # slower than target_latency
+    assert limiter.rate == pytest.approx(rate / 2)
+    assert limiter.stats()['concurrency'] == 1
+
+def test_retry_after_pauses_host(clock):
+    """Test that Retry-After blocks the host for the given time"""
+    limiter = HostLimiter(clock=clock)
+    limiter.release(503, 0.1, retry_after=30)
+
+    assert limiter.try_acquire() == pytest.approx(30)
+    assert limiter.stats()['paused_for'] == pytest.approx(30)
+    clock.now += 30
+    assert limiter.try_acquire() == 0
+
+def test_parse_retry_after():
+    """Test delta-seconds, HTTP dates and invalid values"""
+    assert parse_retry_after('120') == 120
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:10 GMT', now=1445412480) == 10
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+def test_limiters_are_per_host():
+    """Test that hosts are throttled independently"""
+    limiter = RateLimiter(rate=1.0, burst=1)
+    limiter.acquire('http://a.com/1')
+    limiter.release('http://a.com/1', 429, 0.1, '60')
+
+    limiter.acquire('http://b.com/1')
+    stats = limiter.stats()
+    assert stats['a.com']['paused_for'] > 0
+    assert stats['b.com']['in_flight'] == 1
+
+def test_fetch_response_reports_outcome():
+    """Test that fetch_response reports status and Retry-After to the limiter"""
+    session = MagicMock()
+    session.get.return_value = MagicMock(status_code=429, headers={'Retry-After': '5'})
+    limiter = RateLimiter()
+
+    fetch_response('http://test.com/1', session, limiter=limiter)
+
+    stats = limiter.stats()['test.com']
+    assert stats['in_flight'] == 0
+    assert stats['paused_for'] > 0
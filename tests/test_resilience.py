@@ -0,0 +1,131 @@
+import time
+import threading
+import pytest
+import requests
+from unittest.mock import MagicMock
+from scraper.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, ResilientFetcher
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def _response(status):
+    return MagicMock(status_code=status, headers={})
+
+def _session(*outcomes):
+    """Session whose get returns or raises the given outcomes in order"""
+    session = MagicMock()
+    session.get.side_effect = list(outcomes)
+    return session
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_retries_transient_failures(clock):
+    """Test that connection errors and 503s are retried until a success"""
+    session = _session(requests.ConnectionError('reset'), _response(503), _response(200))
+    sleeps = []
+    fetcher = ResilientFetcher(session, retries=3, clock=clock, sleep=sleeps.append)
+
+    assert fetcher.get('http://test.com/1').status_code == 200
+    assert session.get.call_count == 3
+    assert len(sleeps) == 2
+
+def test_gives_up_after_last_attempt(clock):
+    """Test that the last error or error response is passed on"""
+    fetcher = ResilientFetcher(_session(*[requests.Timeout('slow')] * 2), retries=2,
+                               clock=clock, sleep=lambda s: None)
+    with pytest.raises(requests.Timeout):
+        fetcher.get('http://test.com/1')
+
+    fetcher = ResilientFetcher(_session(_response(503), _response(503)), retries=2,
+                               clock=clock, sleep=lambda s: None)
+    assert fetcher.get('http://test.com/1').status_code == 503
+
+def test_client_errors_are_not_retried(clock):
+    """Test that a 404 is returned immediately"""
+    session = _session(_response(404))
+    fetcher = ResilientFetcher(session, clock=clock, sleep=lambda s: None)
+
+    assert fetcher.get('http://test.com/1').status_code == 404
+    assert session.get.call_count == 1
+
+def test_circuit_breaker_states(clock):
+    """Test that the circuit opens, lets one trial through and closes on success"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    clock.now += 10
+    assert breaker.state == 'half-open'
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+def test_open_circuit_fails_fast(clock):
+    """Test that a failing host stops receiving requests while others are unaffected"""
+    session = MagicMock()
+    session.get.side_effect = lambda url, **kwargs: (
+        _response(200) if 'ok.com' in url else (_ for _ in ()).throw(requests.ConnectionError('down')))
+    fetcher = ResilientFetcher(session, retries=1, failure_threshold=2, clock=clock, sleep=lambda s: None)
+
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            fetcher.get('http://down.com/1')
+    with pytest.raises(CircuitOpenError):
+        fetcher.get('http://down.com/2')
+    assert session.get.call_count == 2
+
+    assert fetcher.get('http://ok.com/1').status_code == 200
+    assert fetcher.stats()['circuits'] == {'down.com': 'open', 'ok.com': 'closed'}
+
+def test_latency_percentile():
+    """Test the sliding window percentile"""
+    tracker = LatencyTracker(window=100)
+    assert tracker.percentile(95) is None
+    for latency in range(1, 101):
+        tracker.add(latency / 100)
+    assert tracker.percentile(95) == pytest.approx(0.96)
+
+def test_hedged_request_beats_slow_attempt():
+    """Test that a request slower than p95 is duplicated and the faster answer wins"""
+    release = threading.Event()
+    calls = []
+
+    def get(url, **kwargs):
+        calls.append(url)
+        if len(calls) == 1:
+            release.wait(5)  # the stuck first attempt
+            return _response(500)
+        return _response(200)
+
+    session = MagicMock()
+    session.get.side_effect = get
+    fetcher = ResilientFetcher(session, hedge=True, hedge_min_samples=5)
+    for _ in range(5):
+        fetcher.latencies('http://test.com/1').add(0.01)
+
+    start = time.monotonic()
+    response = fetcher.get('http://test.com/1')
+    release.set()
+
+    assert response.status_code == 200
+    assert time.monotonic() - start < 1
+    assert fetcher.stats()['hedges_sent'] == 1
+    assert fetcher.stats()['hedges_won'] == 1
+    fetcher.close()
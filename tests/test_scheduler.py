@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from scraper.scheduler import RevisitScheduler
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def _product(price, delivery='1-2 days'):
+    return {'og:title': 'Product', 'og:url': 'http://test.com/1',
+            'product:price:amount': price, 'product-delivery-time': delivery}
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_all_urls_due_at_start(clock):
+    """Test that new URLs are due immediately and batches are limited"""
+    scheduler = RevisitScheduler(['a', 'b', 'c'], [], MagicMock(), batch_size=2, clock=clock)
+
+    assert scheduler.pop_due() == ['a', 'b']
+    assert scheduler.pop_due() == ['c']
+    assert scheduler.pop_due() == []
+
+def test_interval_adapts_to_changes(clock):
+    """Test that changes shrink the interval and stable prices grow it within bounds"""
+    scheduler = RevisitScheduler(['u'], [], MagicMock(), min_interval=100, max_interval=1000,
+                                 initial_interval=400, growth=2, clock=clock)
+    scheduler.pop_due()
+
+    assert scheduler.record('u', _product('10')) == 800      # first visit, nothing to compare
+    assert scheduler.record('u', _product('10')) == 1000     # unchanged, capped at max
+    assert scheduler.record('u', _product('12')) == 500      # price changed
+    assert scheduler.record('u', _product('12', 'Morgen')) == 250
+    assert scheduler.record('u', _product('13')) == 125
+    assert scheduler.record('u', _product('14')) == 100      # capped at min
+    assert scheduler.record('u', None) == 100                # failed visit keeps the interval
+
+def test_next_visit_is_scheduled(clock):
+    """Test that a visited URL becomes due again after its interval"""
+    scheduler = RevisitScheduler(['u'], [], MagicMock(), initial_interval=60, growth=1, clock=clock)
+    scheduler.pop_due()
+    scheduler.record('u', _product('10'))
+
+    assert scheduler.next_due() == clock.now + 60
+    assert scheduler.pop_due(clock.now + 59) == []
+    assert scheduler.pop_due(clock.now + 60) == ['u']
+
+@patch('scraper.scheduler.fetch_product')
+def test_run_once_scrapes_and_saves(mock_fetch, clock):
+    """Test that due URLs are scraped through the regular path and saved in bulk"""
+    mock_fetch.side_effect = lambda url, *args: None if url == 'bad' else _product('10')
+    db_manager = MagicMock()
+    scheduler = RevisitScheduler(['good', 'bad'], ['og:title'], db_manager, clock=clock)
+
+    results = scheduler.run_once()
+
+    assert len(results) == 1
+    db_manager.bulk_upsert_products.assert_called_once()
+    assert scheduler.pop_due() == []
+    assert scheduler.next_due() > clock.now
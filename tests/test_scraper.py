@@ -1,17 +1,18 @@
 import pytest
 import requests
-from scraper.scraper import validate_url, scrape_and_save_to_db
+from scraper.scraper import validate_url, scrape_and_save_to_db, iter_scrape
+from scraper.session import check_response, create_session, get_session
 from unittest.mock import patch, MagicMock
 
 def test_validate_url_success():
     """Test URL validation with valid URL"""
-    with patch('requests.head') as mock_head:
+    with patch('requests.Session.head') as mock_head:
         mock_head.return_value = MagicMock(status_code=200)
         assert validate_url('http://valid-url.com') == True
 
 def test_validate_url_failure():
     """Test URL validation with invalid URL"""
-    with patch('requests.head') as mock_head:
+    with patch('requests.Session.head') as mock_head:
         mock_head.side_effect = requests.RequestException
         assert validate_url('http://invalid-url.com') == False
 
@@ -21,12 +22,12 @@ def test_scrape_with_invalid_url():
     test_properties = ['og:title', 'og:url']
     test_file = 'test_output.csv'
     
-    with patch('requests.get') as mock_get:
+    with patch('requests.Session.get') as mock_get:
         mock_get.side_effect = requests.RequestException
         scrape_and_save_to_db(test_urls, test_properties, test_file)
         # Should not raise exception but log error
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_scrape_empty_response(mock_get):
     """Test scraping with empty response"""
     mock_response = MagicMock()
@@ -38,4 +39,102 @@ def test_scrape_empty_response(mock_get):
     test_file = 'test_output.csv'
     
     scrape_and_save_to_db(test_urls, test_properties, test_file)
-    # Should handle empty response gracefully
\ No newline at end of file
+    # Should handle empty response gracefully
+
+@patch('requests.Session.get')
+def test_scrape_uses_response_for_validation(mock_get):
+    """Test that non-HTML responses are rejected without a separate validation request"""
+    mock_response = MagicMock(status_code=200, url='http://test.com', text='<html></html>')
+    mock_response.headers = {'Content-Type': 'application/json'}
+    mock_get.return_value = mock_response
+    db_manager = MagicMock()
+
+    with patch('requests.Session.head') as mock_head:
+        results = scrape_and_save_to_db(['http://test.com'], ['og:title'], db_manager)
+
+    assert results == []
+    mock_head.assert_not_called()
+    db_manager.insert_product.assert_not_called()
+
+def test_check_response():
+    """Test validation of fetched responses"""
+    assert check_response('http://a.com', 200, 'text/html; charset=utf-8') is None
+    assert check_response('http://a.com', 404, 'text/html') is not None
+    assert check_response('http://a.com', 200, 'image/png') is not None
+
+def test_shared_session_is_reused():
+    """Test that the pooled session is shared between calls"""
+    assert get_session() is get_session()
+    session = create_session(host_pool_sizes={'azerty.nl': 32})
+    assert session.get_adapter('https://azerty.nl/product/1')._pool_maxsize == 32
+
+@patch('scraper.scraper.fetch_product')
+def test_scrape_flushes_in_batches(mock_fetch):
+    """Test that scraped products are written in bulk batches instead of per row"""
+    mock_fetch.side_effect = lambda url, *args: {'og:title': url, 'og:url': url, 'product:price:amount': '1'}
+    db_manager = MagicMock()
+    urls = [f'http://test.com/{i}' for i in range(5)]
+
+    results = scrape_and_save_to_db(urls, ['og:title'], db_manager, batch_size=2)
+
+    assert len(results) == 5
+    db_manager.insert_product.assert_not_called()
+    assert db_manager.bulk_upsert_products.call_count == 3
+
+@patch('scraper.scraper.fetch_product')
+def test_iter_scrape_is_lazy(mock_fetch):
+    """Test that URLs are consumed on demand and the last batch is saved when the generator is closed"""
+    mock_fetch.side_effect = lambda url, *args: {'og:title': url, 'og:url': url, 'product:price:amount': '1'}
+    db_manager = MagicMock()
+    saved = []
+    db_manager.bulk_upsert_products.side_effect = lambda products, **kwargs: saved.append(len(products))
+    consumed = []
+
+    def urls():
+        for i in range(1000):
+            consumed.append(i)
+            yield f'http://test.com/{i}'
+
+    products = iter_scrape(urls(), ['og:title'], db_manager, batch_size=10)
+    first = [next(products) for _ in range(3)]
+
+    assert [p['og:url'] for p in first] == [f'http://test.com/{i}' for i in range(3)]
+    assert len(consumed) == 3
+    db_manager.bulk_upsert_products.assert_not_called()
+
+    products.close()
+    assert saved == [3]
+
+
+def test_crawl_frontier_resumes(tmp_path):
+    """Test that a crawl interrupted mid-way only fetches the unfinished URLs on restart"""
+    from scraper.db_manager import DatabaseManager
+    from scraper.scraper import crawl_frontier
+
+    db_manager = DatabaseManager(str(tmp_path / 'frontier.db'))
+    urls = [f'http://test.com/{i}' for i in range(5)]
+    db_manager.add_to_frontier(urls)
+    fetched = []
+    crashed = []
+
+    class Crash(BaseException):
+        """Stands in for the process being killed"""
+
+    def fetch(url, *args):
+        fetched.append(url)
+        if url == 'http://test.com/3' and not crashed:
+            crashed.append(url)
+            raise Crash()  # the process dies in the middle of the second batch
+        return {'og:title': url, 'og:url': url, 'product:price:amount': '1'}
+
+    with patch('scraper.scraper.fetch_product', side_effect=fetch):
+        with pytest.raises(Crash):
+            crawl_frontier(['og:title'], db_manager, batch_size=2)
+        fetched.clear()
+        stats = crawl_frontier(['og:title'], db_manager, batch_size=2)
+
+    assert fetched == ['http://test.com/2', 'http://test.com/3', 'http://test.com/4']
+    assert stats == {'done': 3, 'failed': 0}
+    assert db_manager.frontier_counts()['done'] == 5
+    assert len(db_manager.get_all_products()) == 5
+    db_manager.close()
@@ -0,0 +1,42 @@
+import io
+import pytest
+from unittest.mock import patch
+from scraper.db_manager import DatabaseManager
+from scraper.sources import iter_urls
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Fixture to provide a test database with a few products"""
+    db = DatabaseManager(str(tmp_path / 'test_sources.db'))
+    db.bulk_upsert_products([
+        {'og:title': f'Product {i}', 'og:url': f'http://test.com/{i}', 'product:price:amount': '1'}
+        for i in range(5)
+    ])
+    yield db
+    db.close()
+
+def test_urls_from_file(tmp_path):
+    """Test that blank lines and comments are skipped"""
+    path = tmp_path / 'urls.txt'
+    path.write_text('http://test.com/1\n\n# comment\n  http://test.com/2  \n')
+
+    assert list(iter_urls(str(path))) == ['http://test.com/1', 'http://test.com/2']
+
+def test_urls_from_stdin():
+    """Test that '-' reads from stdin"""
+    with patch('sys.stdin', io.StringIO('http://test.com/1\nhttp://test.com/2\n')):
+        assert list(iter_urls('-')) == ['http://test.com/1', 'http://test.com/2']
+
+def test_urls_from_open_file():
+    """Test that any iterable of lines works"""
+    assert list(iter_urls(io.StringIO('http://test.com/1\n'))) == ['http://test.com/1']
+
+def test_urls_from_database(db_manager):
+    """Test that stored product URLs are read in chunks"""
+    assert list(db_manager.iter_product_urls(chunk_size=2)) == [f'http://test.com/{i}' for i in range(5)]
+    assert list(iter_urls(db_manager)) == [f'http://test.com/{i}' for i in range(5)]
+
+def test_missing_file_raises():
+    """Test that a missing file is reported when iteration starts"""
+    with pytest.raises(OSError):
+        list(iter_urls('does-not-exist.txt'))
@@ -0,0 +1,153 @@
+import threading
+import pytest
+from unittest.mock import patch
+from scraper.db_manager import DatabaseManager
+from scraper.scraper import crawl_frontier
+from scraper.work_queue import WorkQueue
+
+URLS = [f'http://test.com/{i}' for i in range(6)]
+
+class Clock:
+    """Wall clock the tests move by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'queue.db')
+    db_manager = DatabaseManager(path)
+    db_manager.add_to_frontier(URLS)
+    db_manager.close()
+    return path
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+def test_workers_claim_disjoint_batches(db_path, clock):
+    """Test that two processes' queues never hand out the same URL"""
+    first, second = DatabaseManager(db_path), DatabaseManager(db_path)
+    a = WorkQueue(first, owner='a', lease_seconds=60, clock=clock)
+    b = WorkQueue(second, owner='b', lease_seconds=60, clock=clock)
+
+    assert a.claim(4) == URLS[:4]
+    assert b.claim(4) == URLS[4:]
+    assert a.claim(4) == [] and b.claim(4) == []
+
+    assert a.ack(done=URLS[:3], failed=[(URLS[3], 'timeout')]) == URLS[:4]
+    assert b.ack(done=URLS[4:]) == URLS[4:]
+    assert a.counts() == {'pending': 1, 'in_flight': 0, 'done': 5, 'failed': 0}
+    assert b.claim(4) == [URLS[3]]
+    first.close()
+    second.close()
+
+def test_expired_lease_is_reclaimed(db_path, clock):
+    """Test that a dead worker's batch goes to another worker and its late ack is ignored"""
+    db_manager = DatabaseManager(db_path)
+    dead = WorkQueue(db_manager, owner='dead', lease_seconds=60, clock=clock)
+    alive = WorkQueue(db_manager, owner='alive', lease_seconds=60, clock=clock)
+
+    assert dead.claim(2) == URLS[:2]
+    clock.now += 59
+    assert alive.claim(2) == URLS[2:4]
+    clock.now += 2
+    assert alive.claim(2) == URLS[:2]
+
+    # The stalled worker wakes up: neither its done nor its failed URLs are recorded
+    assert dead.ack(done=[URLS[0]], failed=[(URLS[1], 'timeout')]) == []
+    assert dead.renew(URLS[:2]) == 0
+    assert alive.ack(done=URLS[:4]) == URLS[:4]
+    assert db_manager.frontier_counts()['done'] == 4
+    db_manager.close()
+
+def test_abandoned_urls_are_given_up(db_path, clock):
+    """Test that a URL whose worker keeps dying is failed after max_attempts"""
+    db_manager = DatabaseManager(db_path)
+    queue = WorkQueue(db_manager, owner='w', lease_seconds=10, max_attempts=2, clock=clock)
+
+    assert queue.claim(1) == [URLS[0]]
+    clock.now += 11
+    assert queue.claim(1) == [URLS[0]]
+    clock.now += 11
+    assert queue.claim(1) == [URLS[1]]
+    assert db_manager.frontier_counts()['failed'] == 1
+    db_manager.close()
+
+def test_keep_alive_renews_long_batches(db_path, clock):
+    """Test that a worker renewing its lease keeps its batch"""
+    db_manager = DatabaseManager(db_path)
+    slow = WorkQueue(db_manager, owner='slow', lease_seconds=10, clock=clock)
+    other = WorkQueue(db_manager, owner='other', lease_seconds=10, clock=clock)
+
+    batch = slow.claim(2)
+    with patch.object(db_manager, 'renew_frontier_leases', wraps=db_manager.renew_frontier_leases) as renew:
+        clock.now += 4
+        slow.keep_alive(batch)
+        assert renew.call_count == 0
+        clock.now += 2
+        slow.keep_alive(batch)
+        assert renew.call_count == 1
+    clock.now += 8
+    assert URLS[0] not in other.claim(10)
+    assert slow.ack(done=batch) == batch
+
+    # Released URLs are handed out again at once, without spending an attempt
+    assert other.release(URLS[2:4]) == 2
+    assert slow.claim(2) == URLS[2:4]
+    db_manager.close()
+
+def test_recover_frontier_leaves_leases_alone(db_path, clock):
+    """Test that a single-process restart does not steal URLs leased by running workers"""
+    db_manager = DatabaseManager(db_path)
+    WorkQueue(db_manager, owner='w', clock=clock).claim(2)
+    db_manager.claim_frontier(1)
+    assert db_manager.recover_frontier() == 1
+    assert db_manager.frontier_counts()['in_flight'] == 2
+    db_manager.close()
+
+def test_workers_split_a_crawl(db_path):
+    """Test that concurrent crawl_frontier workers fetch every URL exactly once"""
+    fetched = []
+    lock = threading.Lock()
+
+    def fetch(url, *args):
+        with lock:
+            fetched.append(url)
+        return {'og:title': url, 'og:url': url, 'product:price:amount': '1'}
+
+    managers = [DatabaseManager(db_path) for _ in range(3)]
+    stats = []
+    with patch('scraper.scraper.fetch_product', side_effect=fetch):
+        threads = [threading.Thread(target=lambda m=m: stats.append(
+            crawl_frontier(['og:title'], m, batch_size=1, queue=WorkQueue(m))))
+            for m in managers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert sorted(fetched) == sorted(URLS)
+    assert sum(s['done'] for s in stats) == len(URLS)
+    assert managers[0].frontier_counts()['done'] == len(URLS)
+    assert len(managers[0].get_all_products()) == len(URLS)
+    for m in managers:
+        m.close()
+
+def test_interrupted_worker_releases_its_batch(db_path):
+    """Test that a worker stopped mid-batch hands its URLs back without waiting for the lease"""
+    db_manager = DatabaseManager(db_path)
+
+    def fetch(url, *args):
+        if url == URLS[1]:
+            raise KeyboardInterrupt()
+        return {'og:title': url, 'og:url': url, 'product:price:amount': '1'}
+
+    with patch('scraper.scraper.fetch_product', side_effect=fetch):
+        with pytest.raises(KeyboardInterrupt):
+            crawl_frontier(['og:title'], db_manager, batch_size=3, queue=WorkQueue(db_manager))
+    assert db_manager.frontier_counts() == {'pending': 6, 'in_flight': 0, 'done': 0, 'failed': 0}
+    db_manager.close()
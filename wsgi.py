@@ -0,0 +1,26 @@
+"""
+WSGI entry point for running the dashboard under a multi-worker server, e.g.
+
+    gunicorn --workers 4 --bind 0.0.0.0:8080 wsgi:server
+
+Configured through the environment: DATABASE_PATH, DASHBOARD_LAYOUT (table,
+paginated or incremental), DASHBOARD_PAGE_SIZE and SNAPSHOT_DIR, the directory
+where the workers share the pre-rendered table. Every worker imports this
+module on its own, so no database connection is shared between processes.
+For the same reason there is no /metrics here: each worker would answer with
+its own counters. Crawl metrics are served by `main.py scrape --metrics-port`.
+"""
+import os
+from scraper.db_manager import DatabaseManager
+from app.app_runner import create_app
+
+database_path = os.environ.get('DATABASE_PATH', 'product_data.db')
+layout = os.environ.get('DASHBOARD_LAYOUT', 'table')
+
+app = create_app(DatabaseManager(database_path),
+                 paginated=layout == 'paginated',
+                 page_size=int(os.environ.get('DASHBOARD_PAGE_SIZE', '50')),
+                 incremental=layout == 'incremental',
+                 snapshot_dir=os.environ.get('SNAPSHOT_DIR', os.path.splitext(database_path)[0] + '_snapshots'),
+                 metrics=False)
+server = app.server